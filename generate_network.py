@@ -7,16 +7,614 @@ Ethereum PoA Network Generator
 import os
 import yaml
 import json
+import math
+import random
+import shutil
+import hashlib
+import importlib.util
+import secrets
+import ipaddress
+import datetime
 import subprocess
 import sys
-from typing import List, Dict
+import threading
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Iterator
+
+
+def create_keystore(keystore_dir: str, password: str) -> str:
+    """
+    生成 secp256k1 私钥并写入 geth 兼容的 scrypt V3 keystore 文件
+
+    文件名格式与 geth 相同: UTC--<时间戳>--<地址>。
+    scrypt 参数与 geth 默认值一致 (n=262144)，计算量较大，
+    因此作为独立函数以便在进程池中并行执行。返回账户地址
+    """
+    from eth_account import Account
+    
+    account = Account.create()
+    keystore = Account.encrypt(account.key, password, kdf='scrypt')
+    keystore['address'] = keystore['address'].lower()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H-%M-%S.%f000Z')
+    keystore_path = os.path.join(keystore_dir, f"UTC--{timestamp}--{keystore['address']}")
+    
+    # 与 geth 一样只允许所有者读写
+    fd = os.open(keystore_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(keystore, f)
+    return account.address
+
+
+def reencrypt_keystore(keystore_path: str, old_password: str, new_password: str):
+    """用新密码重新加密已有的 keystore 文件（私钥和地址不变）"""
+    from eth_account import Account
+    
+    with open(keystore_path, 'r') as f:
+        keystore = json.load(f)
+    private_key = Account.decrypt(keystore, old_password)
+    updated = Account.encrypt(private_key, new_password, kdf='scrypt')
+    updated['address'] = updated['address'].lower()
+    tmp_path = keystore_path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(updated, f)
+    os.replace(tmp_path, keystore_path)
+
+
+# secp256k1 曲线参数
+SECP256K1_P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+SECP256K1_G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+)
+
+
+def _secp256k1_multiply(k: int):
+    """纯 Python 实现的标量乘法 k·G（Jacobian 坐标，避免逐步求逆）"""
+    p = SECP256K1_P
+    
+    def double(P):
+        X, Y, Z = P
+        if Y == 0:
+            return (0, 0, 0)
+        S = 4 * X * Y * Y % p
+        M = 3 * X * X % p
+        X2 = (M * M - 2 * S) % p
+        Y2 = (M * (S - X2) - 8 * Y ** 4) % p
+        Z2 = 2 * Y * Z % p
+        return (X2, Y2, Z2)
+    
+    def add(P, Q):
+        if P[2] == 0:
+            return Q
+        if Q[2] == 0:
+            return P
+        U1 = P[0] * Q[2] ** 2 % p
+        U2 = Q[0] * P[2] ** 2 % p
+        S1 = P[1] * Q[2] ** 3 % p
+        S2 = Q[1] * P[2] ** 3 % p
+        if U1 == U2:
+            return double(P) if S1 == S2 else (0, 0, 0)
+        H = U2 - U1
+        R = S2 - S1
+        H2 = H * H % p
+        H3 = H * H2 % p
+        U1H2 = U1 * H2 % p
+        X3 = (R * R - H3 - 2 * U1H2) % p
+        Y3 = (R * (U1H2 - X3) - S1 * H3) % p
+        Z3 = H * P[2] * Q[2] % p
+        return (X3, Y3, Z3)
+    
+    result = (0, 0, 0)
+    addend = (SECP256K1_G[0], SECP256K1_G[1], 1)
+    while k:
+        if k & 1:
+            result = add(result, addend)
+        addend = double(addend)
+        k >>= 1
+    
+    z_inv = pow(result[2], -1, p)
+    return (result[0] * z_inv ** 2 % p, result[1] * z_inv ** 3 % p)
+
+
+def derive_public_key(private_key: bytes) -> bytes:
+    """
+    由私钥计算未压缩公钥（64 字节，不含 0x04 前缀）
+
+    优先使用 coincurve（C 实现），未安装时退回纯 Python 实现
+    """
+    try:
+        from coincurve import PrivateKey
+    except ImportError:
+        x, y = _secp256k1_multiply(int.from_bytes(private_key, 'big'))
+        return x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
+    return PrivateKey(private_key).public_key.format(compressed=False)[1:]
+
+
+def derive_test_account_key(seed: str, index: int) -> bytes:
+    """
+    由种子和序号确定性地派生测试账号私钥
+
+    tps_test.py 的 --account-seed 使用相同的算法（两处实现需保持一致），得到与 genesis 预置账号相同的私钥
+    """
+    counter = 0
+    while True:
+        key = hashlib.sha256(f"{seed}:{index}:{counter}".encode()).digest()
+        if 0 < int.from_bytes(key, 'big') < SECP256K1_N:
+            return key
+        counter += 1
+
+
+def _derive_test_addresses(seed: str, start: int, end: int) -> List[str]:
+    """派生 [start, end) 范围内测试账号的地址（小写、无 0x，进程池任务）"""
+    from eth_utils import keccak
+    return [
+        keccak(derive_public_key(derive_test_account_key(seed, i)))[-20:].hex()
+        for i in range(start, end)
+    ]
+
+
+def generate_private_key() -> bytes:
+    """生成一个有效的 secp256k1 私钥（1 <= k < N）"""
+    while True:
+        key = secrets.token_bytes(32)
+        if 0 < int.from_bytes(key, 'big') < SECP256K1_N:
+            return key
+
+
+# Linux FICLONE ioctl：在支持的文件系统（btrfs、xfs 等）上以写时复制方式克隆文件
+FICLONE = 0x40049409
+
+# LevelDB/Pebble 的数据表文件写入后不再修改，可以安全地硬链接共享；
+# MANIFEST、OPTIONS、freezer 等文件会被追加写入，必须独立复制
+IMMUTABLE_SUFFIXES = ('.sst', '.ldb')
+
+
+def clone_file(src: str, dst: str) -> str:
+    """
+    复制单个文件，依次尝试 reflink、copy_file_range、普通复制
+
+    返回实际使用的方式
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return 'reflink'
+        except (ImportError, OSError):
+            pass
+        
+        if hasattr(os, 'copy_file_range'):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return 'copy_file_range'
+            except OSError:
+                pass
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        
+        shutil.copyfileobj(fsrc, fdst)
+        return 'copy'
+
+
+def clone_tree(src: str, dst: str) -> Dict[str, int]:
+    """
+    克隆目录树：不可变的数据表文件优先硬链接，其余文件逐个 clone_file
+
+    返回各种方式处理的文件数量
+    """
+    counts: Dict[str, int] = {}
+    for root, dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src_file = os.path.join(root, name)
+            dst_file = os.path.join(target_root, name)
+            method = None
+            if name.endswith(IMMUTABLE_SUFFIXES):
+                try:
+                    os.link(src_file, dst_file)
+                    method = 'hardlink'
+                except OSError:
+                    pass
+            if method is None:
+                method = clone_file(src_file, dst_file)
+                shutil.copymode(src_file, dst_file)
+            counts[method] = counts.get(method, 0) + 1
+    return counts
+
+
+def file_sha256(path: str) -> str:
+    """计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def digest(value) -> str:
+    """配置片段的哈希（JSON 规范化后计算 sha256）"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class BuildManifest:
+    """
+    记录每个产物的输入哈希（输出目录下的 .manifest.json）
+
+    重新运行生成器时，输入哈希未变化且输出文件仍然存在的产物直接跳过；
+    输入变化时可以列出具体是哪些输入发生了变化
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # 清单损坏时视为全部需要重建
+                self.entries = {}
+    
+    def changed(self, artifact: str, inputs: Dict[str, str]) -> List[str]:
+        """与上次记录相比发生变化的输入名称（从未生成过的产物返回空列表）"""
+        old = self.entries.get(artifact, {}).get('inputs', {})
+        if not old:
+            return []
+        return sorted(key for key in set(old) | set(inputs) if old.get(key) != inputs.get(key))
+    
+    def is_fresh(self, artifact: str, inputs: Dict[str, str], outputs: List[str]) -> bool:
+        """输入未变化，且所有输出文件存在并与记录的哈希一致"""
+        entry = self.entries.get(artifact)
+        if not entry or entry.get('inputs') != inputs:
+            return False
+        recorded = entry.get('outputs', {})
+        for path in outputs:
+            if not os.path.exists(path) or recorded.get(self._output_key(path)) != file_sha256(path):
+                return False
+        return True
+    
+    def _output_key(self, path: str) -> str:
+        """输出文件在清单中的键：相对输出目录的路径（各节点目录下有同名文件）"""
+        return os.path.relpath(path, os.path.dirname(os.path.abspath(self.path)))
+    
+    def record(self, artifact: str, inputs: Dict[str, str], outputs: List[str] = (), **details):
+        """记录产物的输入和输出哈希，并立即写回清单（中途退出也能保留已完成的步骤）"""
+        self.entries[artifact] = {
+            'inputs': inputs,
+            'outputs': {self._output_key(path): file_sha256(path) for path in outputs},
+            **details,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# blockscout/services/*.yml 中固定使用的地址范围，分配节点 IP 时跳过
+BLOCKSCOUT_RESERVED_IPS = (ipaddress.ip_address('172.20.0.100'), ipaddress.ip_address('172.20.0.111'))
+
+TOPOLOGIES = ('star', 'mesh', 'ring', 'k-random', 'hierarchical')
+
+
+def build_topology(nodes: List[str], producers: List[str], topology: str,
+                   k: int = 4, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    计算每个节点的静态对等节点（写入节点 config.toml 的 [Node.P2P] StaticNodes）
+
+    - star: 不使用静态节点（生产者以 producer1 为 bootnode，同步者以所有生产者为 bootnode）
+    - mesh: 全连接
+    - ring: 每个节点连接环上前后相邻的节点
+    - k-random: 环上的后继节点 + 随机 k-1 个节点（保证连通，结果由 seed 决定）
+    - hierarchical: 生产者之间全连接，每个同步者连接一个生产者（轮流分配），
+      其余连接通过专用 bootnode 发现
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"未知的拓扑: {topology}（可选: {', '.join(TOPOLOGIES)}）")
+    
+    peers: Dict[str, List[str]] = {name: [] for name in nodes}
+    n = len(nodes)
+    if n < 2 or topology == 'star':
+        return peers
+    
+    if topology == 'mesh':
+        for name in nodes:
+            peers[name] = [p for p in nodes if p != name]
+    elif topology == 'ring':
+        for i, name in enumerate(nodes):
+            neighbours = {nodes[(i - 1) % n], nodes[(i + 1) % n]}
+            peers[name] = [p for p in nodes if p in neighbours and p != name]
+    elif topology == 'k-random':
+        rng = random.Random(seed)
+        for i, name in enumerate(nodes):
+            successor = nodes[(i + 1) % n]
+            candidates = [p for p in nodes if p != name and p != successor]
+            chosen = {successor} | set(rng.sample(candidates, min(max(k - 1, 0), len(candidates))))
+            peers[name] = [p for p in nodes if p in chosen]
+    else:
+        producer_set = set(producers)
+        synchers = [name for name in nodes if name not in producer_set]
+        for name in producers:
+            peers[name] = [p for p in producers if p != name]
+        for j, name in enumerate(synchers):
+            if producers:
+                peers[name] = [producers[j % len(producers)]]
+    return peers
+
+
+def alltools_image(image: str) -> Optional[str]:
+    """
+    geth 镜像对应的 alltools 镜像（含 bootnode 程序），无法推算时返回 None
+
+    标签是最后一个 / 之后的 : 后面的部分（registry:5000/geth:v1 中 5000 是端口）；
+    没有标签或按 digest 引用的镜像无法推算
+    """
+    if '@' in image:
+        return None
+    slash = image.rfind('/')
+    colon = image.rfind(':')
+    if colon <= slash:
+        return None
+    return f"{image[:colon]}:alltools-{image[colon + 1:]}"
+
+
+# 内置的 geth 调优配置
+# flags: geth 命令行参数（True 表示无值开关）
+# http_timeouts: 写入节点 config.toml 的 [Node.HTTPTimeouts]（geth 没有对应的命令行参数）
+# resources: docker 资源限制（cpus / mem_limit / nofile）
+TUNING_PROFILES = {
+    'default': {
+        'flags': {},
+        'http_timeouts': {},
+        'resources': {},
+    },
+    'high-throughput': {
+        'flags': {
+            'cache': 4096,
+            'txpool.globalslots': 65536,
+            'txpool.accountslots': 1024,
+            'txpool.globalqueue': 16384,
+            'txpool.accountqueue': 1024,
+            'rpc.batch-request-limit': 10000,
+            'rpc.batch-response-max-size': 100000000,
+        },
+        'http_timeouts': {'ReadTimeout': 60, 'WriteTimeout': 60, 'IdleTimeout': 300},
+        'resources': {'cpus': 4, 'mem_limit': '8g', 'nofile': 1048576},
+    },
+    'archive': {
+        'flags': {
+            'syncmode': 'full',
+            'gcmode': 'archive',
+            'cache': 2048,
+        },
+        'http_timeouts': {},
+        'resources': {'mem_limit': '8g', 'nofile': 524288},
+    },
+    'low-memory': {
+        'flags': {
+            'cache': 256,
+            'snapshot': False,
+            'txpool.globalslots': 2048,
+            'txpool.globalqueue': 512,
+        },
+        'http_timeouts': {},
+        'resources': {'cpus': 1, 'mem_limit': '1g'},
+    },
+}
+
+
+def resolve_tuning_profiles(custom: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    合并内置调优配置与 config.yaml 中 tuning.profiles 的自定义配置
+
+    自定义配置与内置配置同名时覆盖其中的条目，否则以 extends 指定的配置
+    （默认 default）为基础
+    """
+    profiles = {name: {key: dict(value) for key, value in profile.items()}
+                for name, profile in TUNING_PROFILES.items()}
+    for name, profile in (custom or {}).items():
+        base_name = name if name in profiles else profile.get('extends', 'default')
+        if base_name not in profiles:
+            raise ValueError(f"调优配置 {name} 继承了不存在的配置 {base_name}")
+        base = profiles[base_name]
+        profiles[name] = {
+            key: {**base.get(key, {}), **(profile.get(key) or {})}
+            for key in ('flags', 'http_timeouts', 'resources')
+        }
+    return profiles
+
+
+def render_geth_flags(flags: Dict) -> str:
+    """把调优参数转换为 geth 命令行（以空格开头，便于直接拼接）"""
+    parts = []
+    for name, value in flags.items():
+        if value is None:
+            continue
+        if value is True:
+            parts.append(f"--{name}")
+        elif value is False:
+            parts.append(f"--{name}=false")
+        else:
+            parts.append(f"--{name} {value}")
+    return ''.join(f" {part}" for part in parts)
+
+
+# 内置的 WAN 链路配置（delay 为单向延迟，每个节点只整形自己的出站流量，往返延迟约为两端之和）
+# delay / jitter: 毫秒或带单位的字符串，loss: 百分比，rate: Mbit/s 或带单位的字符串
+WAN_PROFILES = {
+    'lan': {'delay': '0.2ms'},
+    'metro': {'delay': '2ms', 'jitter': '0.5ms', 'rate': '1gbit'},
+    'continental': {'delay': '20ms', 'jitter': '3ms', 'loss': '0.01%', 'rate': '500mbit'},
+    'intercontinental': {'delay': '75ms', 'jitter': '8ms', 'loss': '0.1%', 'rate': '200mbit'},
+}
+WAN_PROFILE_KEYS = ('delay', 'jitter', 'loss', 'rate')
+
+
+def resolve_wan_profiles(custom: Optional[Dict] = None) -> Dict[str, Dict]:
+    """合并内置 WAN 链路配置与 config.yaml 中 wan.profiles 的自定义配置（同名时覆盖）"""
+    profiles = {name: dict(profile) for name, profile in WAN_PROFILES.items()}
+    for name, profile in (custom or {}).items():
+        unknown = set(profile or {}) - set(WAN_PROFILE_KEYS)
+        if unknown:
+            raise ValueError(f"WAN 链路配置 {name} 包含未知参数: {', '.join(sorted(unknown))}"
+                             f"（可用: {', '.join(WAN_PROFILE_KEYS)}）")
+        profiles[name] = dict(profile or {})
+    return profiles
+
+
+def build_wan_links(regions: Dict[str, str], overrides: Dict[str, str], wan: Dict,
+                    profiles: Dict[str, Dict]) -> Dict[str, Dict[str, str]]:
+    """
+    计算每个节点到其他节点的出站链路配置名称
+
+    同区域的节点之间使用 intra_region，不同区域之间优先使用 links 中指定的区域对
+    （不区分方向），否则使用 inter_region；节点自身的 wan 配置覆盖它的所有出站链路。
+    没有配置的链路不整形
+    """
+    region_links = {}
+    for pair, name in (wan.get('links') or {}).items():
+        a, sep, b = pair.partition('/')
+        if not sep:
+            raise ValueError(f"WAN 区域对 {pair} 的格式应为 区域A/区域B")
+        for region in (a.strip(), b.strip()):
+            if region not in regions.values():
+                raise ValueError(f"WAN 区域对 {pair} 中的区域 {region} 没有任何节点")
+        region_links[frozenset((a.strip(), b.strip()))] = name
+    
+    referenced = list(region_links.values()) + list(overrides.values())
+    referenced += [wan.get(key) for key in ('intra_region', 'inter_region') if wan.get(key)]
+    for name in referenced:
+        if name not in profiles:
+            raise ValueError(f"未定义的 WAN 链路配置: {name}（可用: {', '.join(profiles)}）")
+    
+    links = {}
+    for node, region in regions.items():
+        peers = {}
+        for peer, peer_region in regions.items():
+            if peer == node:
+                continue
+            if node in overrides:
+                name = overrides[node]
+            elif region == peer_region:
+                name = wan.get('intra_region')
+            else:
+                name = region_links.get(frozenset((region, peer_region)), wan.get('inter_region'))
+            if name:
+                peers[peer] = name
+        links[node] = peers
+    return links
+
+
+def _tc_value(value, unit: str) -> str:
+    """数字按默认单位补全，字符串原样使用"""
+    return f"{value}{unit}" if isinstance(value, (int, float)) else str(value)
+
+
+def render_tc_script(links: Dict[str, str], profiles: Dict[str, Dict], ip_of: Dict[str, str],
+                     device: str = 'eth0') -> str:
+    """
+    生成容器入口脚本：配置出站流量整形后 exec geth
+
+    根队列为 htb，每个对端节点一个分类（rate 限速），分类下挂 netem（延迟、抖动、丢包），
+    按目标 IP 把发往该节点的流量归入对应分类，各条链路的带宽互不挤占；
+    其余流量（RPC、blockscout 等）走不限速的默认分类。
+
+    netem 的抖动按包独立取样，默认会打乱包的顺序，TCP 会把乱序当作丢包而频繁重传。
+    配置了抖动时在 netem 下挂 pfifo 子队列，包按进入顺序发出，抖动表现为排队延迟的波动
+    """
+    lines = [
+        "#!/bin/sh",
+        "# WAN 链路模拟（由 generate_network.py 生成，请勿手动修改）",
+        "# busybox 自带的 tc 不支持 netem，需要 iproute2 版本",
+        "if ! tc -V 2>/dev/null | grep -q iproute2; then",
+        "  apk add --no-cache iproute2 >/dev/null || { echo 'wan.sh: 无法安装 tc（iproute2）' >&2; exit 1; }",
+        "fi",
+        f"tc qdisc del dev {device} root 2>/dev/null",
+        "set -e",
+        f"tc qdisc add dev {device} root handle 1: htb default 1",
+        f"tc class add dev {device} parent 1: classid 1:1 htb rate 10gbit",
+    ]
+    for i, peer in enumerate(sorted(links)):
+        # classid 和 qdisc handle 都按十六进制解析
+        classid = f"{0x10 + i:x}"
+        name = links[peer]
+        profile = profiles[name]
+        rate = _tc_value(profile.get('rate', '10gbit'), 'mbit')
+        netem = f"delay {_tc_value(profile.get('delay', 0), 'ms')}"
+        if profile.get('jitter'):
+            netem += f" {_tc_value(profile['jitter'], 'ms')} distribution normal"
+        if profile.get('loss'):
+            netem += f" loss {_tc_value(profile['loss'], '%')}"
+        lines.append(f"# {peer} ({name})")
+        lines.append(f"tc class add dev {device} parent 1: classid 1:{classid} htb rate {rate} ceil {rate}")
+        lines.append(f"tc qdisc add dev {device} parent 1:{classid} handle {classid}: netem {netem} limit 100000")
+        if profile.get('jitter'):
+            lines.append(f"tc qdisc add dev {device} parent {classid}:1 pfifo limit 100000")
+        lines.append(f"tc filter add dev {device} parent 1: protocol ip prio 1 u32 "
+                     f"match ip dst {ip_of[peer]}/32 flowid 1:{classid}")
+    lines.append('exec geth "$@"')
+    return '\n'.join(lines) + '\n'
+
+
+# blockscout 索引器调优
+BLOCKSCOUT_DB_MAX_CONNECTIONS = 200  # blockscout/services/db.yml 中 postgres 的 max_connections
+BLOCKSCOUT_POOL_SIZE_API = 10
+INDEXER_TXS_PER_BATCH = 2000  # 每批追块区块的目标交易数
+INDEXER_TXS_PER_WORKER = 500  # 估算值：每个并发的追块任务每秒能导入的交易数
+
+
+def blockscout_indexer_env(block_period: int, gas_limit: int,
+                           expected_tps: Optional[float] = None) -> Tuple[float, Dict[str, str]]:
+    """
+    按出块间隔和预期负载推算 blockscout 索引器参数，返回 (使用的 TPS, 环境变量)
+
+    未指定预期负载时按链上容量（gas_limit / 21000 / 出块间隔）估算：
+    - 每批区块的交易数保持在 INDEXER_TXS_PER_BATCH 左右，满块时每批只取 1 个区块
+    - 追块并发数按 2 倍负载估算，落后之后仍能追上
+    - 数据库连接池覆盖所有并发的导入任务，且与 API 连接池之和不超过 max_connections
+    - 追块检查间隔与出块间隔一致
+    """
+    period = max(int(block_period), 1)
+    capacity = int(gas_limit) / 21000 / period
+    tps = min(float(expected_tps), capacity) if expected_tps else capacity
+    txs_per_block = max(tps * period, 1)
+    batch_size = min(max(int(INDEXER_TXS_PER_BATCH // txs_per_block), 1), 50)
+    concurrency = min(max(math.ceil(tps * 2 / INDEXER_TXS_PER_WORKER), 4), 64)
+    pool_limit = BLOCKSCOUT_DB_MAX_CONNECTIONS - BLOCKSCOUT_POOL_SIZE_API - 10
+    pool_size = min(max(concurrency * 3 + 20, 50), pool_limit)
+    return tps, {
+        'INDEXER_CATCHUP_BLOCKS_BATCH_SIZE': str(batch_size),
+        'INDEXER_CATCHUP_BLOCKS_CONCURRENCY': str(concurrency),
+        'INDEXER_CATCHUP_BLOCK_INTERVAL': f"{period}s",
+        'POOL_SIZE': str(pool_size),
+        'POOL_SIZE_API': str(BLOCKSCOUT_POOL_SIZE_API),
+    }
+
 
 class EthereumNetworkGenerator:
-    def __init__(self, config_file: str = "config.yaml", output_dir: str = None):
+    def __init__(self, config_file: str = "config.yaml", output_dir: str = None, jobs: int = None,
+                 force: bool = False, reinit: bool = False):
         """初始化网络生成器"""
         self.config_file = config_file
         self.config = self.load_config()
         self.accounts = {}
+        # 按节点执行 docker 命令时的并发数
+        self.jobs = jobs or min(8, os.cpu_count() or 1)
+        # force: 忽略清单重建所有产物；reinit: 重新初始化与 genesis 不一致的节点链数据
+        self.force = force
+        self.reinit = reinit
+        # 本次运行中导致 genesis 变化的输入（用于解释链数据失效的原因）
+        self.genesis_changes: List[str] = []
         
         # 设置输出目录
         if output_dir:
@@ -28,6 +626,7 @@ class EthereumNetworkGenerator:
         
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
+        self.manifest = BuildManifest(os.path.join(self.output_dir, '.manifest.json'))
         
     def load_config(self) -> Dict:
         """加载配置文件"""
@@ -58,21 +657,40 @@ class EthereumNetworkGenerator:
         
         for node in producers + synchers:
             password_file = os.path.join(self.output_dir, f"node_{node['name']}_password.txt")
+            password = node.get('password', 'password')
+            old_password = None
+            if os.path.exists(password_file):
+                with open(password_file, 'r') as f:
+                    old_password = f.read()
+                if old_password == password:
+                    print(f"  ✓ {password_file} (未变化)")
+                    continue
+            
+            # 密码变化时用旧密码解密已有 keystore 并重新加密，账户地址保持不变
+            keystore_dir = os.path.join(self.output_dir, f"node_{node['name']}", "keystore")
+            keystore_files = os.listdir(keystore_dir) if os.path.isdir(keystore_dir) else []
+            if old_password is not None and keystore_files:
+                try:
+                    reencrypt_keystore(os.path.join(keystore_dir, keystore_files[0]), old_password, password)
+                except Exception as e:
+                    print(f"  ✗ 重新加密 keystore 失败 ({node['name']}): {e}")
+                    sys.exit(1)
+                print(f"  ✓ {node['name']}: 密码已变化，keystore 已重新加密")
+            
             with open(password_file, 'w') as f:
-                f.write(node.get('password', 'password'))
+                f.write(password)
             print(f"  ✓ {password_file}")
     
     def create_accounts(self):
-        """为所有节点创建账户"""
+        """为所有节点创建账户（本地生成 keystore，多进程并行）"""
         print("\n创建账户...")
         producers = self.config.get('producers', [])
         synchers = self.config.get('synchers', [])
-        image = self.config.get('docker_image', 'ethereum/client-go:latest')
         
+        pending = []
         for node in producers + synchers:
             node_name = node['name']
             node_dir = os.path.join(self.output_dir, f"node_{node_name}")
-            password_file = os.path.join(self.output_dir, f"node_{node_name}_password.txt")
             keystore_dir = f"{node_dir}/keystore"
             
             # 首先检查是否已经有账户
@@ -88,58 +706,65 @@ class EthereumNetworkGenerator:
                         print(f"  ✓ {node_name}: {address} (已存在)")
                         continue
             
-            # 创建新账户
-            cmd = [
-                'docker', 'run', '--rm',
-                '-v', f"{os.path.abspath(node_dir)}:/root/.ethereum",
-                '-v', f"{os.path.abspath(password_file)}:/password.txt",
-                image,
-                'account', 'new',
-                '--password', '/password.txt'
-            ]
+            pending.append(node)
+        
+        if not pending:
+            return
+        
+        # scrypt 是 CPU 密集型计算，使用进程池在所有核心上并行
+        # 实际导入在子进程中进行，这里只检查是否已安装，避免每个子进程各自报错
+        if importlib.util.find_spec('eth_account') is None:
+            print("  ✗ 未安装 eth-account 库，无法生成 keystore")
+            print("    (提示: 运行 'pip install eth-account')")
+            sys.exit(1)
+        
+        with ProcessPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as executor:
+            futures = []
+            for node in pending:
+                keystore_dir = os.path.join(self.output_dir, f"node_{node['name']}", "keystore")
+                futures.append(executor.submit(create_keystore, keystore_dir, node.get('password', 'password')))
             
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                # 从输出中提取地址 (尝试多种格式)
-                address = None
-                output = result.stderr + result.stdout
-                
-                for line in output.split('\n'):
-                    # 格式1: Public address of the key:   0x...
-                    if 'Public address of the key:' in line:
-                        address = line.split(':')[-1].strip()
-                        break
-                    # 格式2: Address: {0x...}
-                    elif 'Address:' in line and '0x' in line:
-                        address = line.split('{')[-1].split('}')[0].strip()
-                        break
-                
-                # 如果还是没找到，尝试从keystore文件名获取
-                if not address:
-                    keystore_files = os.listdir(keystore_dir)
-                    if keystore_files:
-                        keystore_file = keystore_files[0]
-                        if '--' in keystore_file:
-                            address = '0x' + keystore_file.split('--')[-1]
-                
-                if address:
-                    self.accounts[node_name] = address
-                    print(f"  ✓ {node_name}: {address}")
-                else:
-                    print(f"  ✗ 无法提取地址 ({node_name})")
-                    print(f"  输出: {output}")
+            for node, future in zip(pending, futures):
+                node_name = node['name']
+                try:
+                    address = future.result()
+                except Exception as e:
+                    print(f"  ✗ 创建账户失败 ({node_name}): {e}")
                     sys.exit(1)
-                    
-            except subprocess.CalledProcessError as e:
-                print(f"  ✗ 创建账户失败 ({node_name}): {e}")
-                print(f"  stderr: {e.stderr}")
-                print(f"  stdout: {e.stdout}")
-                sys.exit(1)
+                self.accounts[node_name] = address
+                print(f"  ✓ {node_name}: {address}")
+    
+    def _genesis_inputs(self) -> Dict[str, str]:
+        """决定 genesis.json 内容的所有输入"""
+        network_config = self.config.get('network', {})
+        producers = self.config.get('producers', [])
+        synchers = self.config.get('synchers', [])
+        test_spec = dict(self.config.get('test_accounts') or {})
+        if test_spec.get('file') and os.path.exists(test_spec['file']):
+            test_spec['file_sha256'] = file_sha256(test_spec['file'])
+        template_path = 'genesis.json.template'
+        return {
+            'network': digest({key: network_config.get(key) for key in
+                               ('chain_id', 'block_period', 'epoch', 'gas_limit', 'initial_balance')}),
+            'template': file_sha256(template_path) if os.path.exists(template_path) else '',
+            'producers': digest([self.accounts[p['name']].lower() for p in producers]),
+            'synchers': digest([self.accounts[s['name']].lower() for s in synchers]),
+            'test_accounts': digest(test_spec),
+        }
     
     def generate_genesis(self):
-        """生成genesis.json文件"""
+        """生成genesis.json文件（输入未变化时跳过）"""
         print("\n生成genesis.json...")
         
+        genesis_path = os.path.join(self.output_dir, 'genesis.json')
+        inputs = self._genesis_inputs()
+        if not self.force and self.manifest.is_fresh('genesis', inputs, [genesis_path]):
+            # 上次生成时的变化原因（上次因链数据冲突退出时仍可给出提示）
+            self.genesis_changes = self.manifest.entries['genesis'].get('changed', [])
+            print(f"  ✓ {genesis_path} (未变化)")
+            return
+        self.genesis_changes = self.manifest.changed('genesis', inputs)
+        
         network_config = self.config.get('network', {})
         chain_id = network_config.get('chain_id', 123454321)
         block_period = network_config.get('block_period', 5)
@@ -163,18 +788,6 @@ class EthereumNetworkGenerator:
             extradata += addr
         extradata += '0' * 130
         
-        # 构建alloc (所有节点都获得初始余额)
-        alloc = {}
-        all_nodes = producers + self.config.get('synchers', [])
-        for node in all_nodes:
-            addr = self.accounts[node['name']]
-            if addr.startswith('0x'):
-                addr = addr[2:]
-            # 转换为小写
-            alloc[addr.lower()] = {"balance": initial_balance}
-        
-        alloc_str = ',\n    '.join([f'"{addr}": {json.dumps(data)}' for addr, data in alloc.items()])
-        
         # 读取模板
         template_path = 'genesis.json.template'
         if not os.path.exists(template_path):
@@ -184,156 +797,444 @@ class EthereumNetworkGenerator:
         with open(template_path, 'r') as f:
             template = f.read()
         
-        # 替换占位符
-        genesis_content = template.replace('{{CHAIN_ID}}', str(chain_id))
-        genesis_content = genesis_content.replace('{{BLOCK_PERIOD}}', str(block_period))
-        genesis_content = genesis_content.replace('{{EPOCH}}', str(epoch))
-        genesis_content = genesis_content.replace('{{GAS_LIMIT}}', gas_limit)
-        genesis_content = genesis_content.replace('{{EXTRA_DATA}}', extradata)
-        genesis_content = genesis_content.replace('{{ALLOC_ACCOUNTS}}', alloc_str)
+        # 替换占位符（alloc 之外的部分）
+        def fill(content: str) -> str:
+            content = content.replace('{{CHAIN_ID}}', str(chain_id))
+            content = content.replace('{{BLOCK_PERIOD}}', str(block_period))
+            content = content.replace('{{EPOCH}}', str(epoch))
+            content = content.replace('{{GAS_LIMIT}}', gas_limit)
+            return content.replace('{{EXTRA_DATA}}', extradata)
         
-        # 写入文件到输出目录
-        genesis_path = os.path.join(self.output_dir, 'genesis.json')
+        head, tail = template.split('{{ALLOC_ACCOUNTS}}')
+        
+        # alloc 逐条流式写入，预置大量测试账号时不需要在内存中构建整个文档
+        node_count = 0
+        test_count = 0
+        seen = set()
         with open(genesis_path, 'w') as f:
-            f.write(genesis_content)
+            f.write(fill(head))
+            
+            # 所有节点都获得初始余额
+            all_nodes = producers + self.config.get('synchers', [])
+            for node in all_nodes:
+                addr = self.accounts[node['name']]
+                if addr.startswith('0x'):
+                    addr = addr[2:]
+                # 转换为小写
+                addr = addr.lower()
+                seen.add(addr)
+                if node_count:
+                    f.write(',\n    ')
+                f.write(f'"{addr}": {json.dumps({"balance": initial_balance})}')
+                node_count += 1
+            
+            # 预置测试账号
+            test_spec = self.config.get('test_accounts') or {}
+            test_balance = str(test_spec.get('balance', initial_balance))
+            entry = json.dumps({"balance": test_balance})
+            for addr in self._iter_test_account_addresses(test_spec):
+                if addr in seen:
+                    continue
+                if node_count or test_count:
+                    f.write(',\n    ')
+                f.write(f'"{addr}": {entry}')
+                test_count += 1
+            
+            f.write(fill(tail))
+        
+        self.manifest.record('genesis', inputs, [genesis_path], changed=self.genesis_changes)
+        
+        detail = f"验证者: {len(validator_addresses)}个"
+        if test_count:
+            detail += f", 预置测试账号: {test_count}个"
+        if self.genesis_changes:
+            detail += f", 变化的输入: {', '.join(self.genesis_changes)}"
+        print(f"  ✓ {genesis_path} ({detail})")
+    
+    def _iter_test_account_addresses(self, spec: Dict) -> Iterator[str]:
+        """
+        按 test_accounts 配置逐个产生需要预置的测试账号地址（小写、无 0x）
+
+        - file: 账号文件（.json 为 tps_test.py 的 test_accounts.json 格式，其余为每行一个地址）
+        - count + seed: 由种子确定性派生，使用进程池并行计算
+        """
+        if not spec:
+            return
+        
+        if spec.get('file'):
+            path = spec['file']
+            if not os.path.exists(path):
+                print(f"  ✗ 测试账号文件不存在: {path}")
+                sys.exit(1)
+            seen = set()
+            with open(path, 'r') as f:
+                if path.endswith('.json'):
+                    addresses = (item['address'] for item in json.load(f))
+                else:
+                    addresses = (line.strip() for line in f)
+                for addr in addresses:
+                    if not addr or addr.startswith('#'):
+                        continue
+                    addr = addr.lower()[2:] if addr.startswith(('0x', '0X')) else addr.lower()
+                    # 重复的地址会在 alloc 中产生重复的键
+                    if addr in seen:
+                        continue
+                    seen.add(addr)
+                    yield addr
+            return
+        
+        count = int(spec.get('count', 0))
+        seed = str(spec.get('seed', 'tps-test'))
+        if count <= 0:
+            return
+        if importlib.util.find_spec('eth_utils') is None:
+            print("  ✗ 未安装 eth-utils 库，无法派生测试账号地址")
+            sys.exit(1)
         
-        print(f"  ✓ {genesis_path} (验证者: {len(validator_addresses)}个)")
+        chunk = 10000
+        starts = range(0, count, chunk)
+        ends = [min(start + chunk, count) for start in starts]
+        with ProcessPoolExecutor() as executor:
+            for addresses in executor.map(_derive_test_addresses, itertools.repeat(seed), starts, ends):
+                yield from addresses
+    
+    def create_nodekeys(self):
+        """为所有节点生成 P2P 节点私钥 (geth/nodekey)，已存在的保持不变"""
+        print("\n生成节点密钥...")
+        producers = self.config.get('producers', [])
+        synchers = self.config.get('synchers', [])
+        
+        for node_name in [n['name'] for n in producers + synchers] + self._bootnode_names():
+            nodekey_path = self._nodekey_path(node_name)
+            if os.path.exists(nodekey_path):
+                print(f"  ✓ {node_name} (已存在)")
+                continue
+            
+            os.makedirs(os.path.dirname(nodekey_path), exist_ok=True)
+            # 与 geth 相同的格式：64 个十六进制字符，无换行
+            fd = os.open(nodekey_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(generate_private_key().hex())
+            print(f"  ✓ {node_name}")
     
     def initialize_nodes(self):
-        """初始化所有节点"""
+        """
+        初始化所有节点
+
+        只对一个模板数据目录运行一次 geth init，然后把生成的链数据克隆到
+        每个节点目录（nodekey 和 keystore 保持各节点独立）
+        """
         print("\n初始化节点...")
         producers = self.config.get('producers', [])
         synchers = self.config.get('synchers', [])
         image = self.config.get('docker_image', 'ethereum/client-go:latest')
         genesis_path = os.path.join(self.output_dir, 'genesis.json')
+        genesis_hash = file_sha256(genesis_path)
         
-        for node in producers + synchers:
-            node_name = node['name']
-            node_dir = os.path.join(self.output_dir, f"node_{node_name}")
-            
+        # 1. 初始化模板数据目录（genesis 未变化时复用）
+        template_dir = os.path.join(self.output_dir, '.template_datadir')
+        template_marker = os.path.join(template_dir, 'genesis.sha256')
+        if self._read_marker(template_marker) != genesis_hash:
+            if os.path.exists(template_dir):
+                self._remove_datadir(template_dir, image)
+            os.makedirs(template_dir)
             cmd = [
                 'docker', 'run', '--rm',
-                '-v', f"{os.path.abspath(node_dir)}:/root/.ethereum",
+                '-v', f"{os.path.abspath(template_dir)}:/root/.ethereum",
                 '-v', f"{os.path.abspath(genesis_path)}:/genesis.json",
                 image,
                 'init',
                 '--datadir', '/root/.ethereum',
                 '/genesis.json'
             ]
-            
             try:
                 subprocess.run(cmd, capture_output=True, text=True, check=True)
-                print(f"  ✓ {node_name}")
             except subprocess.CalledProcessError as e:
-                print(f"  ✗ 初始化失败 ({node_name}): {e}")
+                print(f"  ✗ 初始化失败 (模板数据目录): {(e.stderr or e.stdout).strip()}")
+                sys.exit(1)
+            except OSError as e:
+                print(f"  ✗ 无法执行 docker: {e}")
                 sys.exit(1)
+            print("  ✓ 模板数据目录")
+            with open(template_marker, 'w') as f:
+                f.write(genesis_hash)
+        else:
+            print("  ✓ 模板数据目录 (已存在)")
+        
+        # 2. 克隆到各节点
+        template_geth = os.path.join(template_dir, 'geth')
+        # 节点特有或运行时生成的文件不克隆
+        skip = {'nodekey', 'LOCK', 'nodes', 'transactions.rlp'}
+        
+        def clone_node(node_name: str) -> Tuple[str, Dict[str, int]]:
+            node_geth = os.path.join(self.output_dir, f"node_{node_name}", 'geth')
+            marker = os.path.join(node_geth, 'genesis.sha256')
+            status = 'cloned'
+            if os.path.exists(os.path.join(node_geth, 'chaindata')):
+                existing = self._read_marker(marker)
+                if existing is None or existing == genesis_hash:
+                    return 'exists', {}
+                if not self.reinit:
+                    return 'conflict', {}
+                # 删除旧链数据后重新克隆（nodekey 等保留）
+                for entry in os.listdir(template_geth):
+                    if entry not in skip:
+                        path = os.path.join(node_geth, entry)
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        elif os.path.exists(path):
+                            os.remove(path)
+                status = 'reinit'
+            counts: Dict[str, int] = {}
+            os.makedirs(node_geth, exist_ok=True)
+            for entry in os.listdir(template_geth):
+                if entry in skip:
+                    continue
+                src = os.path.join(template_geth, entry)
+                if os.path.isdir(src):
+                    for method, count in clone_tree(src, os.path.join(node_geth, entry)).items():
+                        counts[method] = counts.get(method, 0) + count
+                else:
+                    method = clone_file(src, os.path.join(node_geth, entry))
+                    counts[method] = counts.get(method, 0) + 1
+            with open(marker, 'w') as f:
+                f.write(genesis_hash)
+            return status, counts
+        
+        nodes = [node['name'] for node in producers + synchers]
+        conflicts = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for node_name, (status, counts) in zip(nodes, executor.map(clone_node, nodes)):
+                if status == 'exists':
+                    print(f"  ✓ {node_name} (已存在)")
+                elif status == 'conflict':
+                    conflicts.append(node_name)
+                    print(f"  ✗ {node_name}: 已有链数据与当前 genesis.json 不一致")
+                else:
+                    detail = ', '.join(f"{method} {count}" for method, count in sorted(counts.items()))
+                    if status == 'reinit':
+                        detail = f"已丢弃旧链数据并重新初始化, {detail}"
+                    print(f"  ✓ {node_name} ({detail})")
+        
+        if conflicts:
+            print("\n  " + "!" * 56)
+            print(f"  ! genesis.json 已变化，{len(conflicts)} 个节点的现有链数据失效")
+            if self.genesis_changes:
+                print(f"  ! 变化的输入: {', '.join(self.genesis_changes)}")
+            if 'producers' in self.genesis_changes:
+                print("  ! Clique 的验证者列表写在 genesis 的 extradata 中，增减生产者必然改变 genesis；")
+                print("  ! 如需保留链数据，请改用 clique.propose 在运行中的网络上投票增减验证者")
+            print("  ! 使用 --reinit 丢弃这些节点的链数据并重新初始化")
+            print("  " + "!" * 56)
+            sys.exit(1)
     
-    def get_enode_ids(self) -> Dict[str, str]:
-        """获取所有区块生产者的enode ID"""
-        print("\n获取区块生产者enode ID...")
+    @staticmethod
+    def _remove_datadir(path: str, image: str):
+        """
+        删除 geth 数据目录
+
+        数据目录由容器中的 geth init 创建，文件可能属于 root；本地删除失败时在容器内删除，
+        仍然失败则报错退出
+        """
+        try:
+            shutil.rmtree(path)
+            return
+        except OSError as e:
+            print(f"  ! 无法直接删除 {path}（{e.strerror}），尝试在容器内删除...")
+        cmd = ['docker', 'run', '--rm', '-v', f"{os.path.abspath(path)}:/datadir",
+               '--entrypoint', '/bin/sh', image, '-c', 'rm -rf /datadir/* /datadir/.[!.]*']
+        try:
+            subprocess.run(cmd, capture_output=True, text=True)
+        except OSError as e:
+            print(f"  ! 无法执行 docker: {e}")
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            print(f"  ✗ 无法删除 {path}: {e}")
+            print(f"  提示: 请手动删除（如 sudo rm -rf {path}）后重新运行")
+            sys.exit(1)
+    
+    @staticmethod
+    def _read_marker(path: str) -> Optional[str]:
+        """读取记录 genesis 哈希的标记文件"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return f.read().strip()
+    
+    def _bootnode_names(self) -> List[str]:
+        """hierarchical 拓扑使用的专用 bootnode 名称"""
+        network_config = self.config.get('network', {})
+        if network_config.get('topology', 'star') != 'hierarchical':
+            return []
+        return [f"bootnode{i + 1}" for i in range(int(network_config.get('bootnodes', 2)))]
+    
+    def _nodekey_path(self, node_name: str) -> str:
+        """节点私钥路径（专用 bootnode 直接放在节点目录下，geth 节点在 geth/ 下）"""
+        node_dir = os.path.join(self.output_dir, f"node_{node_name}")
+        if node_name in self._bootnode_names():
+            return os.path.join(node_dir, "nodekey")
+        return os.path.join(node_dir, "geth", "nodekey")
+    
+    def _node_layout(self) -> List[Dict]:
+        """
+        计算所有节点的角色、IP 和端口
+
+        IP 从 network.subnet 中 base_ip 开始依次分配（跳过网络地址和广播地址），
+        子网地址不足时报错。启用 blockscout 时跳过其服务固定使用的地址。
+        专用 bootnode 排在最后，只在容器网络内监听发现端口
+        """
         producers = self.config.get('producers', [])
-        enode_ids = {}
+        synchers = self.config.get('synchers', [])
+        network_config = self.config.get('network', {})
+        rpc_port_base = int(network_config.get('rpc_port_base', 8545))
+        p2p_port_base = int(network_config.get('p2p_port_base', 30306))
+        subnet = ipaddress.ip_network(network_config.get('subnet', '172.20.0.0/16'))
+        base_ip = ipaddress.ip_address(network_config.get('base_ip', '172.20.0.2'))
+        if base_ip not in subnet:
+            print(f"  ✗ 起始IP {base_ip} 不在子网 {subnet} 内")
+            sys.exit(1)
+        
+        nodes = [(p['name'], 'producer') for p in producers]
+        nodes += [(s['name'], 'syncher') for s in synchers]
+        nodes += [(name, 'bootnode') for name in self._bootnode_names()]
         
-        # 检查是否安装了必要的加密库
+        reserved_low, reserved_high = BLOCKSCOUT_RESERVED_IPS
+        blockscout = network_config.get('blockscout', True)
+        hosts = (ip for ip in subnet.hosts()
+                 if ip >= base_ip and not (blockscout and reserved_low <= ip <= reserved_high))
+        layout = []
+        for i, (name, role) in enumerate(nodes):
+            ip = next(hosts, None)
+            if ip is None:
+                print(f"  ✗ 子网 {subnet} 从 {base_ip} 开始只能容纳 {i} 个节点，需要 {len(nodes)} 个")
+                print(f"  提示: 请在 config.yaml 中使用更大的 network.subnet")
+                sys.exit(1)
+            entry = {'name': name, 'role': role, 'ip': str(ip)}
+            if role == 'bootnode':
+                entry['p2p_port'] = 30301
+            else:
+                entry['p2p_port'] = p2p_port_base + i
+                entry['rpc_port'] = rpc_port_base + i
+            layout.append(entry)
+        return layout
+    
+    def _node_profiles(self) -> Dict[str, str]:
+        """
+        每个节点使用的调优配置名称
+
+        优先使用节点自身的 profile，其次是 tuning 中按角色（producer / syncher）
+        指定的配置，最后是 default
+        """
+        tuning = self.config.get('tuning') or {}
         try:
-            from coincurve import PrivateKey
-            has_coincurve = True
-        except ImportError:
-            has_coincurve = False
+            profiles = resolve_tuning_profiles(tuning.get('profiles'))
+        except ValueError as e:
+            print(f"  ✗ {e}")
+            sys.exit(1)
         
-        for i, producer in enumerate(producers):
-            node_name = producer['name']
-            node_dir = os.path.join(self.output_dir, f"node_{node_name}")
-            nodekey_path = os.path.join(node_dir, "geth/nodekey")
+        result = {}
+        for role, nodes in (('producer', self.config.get('producers', [])),
+                            ('syncher', self.config.get('synchers', []))):
+            for node in nodes:
+                name = node.get('profile') or tuning.get(role) or 'default'
+                if name not in profiles:
+                    print(f"  ✗ 节点 {node['name']} 使用了未定义的调优配置: {name}")
+                    print(f"  可用配置: {', '.join(profiles)}")
+                    sys.exit(1)
+                result[node['name']] = name
+        self.tuning_profiles = profiles
+        return result
+    
+    def _wan_links(self) -> Dict[str, Dict[str, str]]:
+        """
+        每个节点的出站链路配置（未配置 wan 时为空）
+
+        节点的 region 决定区域间链路，节点自身的 wan 覆盖区域设置；bootnode 只负责发现，不整形
+        """
+        wan = self.config.get('wan') or {}
+        self.wan_profiles = {}
+        if not wan:
+            return {}
+        nodes = self.config.get('producers', []) + self.config.get('synchers', [])
+        regions = {node['name']: node.get('region', 'default') for node in nodes}
+        overrides = {node['name']: node['wan'] for node in nodes if node.get('wan')}
+        try:
+            profiles = resolve_wan_profiles(wan.get('profiles'))
+            links = build_wan_links(regions, overrides, wan, profiles)
+        except ValueError as e:
+            print(f"  ✗ {e}")
+            sys.exit(1)
+        self.wan_profiles = profiles
+        return links
+    
+    def _blockscout_indexer(self, layout: List[Dict]) -> Optional[Dict]:
+        """
+        blockscout 索引器的调优参数（未启用 blockscout 时为 None）
+
+        索引器默认读取第一个同步者（没有同步者时为最后一个生产者），避免给出块节点增加负载；
+        blockscout_indexer.env 中的条目覆盖推算值
+        """
+        network_config = self.config.get('network', {})
+        if not network_config.get('blockscout', True):
+            return None
+        spec = self.config.get('blockscout_indexer') or {}
+        geth_nodes = [node for node in layout if node['role'] != 'bootnode']
+        synchers = [node for node in geth_nodes if node['role'] == 'syncher']
+        default_node = synchers[0] if synchers else geth_nodes[-1]
+        rpc_name = spec.get('rpc_node', default_node['name'])
+        matches = [node for node in geth_nodes if node['name'] == rpc_name]
+        if not matches:
+            print(f"  ✗ blockscout_indexer.rpc_node 指定的节点不存在: {rpc_name}")
+            sys.exit(1)
+        rpc_node = matches[0]
+        
+        tps, env = blockscout_indexer_env(network_config.get('block_period', 5),
+                                          network_config.get('gas_limit', 800000000),
+                                          spec.get('expected_tps'))
+        rpc_url = f"http://{rpc_node['ip']}:{rpc_node['rpc_port']}/"
+        env = {
+            'ETHEREUM_JSONRPC_HTTP_URL': rpc_url,
+            'ETHEREUM_JSONRPC_TRACE_URL': rpc_url,
+            **env,
+            **{key: str(value) for key, value in (spec.get('env') or {}).items()},
+        }
+        return {'expected_tps': round(tps, 1), 'rpc_node': rpc_name, 'env': env}
+    
+    def get_enode_ids(self) -> Dict[str, str]:
+        """由 nodekey 计算所有节点的enode ID（不依赖 geth 或 docker）"""
+        print("\n获取节点enode ID...")
+        producers = self.config.get('producers', [])
+        synchers = self.config.get('synchers', [])
+        enode_ids = {}
+        
+        for node_name in [n['name'] for n in producers + synchers] + self._bootnode_names():
+            nodekey_path = self._nodekey_path(node_name)
             
             # 检查nodekey文件是否存在
             if not os.path.exists(nodekey_path):
                 print(f"  ✗ nodekey文件不存在 ({node_name})")
-                print(f"  提示: 请确保节点已经正确初始化")
+                print(f"  提示: 请确保已执行节点密钥生成步骤")
                 sys.exit(1)
             
             # 读取nodekey（私钥）
             with open(nodekey_path, 'r') as f:
                 nodekey_hex = f.read().strip()
             
-            if has_coincurve:
-                try:
-                    # 使用coincurve库从私钥计算公钥
-                    private_key_bytes = bytes.fromhex(nodekey_hex)
-                    private_key = PrivateKey(private_key_bytes)
-                    # 获取未压缩的公钥（去掉0x04前缀）
-                    public_key_bytes = private_key.public_key.format(compressed=False)[1:]
-                    enode_id = public_key_bytes.hex()
-                    enode_ids[node_name] = enode_id
-                    print(f"  ✓ {node_name}: {enode_id[:16]}...")
-                    
-                except Exception as e:
-                    print(f"  ✗ 计算enode ID失败 ({node_name}): {e}")
-                    sys.exit(1)
-            else:
-                # 如果没有安装coincurve，使用临时启动节点的方法
-                print(f"  ! 未安装coincurve库，使用临时启动节点方法获取enode...")
-                print(f"    (提示: 运行 'pip install coincurve' 可以加快这个过程)")
-                enode_id = self._get_enode_from_running_node(node_name, i)
-                if enode_id:
-                    enode_ids[node_name] = enode_id
-                    print(f"  ✓ {node_name}: {enode_id[:16]}...")
-                else:
-                    print(f"  ✗ 无法获取enode ID ({node_name})")
-                    sys.exit(1)
+            try:
+                # enode ID 即未压缩公钥（去掉0x04前缀）
+                enode_id = derive_public_key(bytes.fromhex(nodekey_hex)).hex()
+            except Exception as e:
+                print(f"  ✗ 计算enode ID失败 ({node_name}): {e}")
+                sys.exit(1)
+            
+            enode_ids[node_name] = enode_id
+            print(f"  ✓ {node_name}: {enode_id[:16]}...")
         
         return enode_ids
     
-    def _get_enode_from_running_node(self, node_name: str, index: int) -> str:
-        """通过临时启动节点来获取enode ID（备用方法）"""
-        import time
-        
-        node_dir = os.path.join(self.output_dir, f"node_{node_name}")
-        password_file = os.path.join(self.output_dir, f"node_{node_name}_password.txt")
-        port = 30306 + index
-        image = self.config.get('docker_image', 'ethereum/client-go:latest')
-        network_config = self.config.get('network', {})
-        chain_id = network_config.get('chain_id', 123454321)
-        
-        # 临时启动节点
-        cmd = [
-            'docker', 'run', '--rm', '-d',
-            '--name', f'temp-{node_name}',
-            '-v', f"{os.path.abspath(node_dir)}:/root/.ethereum",
-            image,
-            '--datadir', '/root/.ethereum',
-            '--port', str(port),
-            '--networkid', str(chain_id),
-            '--maxpeers', '0'  # 不连接其他节点
-        ]
-        
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            time.sleep(3)  # 等待节点启动
-            
-            # 读取日志获取enode
-            logs_cmd = ['docker', 'logs', f'temp-{node_name}']
-            result = subprocess.run(logs_cmd, capture_output=True, text=True)
-            
-            # 从日志中查找enode
-            for line in result.stdout.split('\n') + result.stderr.split('\n'):
-                if 'self=enode://' in line or 'enode://' in line:
-                    # 提取enode ID
-                    if 'enode://' in line:
-                        enode_part = line.split('enode://')[1]
-                        if '@' in enode_part:
-                            enode_id = enode_part.split('@')[0]
-                            return enode_id
-            
-            return None
-            
-        finally:
-            # 停止容器
-            subprocess.run(['docker', 'stop', f'temp-{node_name}'], 
-                         capture_output=True, text=True)
-    
     def generate_docker_compose(self, enode_ids: Dict[str, str]):
-        """生成docker-compose.yml文件"""
+        """生成docker-compose.yml文件和各节点的 config.toml"""
         print("\n生成docker-compose.yml...")
         
         producers = self.config.get('producers', [])
@@ -342,39 +1243,99 @@ class EthereumNetworkGenerator:
         network_config = self.config.get('network', {})
         chain_id = network_config.get('chain_id', 123454321)
         subnet = network_config.get('subnet', '172.20.0.0/16')
-        base_ip = network_config.get('base_ip', '172.20.0.2')
+        topology = network_config.get('topology', 'star')
+        prefix = network_config.get('container_prefix', 'ethereum')
         
-        services = []
-        ip_parts = base_ip.split('.')
-        ip_counter = int(ip_parts[3])
+        layout = self._node_layout()
+        by_name = {node['name']: node for node in layout}
+        geth_nodes = [node for node in layout if node['role'] != 'bootnode']
+        producer_names = [p['name'] for p in producers]
+        
+        try:
+            static_peers = build_topology(
+                [node['name'] for node in geth_nodes], producer_names, topology,
+                k=int(network_config.get('topology_k', 4)),
+                seed=int(network_config.get('topology_seed', 0)),
+            )
+        except ValueError as e:
+            print(f"  ✗ {e}")
+            sys.exit(1)
+        
+        def enode(node_name: str) -> str:
+            node = by_name[node_name]
+            return f"enode://{enode_ids[node_name]}@{node['ip']}:{node['p2p_port']}"
+        
+        dedicated_bootnodes = [enode(node['name']) for node in layout if node['role'] == 'bootnode']
+        node_profiles = self._node_profiles()
+        wan_links = self._wan_links()
+        ip_of = {node['name']: node['ip'] for node in layout}
         
         # 获取输出目录的绝对路径
         output_dir_abs = os.path.abspath(self.output_dir)
+        services = []
         
-        # 生成区块生产者服务
-        for i, producer in enumerate(producers):
-            node_name = producer['name']
+        for node in geth_nodes:
+            node_name = node['name']
             node_dir = f"node_{node_name}"
             password_file = f"node_{node_name}_password.txt"
-            p2p_port = 30306 + i
-            rpc_port = 8545 + i
-            node_ip = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.{ip_counter}"
-            ip_counter += 1
-            
+            p2p_port = node['p2p_port']
+            rpc_port = node['rpc_port']
             address = self.accounts[node_name]
+            peers = static_peers[node_name]
             
-            # 构建bootnodes (第一个生产者不需要bootnodes，其他连接到第一个)
-            bootnode_str = ''
-            if i > 0:
-                first_producer = producers[0]
-                first_ip = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.{int(ip_parts[3])}"
-                first_port = 30306
-                first_enode = enode_ids[first_producer['name']]
-                bootnode_str = f" --bootnodes enode://{first_enode}@{first_ip}:{first_port}"
+            # geth 1.12 起忽略数据目录中的 static-nodes.json，静态节点改为写入 config.toml，删除旧文件
+            legacy_static_path = os.path.join(self.output_dir, node_dir, 'geth', 'static-nodes.json')
+            if os.path.exists(legacy_static_path):
+                os.remove(legacy_static_path)
             
-            service = f"""  {node_name}:
-    container_name: ethereum-{node_name}
-    image: {image}
+            # 构建bootnodes
+            if topology == 'star':
+                # 生产者连接到第一个生产者，同步者连接到所有生产者
+                if node['role'] == 'syncher':
+                    bootnodes = [enode(name) for name in producer_names]
+                elif node_name != producer_names[0]:
+                    bootnodes = [enode(producer_names[0])]
+                else:
+                    bootnodes = []
+            else:
+                bootnodes = dedicated_bootnodes
+            
+            extra_flags = ''
+            if bootnodes:
+                extra_flags += f" --bootnodes {','.join(bootnodes)}"
+            if topology in ('mesh', 'ring', 'k-random'):
+                # 连接关系完全由静态节点决定
+                extra_flags += " --nodiscover"
+            if len(peers) + 10 > 50:
+                # 默认 maxpeers 为 50，静态节点较多时需要放宽
+                extra_flags += f" --maxpeers {len(peers) + 10}"
+            
+            # 调优配置（放在最后，可覆盖上面的同名参数）
+            profile = self.tuning_profiles[node_profiles[node_name]]
+            extra_flags += render_geth_flags(profile['flags'])
+            # 节点配置文件：静态节点和 HTTP 超时（均没有对应的命令行参数）
+            config_path = os.path.join(self.output_dir, node_dir, 'config.toml')
+            with open(config_path, 'w') as f:
+                f.write(self._render_node_config([enode(peer) for peer in peers], profile['http_timeouts']))
+            extra_flags += " --config /root/.ethereum/config.toml"
+            resources = self._resource_lines(profile['resources'])
+            
+            # WAN 链路模拟：入口脚本配置 tc 后再启动 geth（容器重启时重新配置）
+            wan_path = os.path.join(self.output_dir, node_dir, 'wan.sh')
+            if wan_links.get(node_name):
+                with open(wan_path, 'w') as f:
+                    f.write(render_tc_script(wan_links[node_name], self.wan_profiles, ip_of))
+                resources += """
+    cap_add:
+      - NET_ADMIN
+    entrypoint: ["/bin/sh", "/root/.ethereum/wan.sh"]"""
+            elif os.path.exists(wan_path):
+                os.remove(wan_path)
+            
+            if node['role'] == 'producer':
+                service = f"""  {node_name}:
+    container_name: {prefix}-{node_name}
+    image: {image}{resources}
     volumes:
       - {output_dir_abs}/{node_dir}:/root/.ethereum
       - {output_dir_abs}/{password_file}:/password.txt
@@ -383,40 +1344,16 @@ class EthereumNetworkGenerator:
       - "{p2p_port}:{p2p_port}"
       - "{p2p_port}:{p2p_port}/udp"
       - "{rpc_port}:{rpc_port}"
-    command: --datadir /root/.ethereum --port {p2p_port} --networkid {chain_id} --unlock {address} --password /password.txt --mine --miner.etherbase {address} --http --http.api eth,net,web3,personal,admin,clique --http.addr 0.0.0.0 --http.port {rpc_port} --http.corsdomain "*" --allow-insecure-unlock{bootnode_str}
+    command: --datadir /root/.ethereum --port {p2p_port} --networkid {chain_id} --unlock {address} --password /password.txt --mine --miner.etherbase {address} --http --http.api eth,net,web3,personal,admin,clique --http.addr 0.0.0.0 --http.port {rpc_port} --http.corsdomain "*" --allow-insecure-unlock{extra_flags}
     networks:
       ethnet:
-        ipv4_address: {node_ip}"""
-            
-            services.append(service)
-        
-        # 生成同步节点服务
-        # 构建所有生产者的bootnodes列表
-        bootnode_list = []
-        for i, producer in enumerate(producers):
-            producer_ip = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.{int(ip_parts[3]) + i}"
-            producer_port = 30306 + i
-            producer_enode = enode_ids[producer['name']]
-            bootnode_list.append(f"enode://{producer_enode}@{producer_ip}:{producer_port}")
-        
-        bootnodes = ','.join(bootnode_list)
-        
-        for i, syncher in enumerate(synchers):
-            node_name = syncher['name']
-            node_dir = f"node_{node_name}"
-            password_file = f"node_{node_name}_password.txt"
-            p2p_port = 30306 + len(producers) + i
-            rpc_port = 8545 + len(producers) + i
-            node_ip = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.{ip_counter}"
-            ip_counter += 1
-            
-            address = self.accounts[node_name]
-            
-            service = f"""  {node_name}:
-    container_name: ethereum-{node_name}
-    image: {image}
+        ipv4_address: {node['ip']}"""
+            else:
+                service = f"""  {node_name}:
+    container_name: {prefix}-{node_name}
+    image: {image}{resources}
     depends_on:
-      - {producers[0]['name']}
+      - {producer_names[0]}
     volumes:
       - {output_dir_abs}/{node_dir}:/root/.ethereum
       - {output_dir_abs}/{password_file}:/password.txt
@@ -425,13 +1362,32 @@ class EthereumNetworkGenerator:
       - "{p2p_port}:{p2p_port}"
       - "{p2p_port}:{p2p_port}/udp"
       - "{rpc_port}:{rpc_port}"
-    command: --datadir /root/.ethereum --port {p2p_port} --networkid {chain_id} --unlock {address} --password /password.txt --http --http.api eth,net,web3,personal,admin --http.addr 0.0.0.0 --http.port {rpc_port} --http.corsdomain "*" --allow-insecure-unlock --bootnodes {bootnodes}
+    command: --datadir /root/.ethereum --port {p2p_port} --networkid {chain_id} --unlock {address} --password /password.txt --http --http.api eth,net,web3,personal,admin,clique,miner --http.addr 0.0.0.0 --http.port {rpc_port} --http.corsdomain "*" --allow-insecure-unlock{extra_flags}
     networks:
       ethnet:
-        ipv4_address: {node_ip}"""
+        ipv4_address: {node['ip']}"""
             
             services.append(service)
         
+        # 专用 bootnode（只负责节点发现，使用 alltools 镜像中的 bootnode 程序）
+        bootnode_image = network_config.get('bootnode_image') or alltools_image(image)
+        if not bootnode_image and any(node['role'] == 'bootnode' for node in layout):
+            print(f"  ✗ 无法由 docker_image ({image}) 推算 bootnode 使用的 alltools 镜像（需要带版本标签）")
+            print("    请在 network 中用 bootnode_image 指定，如 ethereum/client-go:alltools-v1.13.15")
+            sys.exit(1)
+        for node in layout:
+            if node['role'] != 'bootnode':
+                continue
+            services.append(f"""  {node['name']}:
+    container_name: {prefix}-{node['name']}
+    image: {bootnode_image}
+    volumes:
+      - {output_dir_abs}/node_{node['name']}/nodekey:/nodekey
+    command: bootnode -nodekey /nodekey -addr :{node['p2p_port']} -verbosity 3
+    networks:
+      ethnet:
+        ipv4_address: {node['ip']}""")
+        
         # 读取模板并替换
         template_path = 'docker-compose.yml.template'
         if not os.path.exists(template_path):
@@ -442,6 +1398,11 @@ class EthereumNetworkGenerator:
             template = f.read()
         
         services_content = '\n\n'.join(services)
+        if not network_config.get('blockscout', True):
+            # 不启用 blockscout 时去掉模板中 {{SERVICES}} 之后的服务（其容器名和地址固定，无法多份共存）
+            head, rest = template.split('{{SERVICES}}', 1)
+            template = head + '{{SERVICES}}\n' + rest[rest.index('\nnetworks:'):]
+        
         docker_compose = template.replace('{{SERVICES}}', services_content)
         docker_compose = docker_compose.replace('{{SUBNET}}', subnet)
         
@@ -450,38 +1411,121 @@ class EthereumNetworkGenerator:
         with open(compose_path, 'w') as f:
             f.write(docker_compose)
         
-        print(f"  ✓ {compose_path} ({len(producers)}个生产者, {len(synchers)}个同步者)")
+        # blockscout 索引器调优。模板中的 backend 服务默认是注释掉的，默认的 compose 不会加载此文件；
+        # 取消注释后 backend 通过 env_file 在公共配置之后加载它，覆盖同名条目
+        indexer = self._blockscout_indexer(layout)
+        indexer_env_path = os.path.join(self.output_dir, 'blockscout-indexer.env')
+        if indexer:
+            with open(indexer_env_path, 'w') as f:
+                f.write("# blockscout 索引器调优（由 generate_network.py 生成，请勿手动修改）\n")
+                f.write(f"# 出块间隔 {network_config.get('block_period', 5)} 秒，"
+                        f"按 {indexer['expected_tps']} TPS 推算，读取节点 {indexer['rpc_node']}\n")
+                for key, value in indexer['env'].items():
+                    f.write(f"{key}={value}\n")
+            env = indexer['env']
+            print(f"  ✓ {indexer_env_path} (索引器: 每批 {env['INDEXER_CATCHUP_BLOCKS_BATCH_SIZE']} 个区块, "
+                  f"并发 {env['INDEXER_CATCHUP_BLOCKS_CONCURRENCY']}, 连接池 {env['POOL_SIZE']})")
+            print("    注意: 模板中的 blockscout backend 服务默认被注释，需取消注释（或在自行运行的 backend 中"
+                  "添加 env_file: ./blockscout-indexer.env）后调优才会生效")
+        elif os.path.exists(indexer_env_path):
+            os.remove(indexer_env_path)
+        
+        detail = f"{len(producers)}个生产者, {len(synchers)}个同步者, 拓扑: {topology}"
+        if dedicated_bootnodes:
+            detail += f", {len(dedicated_bootnodes)}个bootnode"
+        shaped = sum(1 for peers in wan_links.values() if peers)
+        if shaped:
+            detail += f", WAN 模拟: {shaped}个节点"
+        print(f"  ✓ {compose_path} ({detail})")
+    
+    @staticmethod
+    def _render_node_config(static_nodes: List[str], http_timeouts: Dict) -> str:
+        """节点的 config.toml（静态节点写入 [Node.P2P]，HTTP 超时单位为秒，toml 中为纳秒）"""
+        lines = ["# 由 generate_network.py 生成，请勿手动修改"]
+        if http_timeouts:
+            lines.append("[Node.HTTPTimeouts]")
+            for key, seconds in http_timeouts.items():
+                lines.append(f"{key} = {int(float(seconds) * 1_000_000_000)}")
+        if static_nodes:
+            lines.append("[Node.P2P]")
+            lines.append("StaticNodes = [")
+            lines.append(',\n'.join(f'  "{node}"' for node in static_nodes))
+            lines.append("]")
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _resource_lines(resources: Dict) -> str:
+        """docker 资源限制（以换行开头，直接拼接在 image 之后）"""
+        lines = []
+        if resources.get('cpus'):
+            lines.append(f"    cpus: {resources['cpus']}")
+        if resources.get('mem_limit'):
+            lines.append(f"    mem_limit: {resources['mem_limit']}")
+        if resources.get('nofile'):
+            lines.append("    ulimits:")
+            lines.append("      nofile:")
+            lines.append(f"        soft: {resources['nofile']}")
+            lines.append(f"        hard: {resources['nofile']}")
+        return ''.join(f"\n{line}" for line in lines)
     
     def save_node_info(self):
         """保存节点信息到文件"""
         print("\n保存节点信息...")
         
+        network_config = self.config.get('network', {})
         info = {
-            'network': self.config.get('network'),
+            'network': network_config,
             'output_directory': os.path.abspath(self.output_dir),
+            'topology': network_config.get('topology', 'star'),
+            'tuning_profiles': {},
             'producers': [],
-            'synchers': []
+            'synchers': [],
+            'bootnodes': []
         }
+        node_profiles = self._node_profiles()
+        wan_links = self._wan_links()
+        regions = {node['name']: node.get('region', 'default')
+                   for node in self.config.get('producers', []) + self.config.get('synchers', [])}
         
-        producers = self.config.get('producers', [])
-        for i, producer in enumerate(producers):
-            info['producers'].append({
-                'name': producer['name'],
-                'address': self.accounts[producer['name']],
-                'rpc_port': 8545 + i,
-                'p2p_port': 30306 + i,
-                'rpc_url': f"http://localhost:{8545 + i}"
+        for node in self._node_layout():
+            if node['role'] == 'bootnode':
+                info['bootnodes'].append({
+                    'name': node['name'],
+                    'ip': node['ip'],
+                    'p2p_port': node['p2p_port']
+                })
+                continue
+            info[f"{node['role']}s"].append({
+                'name': node['name'],
+                'address': self.accounts[node['name']],
+                'ip': node['ip'],
+                'rpc_port': node['rpc_port'],
+                'p2p_port': node['p2p_port'],
+                'rpc_url': f"http://localhost:{node['rpc_port']}",
+                'profile': node_profiles[node['name']],
+                'region': regions[node['name']]
             })
         
-        synchers = self.config.get('synchers', [])
-        for i, syncher in enumerate(synchers):
-            info['synchers'].append({
-                'name': syncher['name'],
-                'address': self.accounts[syncher['name']],
-                'rpc_port': 8545 + len(producers) + i,
-                'p2p_port': 30306 + len(producers) + i,
-                'rpc_url': f"http://localhost:{8545 + len(producers) + i}"
-            })
+        # 记录实际使用的调优配置内容，便于把测试结果与配置对应
+        for name in sorted(set(node_profiles.values())):
+            info['tuning_profiles'][name] = self.tuning_profiles[name]
+        
+        # WAN 链路模拟：各节点到其他节点的链路配置名称及其参数
+        if any(wan_links.values()):
+            used = sorted({name for peers in wan_links.values() for name in peers.values()})
+            info['wan'] = {
+                'profiles': {name: self.wan_profiles[name] for name in used},
+                'links': wan_links,
+            }
+        
+        # 预置的测试账号（tps_test.py 可通过 --account-seed 直接使用）
+        if self.config.get('test_accounts'):
+            info['test_accounts'] = self.config['test_accounts']
+        
+        # blockscout 索引器调优参数（tps_test.py --indexer-lag 对照使用）
+        indexer = self._blockscout_indexer(self._node_layout())
+        if indexer:
+            info['blockscout'] = indexer
         
         info_path = os.path.join(self.output_dir, 'node_info.json')
         with open(info_path, 'w') as f:
@@ -496,14 +1540,47 @@ class EthereumNetworkGenerator:
         print("=" * 60)
         print(f"\n输出目录: {os.path.abspath(self.output_dir)}\n")
         
+        # 提前检查子网容量、调优配置和 WAN 配置，避免在初始化节点之后才失败
+        self._node_layout()
+        self._node_profiles()
+        self._wan_links()
         self.create_directories()
         self.create_password_files()
         self.create_accounts()
+        self.create_nodekeys()
         self.generate_genesis()
         self.initialize_nodes()
         enode_ids = self.get_enode_ids()
-        self.generate_docker_compose(enode_ids)
-        self.save_node_info()
+        
+        compose_outputs = [os.path.join(self.output_dir, name)
+                           for name in ('docker-compose.yml', 'node_info.json')]
+        if self.config.get('network', {}).get('blockscout', True):
+            compose_outputs.append(os.path.join(self.output_dir, 'blockscout-indexer.env'))
+        # 各节点目录下的 config.toml 和 wan.sh 也由这一步生成
+        wan_links = self._wan_links()
+        for node in self._node_layout():
+            if node['role'] == 'bootnode':
+                continue
+            node_dir = os.path.join(self.output_dir, f"node_{node['name']}")
+            compose_outputs.append(os.path.join(node_dir, 'config.toml'))
+            if wan_links.get(node['name']):
+                compose_outputs.append(os.path.join(node_dir, 'wan.sh'))
+        compose_inputs = {
+            'config': digest(self.config),
+            'template': file_sha256('docker-compose.yml.template')
+                        if os.path.exists('docker-compose.yml.template') else '',
+            'accounts': digest({name: address.lower() for name, address in self.accounts.items()}),
+            'enodes': digest(enode_ids),
+            'output_directory': os.path.abspath(self.output_dir),
+        }
+        if not self.force and self.manifest.is_fresh('compose', compose_inputs, compose_outputs):
+            print("\n生成docker-compose.yml...")
+            for path in compose_outputs:
+                print(f"  ✓ {path} (未变化)")
+        else:
+            self.generate_docker_compose(enode_ids)
+            self.save_node_info()
+            self.manifest.record('compose', compose_inputs, compose_outputs)
         
         print("\n" + "=" * 60)
         print("✓ 配置生成完成!")
@@ -515,6 +1592,203 @@ class EthereumNetworkGenerator:
         print(f"  3. 查看节点信息: cat node_info.json")
         print("")
 
+def deep_merge(base: Dict, override: Dict) -> Dict:
+    """递归合并字典（override 优先，列表整体替换）"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class NetworkMatrix:
+    """
+    多网络模式：根据矩阵文件把基础配置展开为多个变体并并行生成
+
+    每个变体自动分配互不重叠的 RPC/P2P 端口段、子网、容器名前缀和链 ID，
+    使多个网络可以在同一台主机上同时运行。生成结束后写入索引文件 networks.json
+    """
+    
+    def __init__(self, matrix_file: str, base_config: str = 'config.yaml',
+                 jobs: int = None, parallel: int = None, extra_args: List[str] = ()):
+        with open(matrix_file, 'r', encoding='utf-8') as f:
+            self.matrix = yaml.safe_load(f) or {}
+        self.base_config_file = self.matrix.get('base', base_config)
+        with open(self.base_config_file, 'r', encoding='utf-8') as f:
+            self.base_config = yaml.safe_load(f)
+        # 变体目录默认与 blockscout/ 同级，保证模板中 ../blockscout 的相对路径有效
+        self.output_root = self.matrix.get('output', '.')
+        self.variants = self.matrix.get('variants') or []
+        self.parallel = parallel or min(len(self.variants) or 1, os.cpu_count() or 1)
+        # 各变体平分 docker 并发数
+        self.jobs = max(1, (jobs or min(8, os.cpu_count() or 1)) // self.parallel)
+        self.extra_args = list(extra_args)
+    
+    @staticmethod
+    def _expand_nodes(value, prefix: str, password: str) -> List[Dict]:
+        """节点列表可以直接写数量，例如 producers: 8"""
+        if isinstance(value, int):
+            return [{'name': f"{prefix}{i + 1}", 'password': password} for i in range(value)]
+        return value
+    
+    def build_configs(self) -> List[Dict]:
+        """展开所有变体配置并分配端口、子网、容器名前缀和链 ID"""
+        names = [variant.get('name') for variant in self.variants]
+        if not self.variants or None in names or len(set(names)) != len(names):
+            raise ValueError("矩阵文件中的每个变体都需要唯一的 name")
+        
+        base_network = self.base_config.get('network', {})
+        base_subnet = ipaddress.ip_network(base_network.get('subnet', '172.20.0.0/16'))
+        base_ip = ipaddress.ip_address(base_network.get('base_ip', '172.20.0.2'))
+        base_prefix = base_network.get('container_prefix', 'ethereum')
+        base_chain_id = int(base_network.get('chain_id', 123454321))
+        rpc_base = int(base_network.get('rpc_port_base', 8545))
+        p2p_base = int(base_network.get('p2p_port_base', 30306))
+        password = (self.base_config.get('producers') or [{}])[0].get('password', 'password')
+        
+        configs = []
+        for variant in self.variants:
+            overrides = {key: value for key, value in variant.items() if key != 'name'}
+            for key, prefix in (('producers', 'producer'), ('synchers', 'syncher')):
+                if key in overrides:
+                    overrides[key] = self._expand_nodes(overrides[key], prefix, password)
+            configs.append(deep_merge(self.base_config, overrides))
+        
+        # 端口段间隔按最大节点数取整到 10
+        max_nodes = max(len(c.get('producers', [])) + len(c.get('synchers', [])) for c in configs)
+        stride = max(10, -(-max_nodes // 10) * 10)
+        if rpc_base + stride * len(configs) > p2p_base:
+            raise ValueError(f"{len(configs)} 个变体的 RPC 端口段（每段 {stride}）会与 P2P 端口重叠")
+        
+        for k, (variant, config) in enumerate(zip(self.variants, configs)):
+            network = config.setdefault('network', {})
+            explicit = variant.get('network', {})
+            network['name'] = variant['name']
+            # 子网按基础子网的大小依次平移，起始 IP 在子网中的偏移保持不变
+            offset = k * base_subnet.num_addresses
+            if 'subnet' not in explicit:
+                network['subnet'] = str(ipaddress.ip_network(
+                    (int(base_subnet.network_address) + offset, base_subnet.prefixlen)))
+            if 'base_ip' not in explicit:
+                network['base_ip'] = str(base_ip + offset)
+            if 'rpc_port_base' not in explicit:
+                network['rpc_port_base'] = rpc_base + k * stride
+            if 'p2p_port_base' not in explicit:
+                network['p2p_port_base'] = p2p_base + k * stride
+            if 'container_prefix' not in explicit:
+                network['container_prefix'] = f"{base_prefix}-{variant['name']}"
+            if 'chain_id' not in explicit:
+                # 不同的链 ID 避免变体之间通过宿主机端口互相连接
+                network['chain_id'] = base_chain_id + k
+            if 'blockscout' not in explicit:
+                # blockscout 的容器名和地址固定，只保留在第一个（使用基础子网的）变体中
+                network['blockscout'] = k == 0 and base_network.get('blockscout', True)
+        
+        self._check_overlaps(configs)
+        return configs
+    
+    @staticmethod
+    def _check_overlaps(configs: List[Dict]):
+        """
+        检查变体之间的子网、容器名前缀和宿主机端口是否冲突（显式指定时可能冲突）
+
+        RPC 和 P2P 端口映射到同一个宿主机端口空间，所有变体的所有端口段两两比较，
+        包括同一变体的 RPC 段与 P2P 段
+        """
+        for i, a in enumerate(configs):
+            for b in configs[i + 1:]:
+                na, nb = a['network'], b['network']
+                if ipaddress.ip_network(na['subnet']).overlaps(ipaddress.ip_network(nb['subnet'])):
+                    raise ValueError(f"变体 {na['name']} 与 {nb['name']} 的子网重叠")
+                if na['container_prefix'] == nb['container_prefix']:
+                    raise ValueError(f"变体 {na['name']} 与 {nb['name']} 的容器名前缀相同")
+        
+        # (变体名, 端口段名称, 起始端口, 结束端口（不含）)
+        ranges = []
+        for config in configs:
+            network = config['network']
+            size = len(config.get('producers', [])) + len(config.get('synchers', []))
+            for key in ('rpc_port_base', 'p2p_port_base'):
+                start = int(network[key])
+                ranges.append((network['name'], key, start, start + size))
+        for i, (name_a, key_a, start_a, end_a) in enumerate(ranges):
+            for name_b, key_b, start_b, end_b in ranges[i + 1:]:
+                if start_a < end_b and start_b < end_a:
+                    raise ValueError(f"变体 {name_a} 的 {key_a} 端口段 [{start_a}, {end_a}) 与 "
+                                     f"变体 {name_b} 的 {key_b} 端口段 [{start_b}, {end_b}) 重叠")
+    
+    def _generate_one(self, config: Dict) -> Tuple[int, float]:
+        """在子进程中生成单个变体，输出写入变体目录下的 generate.log"""
+        name = config['network']['name']
+        output_dir = os.path.join(self.output_root, name)
+        os.makedirs(output_dir, exist_ok=True)
+        config_path = os.path.join(output_dir, 'network_config.yaml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+        
+        cmd = [sys.executable, os.path.abspath(__file__), config_path,
+               '-o', output_dir, '-j', str(self.jobs)] + self.extra_args
+        start = datetime.datetime.now()
+        with open(os.path.join(output_dir, 'generate.log'), 'w') as log:
+            returncode = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT)
+        return returncode, (datetime.datetime.now() - start).total_seconds()
+    
+    def generate(self) -> bool:
+        """并行生成所有变体并写入索引文件，全部成功时返回 True"""
+        print("=" * 60)
+        print("以太坊PoA私有网络配置生成器（多网络模式）")
+        print("=" * 60)
+        try:
+            configs = self.build_configs()
+        except (ValueError, KeyError) as e:
+            print(f"  ✗ {e}")
+            return False
+        
+        print(f"\n基础配置: {self.base_config_file}")
+        print(f"变体数量: {len(configs)}（并行 {self.parallel} 个，每个 -j {self.jobs}）\n")
+        for config in configs:
+            network = config['network']
+            print(f"  {network['name']}: 子网 {network['subnet']}, RPC {network['rpc_port_base']}+, "
+                  f"P2P {network['p2p_port_base']}+, 容器 {network['container_prefix']}-*")
+        
+        print("\n生成变体...")
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            results = list(executor.map(self._generate_one, configs))
+        
+        index = {'base_config': os.path.abspath(self.base_config_file), 'networks': []}
+        ok = True
+        for variant, config, (returncode, seconds) in zip(self.variants, configs, results):
+            network = config['network']
+            output_dir = os.path.join(self.output_root, network['name'])
+            if returncode != 0:
+                ok = False
+                print(f"  ✗ {network['name']}: 生成失败，详见 {os.path.join(output_dir, 'generate.log')}")
+                continue
+            print(f"  ✓ {network['name']} ({seconds:.1f} 秒)")
+            node_count = len(config.get('producers', [])) + len(config.get('synchers', []))
+            index['networks'].append({
+                'name': network['name'],
+                'overrides': {key: value for key, value in variant.items() if key != 'name'},
+                'output_directory': os.path.abspath(output_dir),
+                'node_info': os.path.abspath(os.path.join(output_dir, 'node_info.json')),
+                'compose_file': os.path.abspath(os.path.join(output_dir, 'docker-compose.yml')),
+                'chain_id': network['chain_id'],
+                'subnet': network['subnet'],
+                'container_prefix': network['container_prefix'],
+                'rpc_ports': [network['rpc_port_base'], network['rpc_port_base'] + node_count - 1],
+                'p2p_ports': [network['p2p_port_base'], network['p2p_port_base'] + node_count - 1],
+                'rpc_url': f"http://localhost:{network['rpc_port_base']}",
+            })
+        
+        index_path = os.path.join(self.output_root, 'networks.json')
+        with open(index_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        print(f"\n  ✓ {index_path}")
+        return ok
+
+
 def main():
     """主函数"""
     import argparse
@@ -528,6 +1802,9 @@ def main():
   %(prog)s -o output                      # 指定输出目录名称
   %(prog)s network_config.yaml            # 使用指定配置文件
   %(prog)s network_config.yaml -o output  # 同时指定配置文件和输出目录
+  %(prog)s -j 16                          # 最多同时运行 16 个 docker 容器
+  %(prog)s --reinit                       # genesis 变化后重新初始化节点链数据
+  %(prog)s --matrix matrix.yaml           # 按矩阵文件并行生成多个互相隔离的网络
         """
     )
     
@@ -544,9 +1821,47 @@ def main():
         help='输出目录名称 (默认: 从配置文件读取network.name)'
     )
     
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='按节点并发处理（克隆链数据等）的线程数 (默认: min(8, CPU核数))'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='忽略 .manifest.json，重新生成 genesis 和 docker-compose 等所有产物'
+    )
+    
+    parser.add_argument(
+        '--reinit',
+        action='store_true',
+        help='genesis 变化时丢弃现有链数据并重新初始化节点（默认报错退出）'
+    )
+    
+    parser.add_argument(
+        '--matrix',
+        metavar='FILE',
+        help='多网络模式：按矩阵文件生成多个变体网络（端口、子网、容器名自动错开）'
+    )
+    
+    parser.add_argument(
+        '--parallel',
+        type=int,
+        help='多网络模式下同时生成的变体数 (默认: min(变体数, CPU核数))'
+    )
+    
     args = parser.parse_args()
     
-    generator = EthereumNetworkGenerator(args.config, args.output_dir)
+    if args.matrix:
+        extra_args = [flag for flag, enabled in (('--force', args.force), ('--reinit', args.reinit)) if enabled]
+        matrix = NetworkMatrix(args.matrix, args.config, args.jobs, args.parallel, extra_args)
+        if not matrix.generate():
+            sys.exit(1)
+        return
+    
+    generator = EthereumNetworkGenerator(args.config, args.output_dir, args.jobs,
+                                         force=args.force, reinit=args.reinit)
     generator.generate()
 
 if __name__ == "__main__":
@@ -3,22 +3,38 @@
 以太坊 PoA 网络 TPS 性能测试脚本
 
 功能：
-1. 创建 2000 个以太坊子账号
+1. 创建以太坊子账号（默认 2000 个）
 2. 从 producer1 账号分配余额到所有子账号
-3. 使用前 1000 个账号作为发送方，后 1000 个作为接收方进行交易
+3. 将子账号划分为发送方和接收方（默认各一半），按可选的访问模式进行交易
 4. 记录和显示 TPS 性能指标
 5. 支持多线程或异步方式提高效率
+6. 支持协调者/工作者模式，多台机器分布式施压
 """
 
 import os
 import sys
+import math
+import mmap
+import struct
+import hashlib
 import time
 import json
+import random
+import bisect
 import asyncio
-from typing import List, Dict, Tuple
+import itertools
+import threading
+import statistics
+import collections
+import subprocess
+import queue
+import urllib.request
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Tuple, Optional, Iterator
 from decimal import Decimal
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from web3 import Web3
 try:
@@ -28,6 +44,23 @@ except ImportError:
     from web3.middleware import ExtraDataToPOAMiddleware as geth_poa_middleware
 from eth_account import Account
 
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+def derive_test_account_key(seed: str, index: int) -> bytes:
+    """
+    由种子和序号确定性地派生测试账号私钥
+
+    必须与 generate_network.py 中的同名函数保持一致，才能得到 genesis 预置账号的私钥
+    （在此单独实现，测试机不需要 generate_network.py 及其依赖）
+    """
+    counter = 0
+    while True:
+        key = hashlib.sha256(f"{seed}:{index}:{counter}".encode()).digest()
+        if 0 < int.from_bytes(key, 'big') < SECP256K1_N:
+            return key
+        counter += 1
+
 
 @dataclass
 class TestConfig:
@@ -42,6 +75,248 @@ class TestConfig:
     gas_price_gwei: int = 20  # Gas价格（Gwei）
     max_retries: int = 3  # 最大重试次数
     retry_delay: float = 1.0  # 重试延迟（秒）
+    rpc_urls: List[str] = field(default_factory=list)  # 额外的 RPC 节点（按发送方分摊）
+    num_senders: int = 0  # 发送方数量（0 表示账号总数的一半）
+    num_receivers: int = 0  # 接收方数量（0 表示剩余全部账号）
+    access_pattern: str = 'uniform'  # 访问模式，见 AccessPattern
+    zipf_s: float = 1.1  # Zipf 分布指数（越大越集中）
+    hot_receivers: int = 10  # many-to-few 模式下的接收方数量
+    rebalance: bool = False  # 测试期间自动补充发送方余额
+    reserve_private_key: str = ''  # 补充余额的储备账号私钥（为空时使用 producer 账号）
+    topup_amount: str = ''  # 每次补充的金额（ETH，为空时使用 distribution_amount）
+    rebalance_lead: float = 30.0  # 提前多少秒的消耗量触发补充
+    warmup: Optional[float] = None  # 统计时排除开头的秒数（None 表示自动检测稳态）
+    cooldown: Optional[float] = None  # 统计时排除提交结束前的秒数
+    dynamic_fee: bool = False  # 发送 EIP-1559（type 2）交易，按 baseFee 动态定价
+    priority_fee_gwei: float = 1.0  # 动态费用模式下的小费（Gwei）
+    fee_headroom: float = 2.0  # maxFeePerGas 相对 baseFee 档位上限的倍数
+    receiver_shard: Tuple[int, int] = (0, 1)  # 轮换时只使用下标取余等于 shard[0] 的接收方（分布式模式下各工作者共用接收方）
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图
+
+    桶边界固定，因此不同进程/机器上的直方图可以直接按桶相加合并
+    """
+    MIN_SECONDS = 0.0001  # 第一个桶的上界（0.1 毫秒）
+    GROWTH = 1.25  # 相邻桶上界的比例
+    NUM_BUCKETS = 80  # 最后一个桶约 5600 秒
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max_value = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        index = int(math.ceil(math.log(seconds / self.MIN_SECONDS, self.GROWTH)))
+        return min(index, self.NUM_BUCKETS - 1)
+
+    def record(self, seconds: float):
+        """记录一个样本（线程安全）"""
+        index = self._bucket(seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max_value:
+                self.max_value = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        """合并另一个直方图"""
+        with self._lock:
+            for i, c in enumerate(other.counts):
+                self.counts[i] += c
+            self.count += other.count
+            self.total += other.total
+            self.max_value = max(self.max_value, other.max_value)
+
+    def percentile(self, p: float) -> float:
+        """返回第 p 百分位（取所在桶的上界）"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target and c > 0:
+                return min(self.MIN_SECONDS * self.GROWTH ** i, self.max_value)
+        return self.max_value
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'counts': self.counts,
+            'count': self.count,
+            'total': self.total,
+            'max': self.max_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        hist = cls()
+        hist.counts = list(data['counts'])
+        hist.count = data['count']
+        hist.total = data['total']
+        hist.max_value = data['max']
+        return hist
+
+
+class AccessPattern:
+    """
+    发送方/接收方访问模式
+
+    - uniform: 发送方和接收方都按序轮询，每个账号负载相同
+    - zipf: 发送方按 Zipf 分布抽样，少数热点账号承担大部分交易
+    - hot-receiver: 所有交易都转给同一个接收方
+    - many-to-few: 接收方只在前 hot_receivers 个账号中轮询
+
+    非均匀的发送方序列在初始化时预先抽样成一张固定大小的索引表，
+    发送时按序查表，每笔交易 O(1) 且不产生额外分配
+    """
+    PATTERNS = ('uniform', 'zipf', 'hot-receiver', 'many-to-few')
+    MIN_TABLE_SIZE = 1 << 16
+    
+    def __init__(self, name: str, num_senders: int, num_receivers: int,
+                 zipf_s: float = 1.1, hot_receivers: int = 10, seed: Optional[int] = None):
+        if name not in self.PATTERNS:
+            raise ValueError(f"未知的访问模式: {name}（可选: {', '.join(self.PATTERNS)}）")
+        if num_senders <= 0 or num_receivers <= 0:
+            raise ValueError("发送方和接收方数量必须大于 0")
+        
+        self.name = name
+        self.num_senders = num_senders
+        self.num_receivers = num_receivers
+        self.zipf_s = zipf_s
+        self._sender_table: Optional[array] = None
+        self._mask = 0
+        
+        if name == 'zipf':
+            size = max(self.MIN_TABLE_SIZE, 1 << (2 * num_senders - 1).bit_length())
+            self._sender_table = self._zipf_table(num_senders, zipf_s, size, random.Random(seed))
+            self._mask = size - 1
+        
+        if name == 'hot-receiver':
+            self._receiver_span = 1
+        elif name == 'many-to-few':
+            self._receiver_span = max(1, min(hot_receivers, num_receivers))
+        else:
+            self._receiver_span = num_receivers
+    
+    @staticmethod
+    def _zipf_table(n: int, s: float, size: int, rng: random.Random) -> array:
+        """按 Zipf(s) 分布预先抽样 size 个发送方下标"""
+        cumulative = list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+        total = cumulative[-1]
+        # 打乱排名与账号的对应关系，热点账号不总是前几个
+        ranks = list(range(n))
+        rng.shuffle(ranks)
+        return array('I', (ranks[bisect.bisect_left(cumulative, rng.random() * total)] for _ in range(size)))
+    
+    def sender(self, i: int) -> int:
+        """第 i 笔交易的发送方下标"""
+        if self._sender_table is not None:
+            return self._sender_table[i & self._mask]
+        return i % self.num_senders
+    
+    def receiver(self, i: int) -> int:
+        """第 i 笔交易的接收方下标"""
+        return i % self._receiver_span
+    
+    def active_senders(self) -> List[int]:
+        """会被使用到的发送方下标"""
+        if self._sender_table is not None:
+            return sorted(set(self._sender_table))
+        return list(range(self.num_senders))
+    
+    def active_receivers(self) -> List[int]:
+        """会收到转账的接收方下标"""
+        return list(range(self._receiver_span))
+    
+    def describe(self) -> str:
+        desc = f"{self.name}（发送方 {self.num_senders} 个"
+        if self._sender_table is not None:
+            desc += f"，Zipf s={self.zipf_s}，实际活跃 {len(set(self._sender_table))} 个"
+        return desc + f"，接收方 {self._receiver_span} 个）"
+
+
+# 95% 置信度的 t 分布临界值（自由度 1-9），自由度更大时近似为 1.96
+_T_975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262}
+
+
+def detect_steady_state(series: List[float], window: int = 5, tolerance: float = 0.2) -> Tuple[int, int]:
+    """
+    检测计数序列的稳态区间，返回闭区间下标 (first, last)
+
+    以滑动平均的中位数作为平台水平，稳态区间为滑动平均（取窗口中心）
+    首次到最后一次达到 (1 - tolerance) × 平台水平之间的部分，
+    从而排除开头的预热爬坡和结尾的下降
+    """
+    n = len(series)
+    if n < window * 2:
+        return 0, n - 1
+    rolling = [sum(series[i:i + window]) / window for i in range(n - window + 1)]
+    level = statistics.median(rolling)
+    if level <= 0:
+        return 0, n - 1
+    threshold = level * (1 - tolerance)
+    above = [i for i, r in enumerate(rolling) if r >= threshold]
+    return above[0] + window // 2, above[-1] + window // 2
+
+
+def batch_means_ci(series: List[float], batches: int = 10) -> float:
+    """
+    用批均值法估计序列均值的 95% 置信区间半宽
+
+    相邻样本（每秒/每块的交易数）存在自相关，分成若干批后
+    以批均值的方差估计，比直接使用样本方差更可靠
+    """
+    k = min(batches, len(series) // 2)
+    if k < 2:
+        return 0.0
+    size = len(series) // k
+    means = [sum(series[i * size:(i + 1) * size]) / size for i in range(k)]
+    return _T_975.get(k - 1, 1.96) * statistics.stdev(means) / math.sqrt(k)
+
+
+def wilson_interval(failures: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    二项比例的 Wilson 置信区间
+
+    失败率接近 0 时正态近似的区间会越过 0，Wilson 区间在小比例和小样本下仍然可靠
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = failures / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def apportion(total: int, weights: List[float], minimum: int = 1) -> List[int]:
+    """
+    最大余数法按权重分配整数份额
+
+    每份先保底 minimum，剩余部分按权重取整后把余数依次分给小数部分最大的几份，
+    保证份额之和恰好等于 total，不会出现整除截断成 0 的情况
+    """
+    if total < minimum * len(weights):
+        raise ValueError(f"无法把 {total} 分成 {len(weights)} 份（每份至少 {minimum}）")
+    rest = total - minimum * len(weights)
+    weight_sum = sum(weights)
+    quotas = [rest * w / weight_sum for w in weights]
+    shares = [minimum + int(q) for q in quotas]
+    by_remainder = sorted(range(len(weights)), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
 
 
 @dataclass
@@ -52,6 +327,14 @@ class TransactionStats:
     failed_transactions: int = 0
     start_time: float = 0
     end_time: float = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)  # 提交延迟
+    start_block: int = 0  # 测试开始时的区块高度
+    end_block: int = 0  # 测试结束时的区块高度
+    submit_end_time: float = 0  # 停止提交新交易的时间（之后为收尾阶段）
+    timeline: List[int] = field(default_factory=list)  # 每秒成功提交数（下标为距 start_time 的秒数）
+    warmup: Optional[float] = None  # 手动指定的预热秒数（None 表示自动检测）
+    cooldown: Optional[float] = None  # 手动指定的冷却秒数
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
     
     def get_duration(self) -> float:
         """获取总耗时（秒）"""
@@ -66,10 +349,51 @@ class TransactionStats:
             return 0
         return self.successful_transactions / duration
     
+    def record_submit(self, finished_at: float, latency: float):
+        """记录一笔成功提交（线程安全）"""
+        self.latency.record(latency)
+        second = int(finished_at - self.start_time)
+        with self._lock:
+            if second >= len(self.timeline):
+                self.timeline.extend([0] * (second + 1 - len(self.timeline)))
+            self.timeline[second] += 1
+    
+    def steady_state(self) -> Optional[Dict]:
+        """
+        计算稳态窗口内的 TPS
+
+        只使用提交阶段的完整秒（排除等待剩余交易的收尾阶段）；
+        指定了 warmup/cooldown 时按指定值截取，否则自动检测稳态区间。
+        返回 {'start', 'end'（距开始的秒数）, 'tps', 'ci', 'mode'}
+        """
+        submit_end = self.submit_end_time or self.end_time
+        length = min(len(self.timeline), int(submit_end - self.start_time))
+        series = self.timeline[:length]
+        if not series:
+            return None
+        if self.warmup is not None or self.cooldown is not None:
+            first = int(self.warmup or 0)
+            last = length - 1 - int(self.cooldown or 0)
+            mode = 'manual'
+        else:
+            first, last = detect_steady_state(series)
+            mode = 'auto'
+        if last < first:
+            return None
+        window = series[first:last + 1]
+        return {
+            'start': first,
+            'end': last + 1,
+            'tps': sum(window) / len(window),
+            'ci': batch_means_ci(window),
+            'mode': mode,
+        }
+    
     def display(self):
         """显示统计信息"""
         duration = self.get_duration()
         tps = self.get_tps()
+        steady = self.steady_state()
         
         print("\n" + "=" * 60)
         print("TPS 测试统计结果")
@@ -78,25 +402,482 @@ class TransactionStats:
         print(f"成功交易数:     {self.successful_transactions}")
         print(f"失败交易数:     {self.failed_transactions}")
         print(f"总耗时:         {duration:.2f} 秒")
-        print(f"平均 TPS:       {tps:.2f} 交易/秒")
+        if steady:
+            mode = '自动检测' if steady['mode'] == 'auto' else '手动指定'
+            print(f"稳态 TPS:       {steady['tps']:.2f} ± {steady['ci']:.2f} 交易/秒"
+                  f"（95% 置信区间，窗口 {steady['start']}-{steady['end']} 秒，{mode}）")
+        print(f"整体平均 TPS:   {tps:.2f} 交易/秒（含预热和收尾）")
         print(f"成功率:         {(self.successful_transactions / self.total_transactions * 100) if self.total_transactions > 0 else 0:.2f}%")
+        if self.latency.count > 0:
+            print(f"提交延迟:       平均 {self.latency.mean() * 1000:.1f} ms | "
+                  f"P50 {self.latency.percentile(50) * 1000:.1f} ms | "
+                  f"P99 {self.latency.percentile(99) * 1000:.1f} ms | "
+                  f"最大 {self.latency.max_value * 1000:.1f} ms")
         print("=" * 60)
 
+    def to_dict(self) -> Dict:
+        """序列化（用于分布式模式下回传给协调者）"""
+        return {
+            'total_transactions': self.total_transactions,
+            'successful_transactions': self.successful_transactions,
+            'failed_transactions': self.failed_transactions,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'latency': self.latency.to_dict(),
+            'start_block': self.start_block,
+            'end_block': self.end_block,
+            'submit_end_time': self.submit_end_time,
+            'timeline': self.timeline,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TransactionStats':
+        return cls(
+            total_transactions=data['total_transactions'],
+            successful_transactions=data['successful_transactions'],
+            failed_transactions=data['failed_transactions'],
+            start_time=data['start_time'],
+            end_time=data['end_time'],
+            latency=LatencyHistogram.from_dict(data['latency']),
+            start_block=data.get('start_block', 0),
+            end_block=data.get('end_block', 0),
+            submit_end_time=data.get('submit_end_time', 0),
+            timeline=list(data.get('timeline', [])),
+        )
+
+    def merge(self, other: 'TransactionStats'):
+        """
+        合并另一份统计
+
+        时间窗口取所有参与方的并集（最早开始到最晚结束），
+        因此合并后的 TPS 是整个集群的总吞吐
+        """
+        self.total_transactions += other.total_transactions
+        self.successful_transactions += other.successful_transactions
+        self.failed_transactions += other.failed_transactions
+        
+        # 按绝对时间对齐后逐秒相加
+        if other.start_time:
+            base = min(self.start_time, other.start_time) if self.start_time else other.start_time
+            ours = [0] * int(round(self.start_time - base)) + self.timeline if self.start_time else []
+            theirs = [0] * int(round(other.start_time - base)) + other.timeline
+            if len(ours) < len(theirs):
+                ours, theirs = theirs, ours
+            self.timeline = [a + b for a, b in itertools.zip_longest(ours, theirs, fillvalue=0)]
+            self.start_time = base
+        self.submit_end_time = max(self.submit_end_time, other.submit_end_time)
+        self.end_time = max(self.end_time, other.end_time)
+        self.latency.merge(other.latency)
+        if other.start_block and (not self.start_block or other.start_block < self.start_block):
+            self.start_block = other.start_block
+        self.end_block = max(self.end_block, other.end_block)
+
+
+def rpc_batch(rpc_url: str, calls: List[Tuple[str, list]], timeout: float = 30) -> List:
+    """
+    发送一个 JSON-RPC 批量请求
+
+    calls 为 (method, params) 列表，按请求顺序返回各自的 result（出错的请求返回 None）
+    """
+    payload = [
+        {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    req = urllib.request.Request(
+        rpc_url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        replies = json.loads(resp.read())
+    if isinstance(replies, dict):
+        # 节点拒绝了整个批量请求（例如超过 --rpc.batch-request-limit）
+        raise Exception(replies.get('error', {}).get('message', '批量请求失败'))
+    results = [None] * len(calls)
+    for reply in replies:
+        results[reply['id']] = reply.get('result')
+    return results
+
+
+# 交易轨迹文件格式（小端）：
+#   文件头: 魔数 8 字节 | 版本 u16 | 链 ID u64 | 交易数 u64
+#   每笔交易: 发送时刻（微秒，相对开始）u64 | 路由键 u32 | 长度 u32 | 已签名的原始交易
+TRACE_MAGIC = b'TPSTRACE'
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct('<8sHQQ')
+TRACE_RECORD = struct.Struct('<QII')
+
+
+def raw_transaction(signed_tx) -> bytes:
+    """已签名交易的原始字节（兼容 eth-account 新旧版本的属性名）"""
+    raw = getattr(signed_tx, 'raw_transaction', None)
+    if raw is None:
+        raw = signed_tx.rawTransaction
+    return bytes(raw)
+
+
+def trace_key(address: str) -> int:
+    """交易的路由键：同一发送方的交易回放时总是发往同一个节点，保持 nonce 顺序"""
+    return int(address[-8:], 16)
+
+
+class TraceWriter:
+    """交易轨迹写入器（线程安全，关闭时回填交易数）"""
+    
+    def __init__(self, path: str, chain_id: int):
+        self.path = path
+        self.chain_id = chain_id
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb', buffering=1 << 20)
+        self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, chain_id, 0))
+    
+    def write(self, offset: float, key: int, raw_tx: bytes):
+        record = TRACE_RECORD.pack(max(0, int(offset * 1_000_000)), key, len(raw_tx)) + raw_tx
+        with self._lock:
+            self._file.write(record)
+            self.count += 1
+    
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.seek(0)
+            self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.chain_id, self.count))
+            self._file.close()
+    
+    def __enter__(self) -> 'TraceWriter':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """交易轨迹读取器（内存映射，逐条解析，不把整个文件读入内存）"""
+    
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.chain_id, self.count = TRACE_HEADER.unpack_from(self._mm, 0)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise Exception(f"{path} 不是有效的交易轨迹文件")
+    
+    def __iter__(self) -> Iterator[Tuple[float, int, bytes]]:
+        """依次返回 (发送时刻秒数, 路由键, 原始交易)"""
+        pos = TRACE_HEADER.size
+        size = len(self._mm)
+        while pos + TRACE_RECORD.size <= size:
+            offset_us, key, length = TRACE_RECORD.unpack_from(self._mm, pos)
+            pos += TRACE_RECORD.size
+            yield offset_us / 1_000_000, key, self._mm[pos:pos + length]
+            pos += length
+    
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class SyntheticTrace:
+    """
+    由账号种子边签名边产生的合成轨迹（与 TraceReader 接口相同，不落盘）
+
+    按访问模式和链上当前 nonce 依次签名 duration * rate 笔交易，发送时刻均匀分布。
+    签名在后台线程中提前进行，回放循环等待下一个时间片时签名仍在继续。
+    只接受由种子派生的账号：相同的种子、nonce 和参数总是产生完全相同的交易流
+    """
+    
+    def __init__(self, tps_test: 'TPSTest', duration: float, rate: float, prefetch: int = 10000):
+        if not tps_test.account_seed:
+            raise Exception("合成轨迹需要由种子派生的账号（--account-seed），否则每次运行的交易流不同")
+        self.tps_test = tps_test
+        self.chain_id = tps_test.chain_id
+        self.rate = rate
+        self.count = int(duration * rate)
+        self.prefetch = prefetch
+        self.senders, self.receivers = tps_test._split_accounts()
+        config = tps_test.config
+        self.pattern = AccessPattern(config.access_pattern, len(self.senders), len(self.receivers),
+                                     zipf_s=config.zipf_s, hot_receivers=config.hot_receivers)
+        self.nonces = tps_test._fetch_nonces(self.senders, self.pattern.active_senders())
+        self._closed = threading.Event()
+    
+    def describe(self) -> str:
+        return self.pattern.describe()
+    
+    def _generate(self) -> Iterator[Tuple[float, int, bytes]]:
+        w3 = self.tps_test.w3
+        for i in range(self.count):
+            sender_idx = self.pattern.sender(i)
+            sender = self.senders[sender_idx]
+            receiver = self.receivers[self.pattern.receiver(i)]
+            tx = self.tps_test._build_transfer(sender, receiver, self.nonces[sender_idx])
+            self.nonces[sender_idx] += 1
+            signed_tx = w3.eth.account.sign_transaction(tx, sender.key)
+            yield i / self.rate, trace_key(sender.address), raw_transaction(signed_tx)
+    
+    def __iter__(self) -> Iterator[Tuple[float, int, bytes]]:
+        """依次返回 (发送时刻秒数, 路由键, 原始交易)"""
+        buffer = queue.Queue(maxsize=self.prefetch)
+        
+        def put(item) -> bool:
+            while not self._closed.is_set():
+                try:
+                    buffer.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for record in self._generate():
+                    if not put(record):
+                        return
+            except Exception as e:
+                # 签名或查询失败时把异常交给消费方，否则提前结束会被当作正常结束
+                put(e)
+                return
+            put(None)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            record = buffer.get()
+            if record is None:
+                return
+            if isinstance(record, Exception):
+                raise Exception(f"合成轨迹在生成过程中失败: {record}") from record
+            yield record
+    
+    def close(self):
+        self._closed.set()
+
+
+class TraceReplayer:
+    """
+    交易轨迹回放器
+
+    按记录的发送时刻（除以 speed 缩放，speed 为 0 时尽快发送）把交易分发到多个节点，
+    同一路由键的交易固定发往同一节点；同一时间片内发往同一节点的交易合并为一个
+    eth_sendRawTransaction 批量请求。source 为轨迹文件路径，或 SyntheticTrace 等同接口的对象
+    """
+    
+    def __init__(self, source, endpoints: List[str], speed: float = 1.0,
+                 concurrency: int = 16, batch_size: int = 100, tick: float = 0.01):
+        self.reader = TraceReader(source) if isinstance(source, str) else source
+        self.endpoints = endpoints
+        self.speed = speed
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.tick = tick
+        self.stats = TransactionStats()
+    
+    def _send_batch(self, endpoint: str, raw_txs: List[str]) -> Tuple[int, int]:
+        """发送一批交易，返回 (成功数, 失败数)"""
+        started = time.time()
+        try:
+            results = rpc_batch(endpoint, [('eth_sendRawTransaction', [raw]) for raw in raw_txs])
+        except Exception:
+            return 0, len(raw_txs)
+        finished = time.time()
+        ok = sum(1 for r in results if r)
+        for _ in range(ok):
+            self.stats.record_submit(finished, finished - started)
+        return ok, len(raw_txs) - ok
+    
+    def run(self) -> TransactionStats:
+        chain_id = int(rpc_batch(self.endpoints[0], [('eth_chainId', [])])[0], 16)
+        if chain_id != self.reader.chain_id:
+            raise Exception(f"轨迹的链 ID ({self.reader.chain_id}) 与节点 ({chain_id}) 不一致")
+        speed_desc = '尽快发送' if self.speed <= 0 else f"{self.speed:g} 倍速"
+        print(f"\n回放交易轨迹: {self.reader.count} 笔交易，{len(self.endpoints)} 个节点，{speed_desc}")
+        
+        self.stats.start_time = time.time()
+        self.stats.start_block = int(rpc_batch(self.endpoints[0], [('eth_blockNumber', [])])[0], 16)
+        batches: Dict[int, List[str]] = collections.defaultdict(list)
+        futures = []
+        
+        def flush(executor, index: int):
+            futures.append(executor.submit(self._send_batch, self.endpoints[index], batches.pop(index)))
+        
+        def collect(limit: int):
+            while len(futures) > limit:
+                ok, failed = futures.pop(0).result()
+                self.stats.successful_transactions += ok
+                self.stats.failed_transactions += failed
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for offset, key, raw in self.reader:
+                if self.speed > 0:
+                    due = self.stats.start_time + offset / self.speed
+                    if due - time.time() > self.tick:
+                        # 到达下一个时间片前先发出已积累的交易
+                        for index in list(batches):
+                            flush(executor, index)
+                        time.sleep(max(0.0, due - time.time()))
+                index = key % len(self.endpoints)
+                batches[index].append('0x' + raw.hex())
+                self.stats.total_transactions += 1
+                if len(batches[index]) >= self.batch_size:
+                    flush(executor, index)
+                collect(self.concurrency * 4)
+                if self.stats.total_transactions % 10000 == 0:
+                    elapsed = time.time() - self.stats.start_time
+                    print(f"  已回放 {self.stats.total_transactions}/{self.reader.count} 笔 | "
+                          f"{self.stats.total_transactions / elapsed:.0f} 交易/秒")
+            for index in list(batches):
+                flush(executor, index)
+            self.stats.submit_end_time = time.time()
+            collect(0)
+        
+        self.stats.end_time = time.time()
+        self.stats.end_block = int(rpc_batch(self.endpoints[0], [('eth_blockNumber', [])])[0], 16)
+        self.reader.close()
+        self.stats.display()
+        return self.stats
+
+
+class FeeEngine:
+    """
+    EIP-1559 动态费用引擎
+
+    后台线程轮询最新区块的 baseFeePerGas，发送路径只读取缓存的报价，不发起 RPC。
+    baseFee 按每块最大变化比例（12.5%）划分为几何档位，maxFeePerGas = 档位上限 × headroom + 小费；
+    只有 baseFee 越过档位上限时才升档，下降超过一档才降档，因此报价在大多数区块之间保持不变
+    """
+    
+    BAND_STEP = 1.125  # 每块 baseFee 的最大变化比例
+    MIN_BAND_FEE = 10 ** 9  # 低于 1 Gwei 的 baseFee 按 1 Gwei 定档，避免空闲链上每个 wei 都换档
+    
+    def __init__(self, rpc_url: str, priority_fee_wei: int, headroom: float = 2.0,
+                 interval: float = 0.5):
+        if headroom < 1:
+            raise Exception(f"费用余量倍数不能小于 1: {headroom}")
+        self.rpc_url = rpc_url
+        self.priority_fee_wei = priority_fee_wei
+        self.headroom = headroom
+        self.interval = interval
+        
+        self.base_fee = 0
+        self.peak_base_fee = 0
+        self.band: Optional[int] = None
+        self.band_changes = 0
+        self._quote: Dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def _band_of(cls, base_fee: int) -> int:
+        return math.ceil(math.log(max(base_fee, cls.MIN_BAND_FEE), cls.BAND_STEP))
+    
+    @classmethod
+    def _band_ceiling(cls, band: int) -> int:
+        return math.ceil(cls.BAND_STEP ** band)
+    
+    def refresh(self) -> bool:
+        """读取最新区块的 baseFee，返回报价是否换档"""
+        block = rpc_batch(self.rpc_url, [('eth_getBlockByNumber', ['latest', False])])[0]
+        if not block or 'baseFeePerGas' not in block:
+            raise Exception("节点未启用 London（区块缺少 baseFeePerGas），无法使用动态费用")
+        base_fee = int(block['baseFeePerGas'], 16)
+        band = self._band_of(base_fee)
+        with self._lock:
+            self.base_fee = base_fee
+            self.peak_base_fee = max(self.peak_base_fee, base_fee)
+            if self.band is not None and self.band - 1 <= band <= self.band:
+                return False
+            if self.band is not None:
+                self.band_changes += 1
+            self.band = band
+            max_fee = int(self._band_ceiling(band) * self.headroom) + self.priority_fee_wei
+            # 新字典整体替换，发送线程拿到的旧报价不会被修改
+            self._quote = {
+                'type': 2,
+                'maxFeePerGas': max_fee,
+                'maxPriorityFeePerGas': self.priority_fee_wei,
+            }
+            return True
+    
+    def quote(self) -> Dict:
+        """当前的费用字段（首次调用时同步读取一次 baseFee）"""
+        if self.band is None:
+            self.refresh()
+        return self._quote
+    
+    def max_fee_per_gas(self) -> int:
+        return self.quote()['maxFeePerGas']
+    
+    def start(self):
+        self.quote()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.refresh():
+                    print(f"  费用档位调整: baseFee {self.base_fee / 1e9:.3f} Gwei → "
+                          f"maxFeePerGas {self._quote['maxFeePerGas'] / 1e9:.3f} Gwei")
+            except Exception:
+                # 查询失败时沿用上一次的报价
+                pass
+    
+    def to_dict(self) -> Dict:
+        return {
+            'base_fee_wei': self.base_fee,
+            'peak_base_fee_wei': self.peak_base_fee,
+            'max_fee_per_gas_wei': self._quote.get('maxFeePerGas', 0),
+            'max_priority_fee_per_gas_wei': self.priority_fee_wei,
+            'band_changes': self.band_changes,
+        }
+    
+    def display(self):
+        print(f"动态费用: baseFee {self.base_fee / 1e9:.3f} Gwei（峰值 {self.peak_base_fee / 1e9:.3f} Gwei）| "
+              f"maxFeePerGas {self._quote.get('maxFeePerGas', 0) / 1e9:.3f} Gwei | "
+              f"小费 {self.priority_fee_wei / 1e9:g} Gwei | 换档 {self.band_changes} 次")
+
 
 class TPSTest:
     """TPS 性能测试类"""
     
     def __init__(self, config: TestConfig):
         self.config = config
-        self.w3 = self._init_web3()
-        self.producer_account = Account.from_key(config.producer_private_key)
+        self.w3 = self._init_web3(config.rpc_url)
+        self.chain_id = self.w3.eth.chain_id
+        # 发送交易使用的节点池（第一个为主节点）
+        self.w3_pool: List[Web3] = [self.w3] + [
+            self._init_web3(url) for url in config.rpc_urls if url != config.rpc_url
+        ]
+        self.producer_account = (
+            Account.from_key(config.producer_private_key) if config.producer_private_key else None
+        )
         self.sub_accounts: List[Account] = []
         self.stats = TransactionStats()
+        # 派生子账号使用的种子（由账号文件加载或新建账号时为 None）
+        self.account_seed: Optional[str] = None
+        # 可选的传播延迟探针（抽样已提交的交易）
+        self.probe: Optional['PropagationProbe'] = None
+        # 设置后施压循环提前结束（供场景测试在后台线程中施压时使用）
+        self.stop_requested = threading.Event()
+        # 可选的交易轨迹记录器（记录已签名的原始交易及发送时刻）
+        self.recorder: Optional['TraceWriter'] = None
+        # 可选的回执审计器（后台抽样检查交易的执行状态）
+        self.auditor: Optional['ReceiptAuditor'] = None
+        # 动态费用模式下的 baseFee 跟踪器（施压期间在后台轮询）
+        self.fee_engine: Optional[FeeEngine] = None
+        if config.dynamic_fee:
+            self.fee_engine = FeeEngine(config.rpc_url, self.w3.to_wei(config.priority_fee_gwei, 'gwei'),
+                                        headroom=config.fee_headroom)
         
-    def _init_web3(self) -> Web3:
+    def _init_web3(self, rpc_url: str) -> Web3:
         """初始化 Web3 连接"""
-        print(f"连接到以太坊节点: {self.config.rpc_url}")
-        w3 = Web3(Web3.HTTPProvider(self.config.rpc_url))
+        print(f"连接到以太坊节点: {rpc_url}")
+        w3 = Web3(Web3.HTTPProvider(rpc_url))
         
         # 添加 PoA 中间件
         w3.middleware_onion.inject(geth_poa_middleware, layer=0)
@@ -166,6 +947,25 @@ class TPSTest:
             print(f"  加载失败: {e}")
             return False
     
+    def derive_accounts(self, seed: str, start: int = 0, end: Optional[int] = None):
+        """
+        由种子派生子账号
+
+        与 generate_network.py 在 genesis 中预置的测试账号（test_accounts.seed）一致，
+        无需账号文件和链上分配。分布式模式下每个工作者只派生自己的区间
+        """
+        end = self.config.num_accounts if end is None else end
+        print(f"\n由种子派生子账号 [{start}, {end})...")
+        self.account_seed = seed
+        
+        self.sub_accounts = []
+        for i in range(start, end):
+            self.sub_accounts.append(Account.from_key(derive_test_account_key(seed, i)))
+            if (i + 1 - start) % 10000 == 0:
+                print(f"  已派生 {i + 1 - start} 个账号...")
+        
+        print(f"✓ 成功派生 {len(self.sub_accounts)} 个账号")
+    
     def distribute_balance(self):
         """从 producer 账号分配余额到所有子账号"""
         print("\n开始分配余额...")
@@ -178,7 +978,8 @@ class TPSTest:
         # 计算需要的总金额
         distribution_amount_wei = self.w3.to_wei(self.config.distribution_amount, 'ether')
         total_needed = distribution_amount_wei * self.config.num_accounts
-        gas_price = self.w3.to_wei(self.config.gas_price_gwei, 'gwei')
+        fee_fields = self._fee_fields()
+        gas_price = fee_fields.get('maxFeePerGas', fee_fields.get('gasPrice'))
         total_gas_cost = gas_price * self.config.gas_limit * self.config.num_accounts
         total_needed_with_gas = total_needed + total_gas_cost
         
@@ -215,13 +1016,13 @@ class TPSTest:
                         'to': account.address,
                         'value': distribution_amount_wei,
                         'gas': self.config.gas_limit,
-                        'gasPrice': gas_price,
+                        **fee_fields,
                         'nonce': nonce,
-                        'chainId': self.w3.eth.chain_id
+                        'chainId': self.chain_id
                     }
                     
                     signed_tx = self.w3.eth.account.sign_transaction(tx, self.producer_account.key)
-                    tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                    tx_hash = self.w3.eth.send_raw_transaction(raw_transaction(signed_tx))
                     tx_hashes.append(tx_hash)
                     nonce += 1
                     
@@ -263,7 +1064,7 @@ class TPSTest:
         
         ready_count = 0
         empty_count = 0
-        min_balance = self.w3.to_wei(self.config.transfer_amount, 'ether') * 10  # 至少能发送10笔交易
+        min_balance = self._tx_cost_wei() * 10  # 至少能发送10笔交易（含 gas）
         
         for i, account in enumerate(self.sub_accounts):
             balance = self.w3.eth.get_balance(account.address)
@@ -281,6 +1082,47 @@ class TPSTest:
         
         return ready_count, empty_count
     
+    def _fee_fields(self) -> Dict:
+        """交易的费用字段：动态费用模式取费用引擎的缓存报价，否则为固定的 gasPrice"""
+        if self.fee_engine is not None:
+            return self.fee_engine.quote()
+        return {'gasPrice': self.w3.to_wei(self.config.gas_price_gwei, 'gwei')}
+    
+    def _tx_cost_wei(self) -> int:
+        """单笔测试交易的最大花费（转账金额 + gas 上限 × gas 价格）"""
+        transfer_amount_wei = self.w3.to_wei(self.config.transfer_amount, 'ether')
+        fee_fields = self._fee_fields()
+        # 节点按 maxFeePerGas 检查余额，而不是实际支付的价格
+        gas_price = fee_fields.get('maxFeePerGas', fee_fields.get('gasPrice'))
+        return transfer_amount_wei + self.config.gas_limit * gas_price
+    
+    def _create_rebalancer(self, senders: List[Account], receivers: List[Account],
+                           pattern: AccessPattern, sender_nonces: List[int]) -> Optional['BalanceRebalancer']:
+        """按配置创建余额补充器（未启用时返回 None）"""
+        if not self.config.rebalance:
+            return None
+        # 未单独指定储备账号时使用 producer 账号
+        reserve_key = self.config.reserve_private_key or self.config.producer_private_key
+        reserve = Account.from_key(reserve_key) if reserve_key else None
+        topup_amount = self.w3.to_wei(self.config.topup_amount or self.config.distribution_amount, 'ether')
+        rebalancer = BalanceRebalancer(self, senders, receivers, pattern, sender_nonces,
+                                       reserve=reserve, topup_amount_wei=topup_amount,
+                                       lead_seconds=self.config.rebalance_lead)
+        rebalancer.prepare()
+        return rebalancer
+    
+    def _build_transfer(self, sender: Account, receiver: Account, nonce: int) -> Dict:
+        """构造一笔测试转账（未签名）"""
+        return {
+            'from': sender.address,
+            'to': receiver.address,
+            'value': self.w3.to_wei(self.config.transfer_amount, 'ether'),
+            'gas': self.config.gas_limit,
+            **self._fee_fields(),
+            'nonce': nonce,
+            'chainId': self.chain_id
+        }
+    
     def _send_transaction(self, sender: Account, receiver: Account, nonce: int) -> bool:
         """
         发送单笔交易（不等待确认）
@@ -288,21 +1130,22 @@ class TPSTest:
         注意：返回 True 表示交易成功提交到交易池，不代表交易已被确认
         """
         try:
-            transfer_amount_wei = self.w3.to_wei(self.config.transfer_amount, 'ether')
-            gas_price = self.w3.to_wei(self.config.gas_price_gwei, 'gwei')
-            
-            tx = {
-                'from': sender.address,
-                'to': receiver.address,
-                'value': transfer_amount_wei,
-                'gas': self.config.gas_limit,
-                'gasPrice': gas_price,
-                'nonce': nonce,
-                'chainId': self.w3.eth.chain_id
-            }
+            # 同一发送方固定走同一个节点，避免 nonce 在节点间乱序
+            w3 = self.w3_pool[hash(sender.address) % len(self.w3_pool)]
             
-            signed_tx = self.w3.eth.account.sign_transaction(tx, sender.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx = self._build_transfer(sender, receiver, nonce)
+            signed_tx = w3.eth.account.sign_transaction(tx, sender.key)
+            submit_start = time.time()
+            tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed_tx))
+            finished_at = time.time()
+            self.stats.record_submit(finished_at, finished_at - submit_start)
+            if self.probe is not None:
+                self.probe.submitted(Web3.to_hex(tx_hash), submit_start)
+            if self.auditor is not None:
+                self.auditor.submitted(Web3.to_hex(tx_hash), sender.address, self.config.access_pattern)
+            if self.recorder is not None:
+                self.recorder.write(submit_start - self.stats.start_time, trace_key(sender.address),
+                                    raw_transaction(signed_tx))
             
             return True
             
@@ -312,6 +1155,30 @@ class TPSTest:
             # 失败会在统计中反映，无需详细日志
             return False
     
+    def generate_trace(self, path: str, duration: float, rate: float):
+        """
+        离线生成交易轨迹文件（不发送）
+
+        按访问模式和链上当前 nonce 预先签名 duration * rate 笔交易，发送时刻均匀分布。
+        签名是确定性的，相同的账号种子、nonce 和参数会生成完全相同的轨迹（需要 --account-seed）
+        """
+        source = SyntheticTrace(self, duration, rate)
+        total = source.count
+        print(f"\n生成交易轨迹: {path}（{duration:g} 秒 × {rate:g} 交易/秒，{source.describe()}）")
+        try:
+            with TraceWriter(path, self.chain_id) as writer:
+                for i, (offset, key, raw) in enumerate(source):
+                    writer.write(offset, key, raw)
+                    if (i + 1) % 10000 == 0:
+                        print(f"  已生成 {i + 1}/{total} 笔交易...")
+        except BaseException:
+            # 不完整的轨迹文件头部仍然有效，保留下来会被当作完整的轨迹回放
+            source.close()
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        print(f"✓ 已生成 {total} 笔交易（{os.path.getsize(path) / 1024 / 1024:.1f} MB）")
+    
     async def send_transaction_async(self, sender: Account, receiver: Account, nonce: int) -> bool:
         """
         异步发送单笔交易
@@ -326,27 +1193,73 @@ class TPSTest:
         """同步发送单笔交易（包装器）"""
         return self._send_transaction(sender, receiver, nonce)
     
-    def run_test_threaded(self, duration_seconds: int = 60):
+    def _split_accounts(self) -> Tuple[List[Account], List[Account]]:
+        """按配置划分发送方和接收方（默认前一半发送、后一半接收）"""
+        total = len(self.sub_accounts)
+        num_senders = self.config.num_senders or total // 2
+        num_receivers = self.config.num_receivers or total - num_senders
+        if num_senders + num_receivers > total:
+            raise Exception(f"发送方 ({num_senders}) + 接收方 ({num_receivers}) 超过账号总数 ({total})")
+        return self.sub_accounts[:num_senders], self.sub_accounts[num_senders:num_senders + num_receivers]
+    
+    def _fetch_nonces(self, senders: List[Account], indices: List[int], batch_size: int = 500) -> List[int]:
+        """批量并发获取发送方的 nonce，返回按发送方下标索引的列表"""
+        nonces = [0] * len(senders)
+        batches = [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+        
+        def fetch(batch: List[int]) -> List:
+            calls = [('eth_getTransactionCount', [senders[j].address, 'latest']) for j in batch]
+            return rpc_batch(self.config.rpc_url, calls)
+        
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for batch, counts in zip(batches, executor.map(fetch, batches)):
+                for j, count in zip(batch, counts):
+                    if count is None:
+                        raise Exception(f"获取 nonce 失败: {senders[j].address}")
+                    nonces[j] = int(count, 16)
+                fetched += len(batch)
+                if fetched % 10000 < batch_size or fetched == len(indices):
+                    print(f"  已获取 {fetched}/{len(indices)} 个账号的 nonce...")
+        return nonces
+    
+    def _wait_until(self, start_at: Optional[float]):
+        """等待到指定的绝对时间（用于多个工作者同步开始）"""
+        if not start_at:
+            return
+        delay = start_at - time.time()
+        if delay > 0:
+            print(f"\n等待统一开始时间（{delay:.2f} 秒后）...")
+            time.sleep(delay)
+    
+    def run_test_threaded(self, duration_seconds: int = 60, start_at: Optional[float] = None):
         """使用多线程运行 TPS 测试"""
         print(f"\n开始 TPS 测试（多线程模式，持续 {duration_seconds} 秒）...")
         print(f"并发数: {self.config.concurrency}")
         print(f"转账金额: {self.config.transfer_amount} ETH")
         
-        # 分组：前 1000 个作为发送方，后 1000 个作为接收方
-        senders = self.sub_accounts[:1000]
-        receivers = self.sub_accounts[1000:]
+        # 划分发送方和接收方，构建访问模式
+        senders, receivers = self._split_accounts()
+        pattern = AccessPattern(self.config.access_pattern, len(senders), len(receivers),
+                                zipf_s=self.config.zipf_s, hot_receivers=self.config.hot_receivers)
+        print(f"访问模式: {pattern.describe()}")
         
         # 获取每个发送方的初始 nonce
-        sender_nonces = {}
         print("\n获取发送方账号 nonce...")
-        for i, sender in enumerate(senders):
-            sender_nonces[sender.address] = self.w3.eth.get_transaction_count(sender.address)
-            if (i + 1) % 200 == 0:
-                print(f"  已获取 {i + 1}/1000 个账号的 nonce...")
+        sender_nonces = self._fetch_nonces(senders, pattern.active_senders())
+        rebalancer = self._create_rebalancer(senders, receivers, pattern, sender_nonces)
+        
+        # 分布式模式下等待统一的开始时间
+        self._wait_until(start_at)
         
         # 初始化统计
-        self.stats = TransactionStats()
+        self.stats = TransactionStats(warmup=self.config.warmup, cooldown=self.config.cooldown)
         self.stats.start_time = time.time()
+        self.stats.start_block = self.w3.eth.block_number
+        if rebalancer is not None:
+            rebalancer.start()
+        if self.fee_engine is not None:
+            self.fee_engine.start()
         
         # 使用线程池发送交易
         with ThreadPoolExecutor(max_workers=self.config.concurrency) as executor:
@@ -357,14 +1270,19 @@ class TPSTest:
             print("\n开始发送交易...\n")
             
             # 持续提交任务直到时间结束
-            while time.time() < test_end_time:
+            while time.time() < test_end_time and not self.stop_requested.is_set():
+                # 应用余额补充器排队的发送方/接收方轮换
+                if rebalancer is not None and rebalancer.pending_swaps:
+                    rebalancer.apply_swaps()
+                
                 # 选择发送方和接收方
-                sender = senders[current_sender_idx % len(senders)]
-                receiver = receivers[current_sender_idx % len(receivers)]
+                sender_idx = pattern.sender(current_sender_idx)
+                sender = senders[sender_idx]
+                receiver = receivers[pattern.receiver(current_sender_idx)]
                 
                 # 获取并增加 nonce
-                nonce = sender_nonces[sender.address]
-                sender_nonces[sender.address] += 1
+                nonce = sender_nonces[sender_idx]
+                sender_nonces[sender_idx] += 1
                 
                 # 提交任务
                 future = executor.submit(self.send_transaction_sync, sender, receiver, nonce)
@@ -391,6 +1309,7 @@ class TPSTest:
                             self.stats.failed_transactions += 1
             
             # 等待所有剩余任务完成
+            self.stats.submit_end_time = time.time()
             print("\n等待剩余交易完成...")
             for future in as_completed(futures):
                 try:
@@ -402,9 +1321,16 @@ class TPSTest:
                     self.stats.failed_transactions += 1
         
         self.stats.end_time = time.time()
+        self.stats.end_block = self.w3.eth.block_number
+        if rebalancer is not None:
+            rebalancer.stop()
+        if self.fee_engine is not None:
+            self.fee_engine.stop()
         
         # 显示统计结果
         self.stats.display()
+        if self.fee_engine is not None:
+            self.fee_engine.display()
     
     def _wait_for_some_futures(self, futures, count):
         """等待部分 futures 完成"""
@@ -419,27 +1345,34 @@ class TPSTest:
         
         return done, pending
     
-    async def run_test_async(self, duration_seconds: int = 60):
+    async def run_test_async(self, duration_seconds: int = 60, start_at: Optional[float] = None):
         """使用异步方式运行 TPS 测试"""
         print(f"\n开始 TPS 测试（异步模式，持续 {duration_seconds} 秒）...")
         print(f"并发数: {self.config.concurrency}")
         print(f"转账金额: {self.config.transfer_amount} ETH")
         
-        # 分组：前 1000 个作为发送方，后 1000 个作为接收方
-        senders = self.sub_accounts[:1000]
-        receivers = self.sub_accounts[1000:]
+        # 划分发送方和接收方，构建访问模式
+        senders, receivers = self._split_accounts()
+        pattern = AccessPattern(self.config.access_pattern, len(senders), len(receivers),
+                                zipf_s=self.config.zipf_s, hot_receivers=self.config.hot_receivers)
+        print(f"访问模式: {pattern.describe()}")
         
         # 获取每个发送方的初始 nonce
-        sender_nonces = {}
         print("\n获取发送方账号 nonce...")
-        for i, sender in enumerate(senders):
-            sender_nonces[sender.address] = self.w3.eth.get_transaction_count(sender.address)
-            if (i + 1) % 200 == 0:
-                print(f"  已获取 {i + 1}/1000 个账号的 nonce...")
+        sender_nonces = self._fetch_nonces(senders, pattern.active_senders())
+        rebalancer = self._create_rebalancer(senders, receivers, pattern, sender_nonces)
+        
+        # 分布式模式下等待统一的开始时间
+        self._wait_until(start_at)
         
         # 初始化统计
-        self.stats = TransactionStats()
+        self.stats = TransactionStats(warmup=self.config.warmup, cooldown=self.config.cooldown)
         self.stats.start_time = time.time()
+        self.stats.start_block = self.w3.eth.block_number
+        if rebalancer is not None:
+            rebalancer.start()
+        if self.fee_engine is not None:
+            self.fee_engine.start()
         
         print("\n开始发送交易...\n")
         
@@ -448,14 +1381,19 @@ class TPSTest:
         tasks = []
         
         # 持续发送交易直到时间结束
-        while time.time() < test_end_time:
+        while time.time() < test_end_time and not self.stop_requested.is_set():
+            # 应用余额补充器排队的发送方/接收方轮换
+            if rebalancer is not None and rebalancer.pending_swaps:
+                rebalancer.apply_swaps()
+            
             # 选择发送方和接收方
-            sender = senders[current_sender_idx % len(senders)]
-            receiver = receivers[current_sender_idx % len(receivers)]
+            sender_idx = pattern.sender(current_sender_idx)
+            sender = senders[sender_idx]
+            receiver = receivers[pattern.receiver(current_sender_idx)]
             
             # 获取并增加 nonce
-            nonce = sender_nonces[sender.address]
-            sender_nonces[sender.address] += 1
+            nonce = sender_nonces[sender_idx]
+            sender_nonces[sender_idx] += 1
             
             # 创建任务
             task = asyncio.create_task(self.send_transaction_async(sender, receiver, nonce))
@@ -485,6 +1423,7 @@ class TPSTest:
             await asyncio.sleep(0.001)
         
         # 等待所有剩余任务完成
+        self.stats.submit_end_time = time.time()
         print("\n等待剩余交易完成...")
         results = await asyncio.gather(*tasks, return_exceptions=True)
         for result in results:
@@ -494,9 +1433,16 @@ class TPSTest:
                 self.stats.failed_transactions += 1
         
         self.stats.end_time = time.time()
+        self.stats.end_block = self.w3.eth.block_number
+        if rebalancer is not None:
+            rebalancer.stop()
+        if self.fee_engine is not None:
+            self.fee_engine.stop()
         
         # 显示统计结果
         self.stats.display()
+        if self.fee_engine is not None:
+            self.fee_engine.display()
     
     async def _wait_for_some_tasks(self, tasks, count):
         """等待部分任务完成"""
@@ -510,6 +1456,1640 @@ class TPSTest:
         return list(done), list(pending)
 
 
+class BalanceRebalancer:
+    """
+    测试期间的后台余额补充器
+
+    不对每笔交易查询余额，而是根据发送方已提交的交易数（nonce 增量）
+    推算剩余余额：初始余额 + 已补充金额 - 已提交数 × 单笔最大花费。
+    当剩余余额不足以支撑接下来 lead_seconds 秒的消耗时：
+    - 配置了储备账号：从储备账号向该发送方转账补充
+    - 未配置储备账号：把余额最多的接收方轮换为发送方，耗尽的发送方改为接收方
+    """
+    MIN_TXS = 20  # 至少保留的交易笔数
+    
+    def __init__(self, tps_test: 'TPSTest', senders: List[Account], receivers: List[Account],
+                 pattern: AccessPattern, sender_nonces: List[int], reserve: Optional[Account] = None,
+                 topup_amount_wei: int = 0, lead_seconds: float = 30.0, interval: float = 2.0):
+        self.tps_test = tps_test
+        self.w3 = tps_test.w3
+        self.senders = senders
+        self.receivers = receivers
+        self.sender_nonces = sender_nonces
+        self.active = pattern.active_senders()
+        # 分布式模式下所有工作者共用同一组接收方，按分片划分可轮换的接收方，避免两个工作者轮换同一个账号
+        shard, shards = tps_test.config.receiver_shard
+        self.receiver_slots = [r for r in pattern.active_receivers() if r % shards == shard]
+        self.reserve = reserve
+        self.topup_amount_wei = topup_amount_wei
+        self.lead_seconds = lead_seconds
+        self.interval = interval
+        self.tx_cost = tps_test._tx_cost_wei()
+        
+        # 以下列表按发送方下标索引
+        self.base_nonces = list(sender_nonces)
+        self.budget = [0] * len(senders)  # 初始余额 + 已补充金额
+        self._last_sent = [0] * len(senders)
+        self._swapping = set()  # 已排队等待轮换的发送方下标
+        self.pending_swaps = collections.deque()  # (发送方下标, 接收方下标, nonce, 余额)
+        self.retired_nonces: Dict[int, int] = {}  # 接收方下标 -> 换下的发送方已分配到的下一个 nonce
+        
+        self.reserve_nonce = 0
+        self.topups = 0
+        self.rotations = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _fetch_balances(self, accounts: List[Account]) -> List[int]:
+        balances = []
+        for i in range(0, len(accounts), 500):
+            calls = [('eth_getBalance', [a.address, 'latest']) for a in accounts[i:i + 500]]
+            balances.extend(int(b, 16) if b else 0 for b in rpc_batch(self.tps_test.config.rpc_url, calls))
+        return balances
+    
+    def prepare(self):
+        """测试开始前获取一次发送方余额（之后只做推算）"""
+        print("\n初始化余额补充器...")
+        balances = self._fetch_balances([self.senders[i] for i in self.active])
+        for idx, balance in zip(self.active, balances):
+            self.budget[idx] = balance
+        if self.reserve:
+            self.reserve_nonce = self.w3.eth.get_transaction_count(self.reserve.address, 'pending')
+            print(f"  模式: 从储备账号 {self.reserve.address} 补充，每次 "
+                  f"{self.w3.from_wei(self.topup_amount_wei, 'ether')} ETH")
+        else:
+            print("  模式: 轮换接收方为发送方")
+        print(f"  提前量: {self.lead_seconds:.0f} 秒的消耗")
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        print(f"\n余额补充器: 补充 {self.topups} 次 | 轮换 {self.rotations} 次 | 失败 {self.failures} 次")
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._check()
+            except Exception as e:
+                self.failures += 1
+                print(f"  ⚠️  余额补充器出错: {e}")
+    
+    def _check(self):
+        """推算每个发送方的剩余余额，不足时补充或轮换"""
+        # 接收方余额每轮最多查询一次，本轮的所有轮换共用（接收方 -> 余额，已选中的移除）
+        receiver_balances: Optional[Dict[int, int]] = None
+        for idx in self.active:
+            if idx in self._swapping:
+                continue
+            sent = self.sender_nonces[idx] - self.base_nonces[idx]
+            rate = (sent - self._last_sent[idx]) / self.interval
+            self._last_sent[idx] = sent
+            remaining = self.budget[idx] - sent * self.tx_cost
+            needed = max(rate * self.lead_seconds, self.MIN_TXS) * self.tx_cost
+            if remaining >= needed:
+                continue
+            if self.reserve:
+                self._topup(idx)
+            else:
+                if receiver_balances is None:
+                    taken = {swap[1] for swap in self.pending_swaps}
+                    candidates = [r for r in self.receiver_slots if r not in taken]
+                    balances = self._fetch_balances([self.receivers[r] for r in candidates])
+                    receiver_balances = dict(zip(candidates, balances))
+                self._rotate(idx, needed, receiver_balances)
+    
+    def _topup(self, idx: int):
+        """从储备账号向发送方转账"""
+        tx = {
+            'from': self.reserve.address,
+            'to': self.senders[idx].address,
+            'value': self.topup_amount_wei,
+            'gas': self.tps_test.config.gas_limit,
+            **self.tps_test._fee_fields(),
+            'nonce': self.reserve_nonce,
+            'chainId': self.tps_test.chain_id,
+        }
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.reserve.key)
+        tx_hash = self.w3.eth.send_raw_transaction(raw_transaction(signed_tx))
+        if self.tps_test.auditor is not None:
+            self.tps_test.auditor.submitted(Web3.to_hex(tx_hash), self.reserve.address, 'topup')
+        self.reserve_nonce += 1
+        # 按提交即到账推算，避免在确认前重复补充
+        self.budget[idx] += self.topup_amount_wei
+        self.topups += 1
+    
+    def _rotate(self, idx: int, needed: int, balances: Dict[int, int]):
+        """选出余额最多的接收方，排队与耗尽的发送方互换（balances 为本轮查询的接收方余额）"""
+        if not balances:
+            return
+        ridx = max(balances, key=balances.__getitem__)
+        if balances[ridx] < needed * 2:
+            # 接收方余额也不够，轮换没有意义
+            self.failures += 1
+            return
+        balance = balances.pop(ridx)
+        # 之前被换下的发送方可能还有未打包或仍在发送途中的交易，'latest' 会给出已被占用的 nonce
+        nonce = max(self.w3.eth.get_transaction_count(self.receivers[ridx].address, 'pending'),
+                    self.retired_nonces.get(ridx, 0))
+        self._swapping.add(idx)
+        self.pending_swaps.append((idx, ridx, nonce, balance))
+    
+    def apply_swaps(self):
+        """在发送线程中应用排队的轮换（保证与 nonce 分配不冲突）"""
+        while self.pending_swaps:
+            idx, ridx, nonce, balance = self.pending_swaps.popleft()
+            self.retired_nonces[ridx] = self.sender_nonces[idx]
+            self.senders[idx], self.receivers[ridx] = self.receivers[ridx], self.senders[idx]
+            self.sender_nonces[idx] = nonce
+            self.base_nonces[idx] = nonce
+            self._last_sent[idx] = 0
+            self.budget[idx] = balance
+            self._swapping.discard(idx)
+            self.rotations += 1
+
+
+class BlockAnalyzer:
+    """
+    区块分析器
+
+    并发、批量拉取一段区块的头部信息（带本地缓存），统计：
+    每块交易数、gas 使用率、实际出块间隔与配置值的偏差、
+    in-turn / out-of-turn 出块分布、空块数量，并判断瓶颈所在
+    """
+    
+    # Clique 难度值：2 表示轮到的签名者出块，1 表示非轮值签名者出块
+    DIFF_IN_TURN = 2
+    # 距离链头不足这么多块的区块可能被 Clique 重组，不写入缓存
+    CACHE_CONFIRMATIONS = 6
+    
+    def __init__(self, rpc_url: str, cache_file: str = 'block_cache.json',
+                 batch_size: int = 100, concurrency: int = 8):
+        self.rpc_url = rpc_url
+        self.cache_file = cache_file
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        chain_id, genesis = rpc_batch(rpc_url, [('eth_chainId', []), ('eth_getBlockByNumber', ['0x0', False])])
+        self.chain_id = int(chain_id, 16)
+        # 重新生成的网络通常沿用相同的链 ID，缓存按链 ID + genesis 哈希区分
+        self.cache_key = f"{self.chain_id}:{genesis['hash']}"
+        self.cache: Dict[int, Dict] = self._load_cache()
+    
+    def _load_cache(self) -> Dict[int, Dict]:
+        """加载本地缓存（按链 ID 和 genesis 哈希区分）"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            return {int(k): v for k, v in data.get(self.cache_key, {}).items()}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_cache(self):
+        data = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        data[self.cache_key] = {str(k): v for k, v in self.cache.items()}
+        with open(self.cache_file, 'w') as f:
+            json.dump(data, f)
+    
+    def _fetch_batch(self, numbers: List[int]) -> List[Dict]:
+        """批量获取区块头和签名者"""
+        calls = [('eth_getBlockByNumber', [hex(n), False]) for n in numbers]
+        blocks = rpc_batch(self.rpc_url, calls)
+        try:
+            signers = rpc_batch(self.rpc_url, [('clique_getSigner', [hex(n)]) for n in numbers])
+        except Exception:
+            # 节点未开放 clique API 时签名者未知
+            signers = [None] * len(numbers)
+        
+        summaries = []
+        for number, block, signer in zip(numbers, blocks, signers):
+            if block is None:
+                continue
+            summaries.append({
+                'number': number,
+                'timestamp': int(block['timestamp'], 16),
+                'tx_count': len(block['transactions']),
+                'gas_used': int(block['gasUsed'], 16),
+                'gas_limit': int(block['gasLimit'], 16),
+                'difficulty': int(block['difficulty'], 16),
+                'signer': signer,
+            })
+        return summaries
+    
+    def fetch_blocks(self, start_block: int, end_block: int) -> List[Dict]:
+        """获取 [start_block, end_block] 范围内的区块（已缓存的区块不再请求）"""
+        missing = [n for n in range(start_block, end_block + 1) if n not in self.cache]
+        recent: Dict[int, Dict] = {}
+        if missing:
+            print(f"  拉取 {len(missing)} 个区块（已缓存 {end_block - start_block + 1 - len(missing)} 个）...")
+            head = int(rpc_batch(self.rpc_url, [('eth_blockNumber', [])])[0], 16)
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for summaries in executor.map(self._fetch_batch, batches):
+                    for summary in summaries:
+                        if summary['number'] > head - self.CACHE_CONFIRMATIONS:
+                            recent[summary['number']] = summary
+                        else:
+                            self.cache[summary['number']] = summary
+            self._save_cache()
+        blocks = (recent.get(n) or self.cache.get(n) for n in range(start_block, end_block + 1))
+        return [block for block in blocks if block is not None]
+    
+    def _configured_period(self) -> Optional[int]:
+        """从节点信息中读取 Clique 配置的出块间隔"""
+        try:
+            info = rpc_batch(self.rpc_url, [('admin_nodeInfo', [])])[0]
+            return info['protocols']['eth']['config']['clique']['period']
+        except Exception:
+            return None
+    
+    def analyze(self, start_block: int, end_block: int, block_period: Optional[int] = None,
+                warmup: Optional[float] = None, cooldown: Optional[float] = None) -> Dict:
+        """
+        分析区块范围并返回统计结果
+
+        warmup/cooldown（秒）用于截取稳态窗口，均未指定时按每块交易数自动检测
+        """
+        blocks = self.fetch_blocks(start_block, end_block)
+        if len(blocks) < 2:
+            raise Exception(f"区块范围 [{start_block}, {end_block}] 内区块不足，无法分析")
+        if block_period is None:
+            block_period = self._configured_period()
+        
+        tx_counts = [b['tx_count'] for b in blocks]
+        fill_ratios = [b['gas_used'] / b['gas_limit'] for b in blocks if b['gas_limit']]
+        intervals = [b['timestamp'] - a['timestamp'] for a, b in zip(blocks, blocks[1:])]
+        span = blocks[-1]['timestamp'] - blocks[0]['timestamp']
+        mean_interval = sum(intervals) / len(intervals)
+        jitter = math.sqrt(sum((x - mean_interval) ** 2 for x in intervals) / len(intervals))
+        in_turn = sum(1 for b in blocks if b['difficulty'] == self.DIFF_IN_TURN)
+        signers: Dict[str, int] = {}
+        for b in blocks:
+            if b['signer']:
+                signers[b['signer']] = signers.get(b['signer'], 0) + 1
+        
+        report = {
+            'start_block': blocks[0]['number'],
+            'end_block': blocks[-1]['number'],
+            'blocks': len(blocks),
+            'transactions': sum(tx_counts),
+            'tx_per_block_mean': sum(tx_counts) / len(blocks),
+            'tx_per_block_max': max(tx_counts),
+            'empty_blocks': sum(1 for c in tx_counts if c == 0),
+            'fill_ratio_mean': sum(fill_ratios) / len(fill_ratios) if fill_ratios else 0.0,
+            'fill_ratio_max': max(fill_ratios) if fill_ratios else 0.0,
+            'gas_per_second': sum(b['gas_used'] for b in blocks[1:]) / span if span > 0 else 0.0,
+            'chain_tps': sum(tx_counts[1:]) / span if span > 0 else 0.0,
+            'configured_period': block_period,
+            'interval_mean': mean_interval,
+            'interval_jitter': jitter,
+            'interval_max': max(intervals),
+            'in_turn_blocks': in_turn,
+            'out_of_turn_blocks': len(blocks) - in_turn,
+            'signers': signers,
+        }
+        report.update(self._steady_window(blocks, warmup, cooldown))
+        report['bottleneck'] = self._diagnose(report)
+        return report
+    
+    @staticmethod
+    def _steady_window(blocks: List[Dict], warmup: Optional[float], cooldown: Optional[float]) -> Dict:
+        """计算稳态窗口内的链上 TPS"""
+        if warmup is not None or cooldown is not None:
+            begin = blocks[0]['timestamp'] + (warmup or 0)
+            finish = blocks[-1]['timestamp'] - (cooldown or 0)
+            indices = [i for i, b in enumerate(blocks) if begin <= b['timestamp'] <= finish]
+            first, last = (indices[0], indices[-1]) if indices else (0, -1)
+        else:
+            first, last = detect_steady_state([b['tx_count'] for b in blocks], window=3)
+        window = blocks[first:last + 1]
+        span = window[-1]['timestamp'] - window[0]['timestamp'] if len(window) >= 2 else 0
+        if span <= 0:
+            return {'steady_start_block': None, 'steady_end_block': None, 'steady_tps': 0.0, 'steady_tps_ci': 0.0}
+        # 窗口第一个块的交易在窗口开始前已打包，不计入
+        interval = span / (len(window) - 1)
+        tx_counts = [b['tx_count'] for b in window[1:]]
+        return {
+            'steady_start_block': window[0]['number'],
+            'steady_end_block': window[-1]['number'],
+            'steady_tps': sum(tx_counts) / span,
+            'steady_tps_ci': batch_means_ci(tx_counts) / interval,
+        }
+    
+    @staticmethod
+    def _diagnose(report: Dict) -> str:
+        """根据统计结果粗略判断吞吐瓶颈"""
+        period = report['configured_period']
+        if report['fill_ratio_mean'] >= 0.9:
+            return 'gas'  # 区块基本被装满，受 gas_limit 限制
+        if period and report['interval_mean'] > period * 1.2:
+            return 'block_time'  # 出块慢于配置值（签名者离线、out-of-turn 延迟等）
+        if report['empty_blocks'] > report['blocks'] * 0.1 or report['fill_ratio_mean'] < 0.5:
+            return 'propagation'  # 区块有空余容量，交易没有及时到达签名者
+        return 'balanced'
+    
+    @staticmethod
+    def display(report: Dict):
+        """显示区块分析结果"""
+        verdicts = {
+            'gas': '区块 gas 上限（考虑提高 gas_limit）',
+            'block_time': '出块间隔（签名者出块延迟或 out-of-turn 出块过多）',
+            'propagation': '交易传播/交易池（区块未装满，交易未及时到达签名者）',
+            'balanced': '未发现明显瓶颈',
+        }
+        period = report['configured_period']
+        print("\n" + "=" * 60)
+        print("区块分析结果")
+        print("=" * 60)
+        print(f"区块范围:       {report['start_block']} - {report['end_block']}（{report['blocks']} 个）")
+        print(f"交易总数:       {report['transactions']}")
+        print(f"每块交易数:     平均 {report['tx_per_block_mean']:.1f} | 最大 {report['tx_per_block_max']}")
+        print(f"空块数:         {report['empty_blocks']}")
+        print(f"Gas 使用率:     平均 {report['fill_ratio_mean'] * 100:.2f}% | 最大 {report['fill_ratio_max'] * 100:.2f}%")
+        print(f"Gas/秒:         {report['gas_per_second']:.0f}")
+        print(f"链上 TPS:       {report['chain_tps']:.2f} 交易/秒")
+        if report['steady_start_block'] is not None:
+            print(f"稳态链上 TPS:   {report['steady_tps']:.2f} ± {report['steady_tps_ci']:.2f} 交易/秒"
+                  f"（区块 {report['steady_start_block']}-{report['steady_end_block']}）")
+        print(f"出块间隔:       平均 {report['interval_mean']:.2f} 秒 | 抖动 {report['interval_jitter']:.2f} 秒 | "
+              f"最大 {report['interval_max']} 秒（配置 {period if period is not None else '未知'} 秒）")
+        print(f"出块轮次:       in-turn {report['in_turn_blocks']} | out-of-turn {report['out_of_turn_blocks']}")
+        if report['signers']:
+            print("签名者分布:")
+            for signer, count in sorted(report['signers'].items(), key=lambda x: -x[1]):
+                print(f"  {signer}: {count}")
+        print(f"瓶颈判断:       {verdicts[report['bottleneck']]}")
+        print("=" * 60)
+
+
+def load_node_info(path: str) -> List[Dict]:
+    """读取 generate_network.py 生成的 node_info.json，返回带 role 字段的节点列表"""
+    with open(path, 'r') as f:
+        info = json.load(f)
+    nodes = [{**node, 'role': 'producer'} for node in info.get('producers', [])]
+    nodes += [{**node, 'role': 'syncher'} for node in info.get('synchers', [])]
+    if not nodes:
+        raise Exception(f"{path} 中没有节点信息")
+    return nodes
+
+
+@dataclass
+class ReadinessCriteria:
+    """集群就绪条件"""
+    min_peers: Optional[int] = None     # 每个节点的最少对等节点数（默认按拓扑推算，见 ClusterReadiness）
+    max_head_lag: int = 2               # 与最高区块的最大差距（区块数）
+    signer_ratio: float = 1.0           # 最近区块中出现过的签名者比例
+    signer_window: Optional[int] = None  # 检查签名者轮换的区块数（默认 签名者数 * 2）
+    timeout: float = 300.0              # 最长等待秒数
+    interval: float = 1.0               # 轮询间隔（秒）
+
+
+class ClusterReadiness:
+    """
+    集群就绪检查
+
+    读取 generate_network.py 生成的 node_info.json，并发轮询所有节点的
+    net_peerCount、eth_syncing 和区块高度，并通过 clique_getSigner 检查
+    最近区块中签名者的轮换情况。所有条件同时满足时立即返回，
+    并记录每个节点首次就绪所用的时间
+    """
+    
+    def __init__(self, nodes: List[Dict], criteria: ReadinessCriteria, topology: str = 'star'):
+        self.nodes = nodes
+        self.criteria = criteria
+        self.producers = [node for node in nodes if node['role'] == 'producer']
+        if criteria.min_peers is None:
+            criteria.min_peers = self.default_min_peers(topology, len(nodes))
+    
+    @staticmethod
+    def default_min_peers(topology: str, num_nodes: int) -> int:
+        """
+        按拓扑推算每个节点一定能达到的对等节点数
+
+        - star: 节点发现最终会连上大部分节点，取 min(节点数-1, 节点数/2)
+        - mesh: 静态节点全连接
+        - ring / k-random: 环上前后相邻的两个节点（k-random 的前驱以本节点为后继）
+        - hierarchical 及其他: 同步者只保证连接一个生产者
+        """
+        if num_nodes < 2:
+            return 0
+        if topology == 'star':
+            return min(num_nodes - 1, max(1, num_nodes // 2))
+        if topology == 'mesh':
+            return num_nodes - 1
+        if topology in ('ring', 'k-random'):
+            return min(2, num_nodes - 1)
+        return 1
+    
+    @classmethod
+    def from_node_info(cls, path: str, criteria: ReadinessCriteria) -> 'ClusterReadiness':
+        """从 node_info.json 加载节点列表和拓扑"""
+        with open(path, 'r') as f:
+            topology = json.load(f).get('topology', 'star')
+        return cls(load_node_info(path), criteria, topology)
+    
+    @staticmethod
+    def _poll_node(node: Dict) -> Optional[Dict]:
+        """查询单个节点的状态（节点不可达时返回 None）"""
+        try:
+            peers, syncing, head = rpc_batch(
+                node['rpc_url'],
+                [('net_peerCount', []), ('eth_syncing', []), ('eth_blockNumber', [])],
+                timeout=5,
+            )
+        except Exception:
+            return None
+        if head is None:
+            return None
+        return {
+            'peers': int(peers, 16) if peers else 0,
+            'syncing': bool(syncing),
+            'head': int(head, 16),
+        }
+    
+    def _signer_status(self, head: int) -> Tuple[int, int]:
+        """最近区块中出现过的签名者数量和当前签名者总数（只有生产者开放 clique API）"""
+        for node in self.producers:
+            try:
+                signers = rpc_batch(node['rpc_url'], [('clique_getSigners', ['latest'])], timeout=5)[0]
+                if not signers:
+                    continue
+                window = self.criteria.signer_window or len(signers) * 2
+                numbers = range(max(1, head - window + 1), head + 1)
+                seen = rpc_batch(node['rpc_url'], [('clique_getSigner', [hex(n)]) for n in numbers], timeout=5)
+            except Exception:
+                continue
+            active = {s.lower() for s in seen if s} & {s.lower() for s in signers}
+            return len(active), len(signers)
+        return 0, 0
+    
+    def wait(self) -> bool:
+        """轮询直到所有条件满足或超时，返回是否就绪"""
+        criteria = self.criteria
+        print(f"\n等待集群就绪（{len(self.nodes)} 个节点，超时 {criteria.timeout:.0f} 秒）...")
+        print(f"  条件: 对等节点 ≥ {criteria.min_peers} | 未在同步 | 落后最高区块 ≤ {criteria.max_head_lag} | "
+              f"活跃签名者 ≥ {criteria.signer_ratio * 100:.0f}%")
+        
+        start = time.time()
+        ready_at: Dict[str, float] = {}
+        status: List[Optional[Dict]] = [None] * len(self.nodes)
+        signers = (0, 0)
+        ready = False
+        
+        with ThreadPoolExecutor(max_workers=min(64, len(self.nodes))) as executor:
+            while True:
+                round_start = time.time()
+                status = list(executor.map(self._poll_node, self.nodes))
+                heads = [s['head'] for s in status if s]
+                best = max(heads) if heads else 0
+                
+                all_nodes_ready = True
+                for node, s in zip(self.nodes, status):
+                    node_ready = (
+                        s is not None
+                        and s['peers'] >= criteria.min_peers
+                        and not s['syncing']
+                        and best - s['head'] <= criteria.max_head_lag
+                    )
+                    if node_ready and node['name'] not in ready_at:
+                        ready_at[node['name']] = round_start - start
+                    all_nodes_ready = all_nodes_ready and node_ready
+                
+                if all_nodes_ready and best > 0:
+                    signers = self._signer_status(best)
+                    ready = signers[1] > 0 and signers[0] >= math.ceil(signers[1] * criteria.signer_ratio)
+                if ready:
+                    break
+                
+                elapsed = time.time() - start
+                if elapsed >= criteria.timeout:
+                    break
+                reachable = sum(1 for s in status if s)
+                print(f"\r  已等待 {elapsed:.0f} 秒 | 可达 {reachable}/{len(self.nodes)} | "
+                      f"已就绪 {len(ready_at)}/{len(self.nodes)} | 最高区块 {best}", end='', flush=True)
+                time.sleep(max(0.0, criteria.interval - (time.time() - round_start)))
+        
+        print()
+        self.display(status, ready_at, signers, time.time() - start, ready)
+        return ready
+    
+    def display(self, status: List[Optional[Dict]], ready_at: Dict[str, float],
+                signers: Tuple[int, int], elapsed: float, ready: bool):
+        """显示每个节点的状态和就绪时间"""
+        print("\n" + "=" * 60)
+        print("集群就绪检查" + ("通过" if ready else "超时"))
+        print("=" * 60)
+        print(f"  {'节点':<14}{'角色':<10}{'对等节点':>8}{'区块高度':>10}{'同步中':>8}{'就绪用时':>10}")
+        for node, s in zip(self.nodes, status):
+            took = f"{ready_at[node['name']]:.1f}s" if node['name'] in ready_at else '-'
+            if s is None:
+                print(f"  {node['name']:<14}{node['role']:<10}{'不可达':>8}{'-':>10}{'-':>8}{took:>10}")
+            else:
+                syncing = '是' if s['syncing'] else '否'
+                print(f"  {node['name']:<14}{node['role']:<10}{s['peers']:>8}{s['head']:>10}{syncing:>8}{took:>10}")
+        if signers[1]:
+            print(f"活跃签名者: {signers[0]}/{signers[1]}")
+        print(f"总用时: {elapsed:.1f} 秒")
+        print("=" * 60)
+
+
+class PropagationProbe:
+    """
+    跨节点传播延迟探针
+
+    每个节点一个轮询线程，通过批量 JSON-RPC 并发查询：
+    - 抽样的已提交交易首次出现在该节点（eth_getTransactionByHash 返回非空）的时间
+    - 每个新区块到达该节点（eth_blockNumber 增长）的时间
+
+    交易延迟从提交时刻算起；区块延迟从该区块最早到达任一节点（通常是出块的签名者）算起。
+    geth 的 HTTP 接口不支持订阅，精度受轮询间隔限制（请求时间取往返的中点）
+    """
+    
+    def __init__(self, nodes: List[Dict], sample_rate: float = 0.01, interval: float = 0.05,
+                 max_pending: int = 2000, tx_timeout: float = 30.0):
+        self.nodes = nodes
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_pending = max_pending
+        self.tx_timeout = tx_timeout
+        
+        self.tx_latency = {node['name']: LatencyHistogram() for node in nodes}
+        self.block_latency = {node['name']: LatencyHistogram() for node in nodes}
+        self.tx_missed = collections.Counter()
+        self.tx_sampled = 0
+        self.tx_unresolved = 0  # 停止时仍在传播、尚未超时的样本（不计为未出现）
+        self.blocks_observed = 0
+        # 交易哈希 -> (提交时间, {节点: 首次出现时间})
+        self._pending_txs: Dict[str, Tuple[float, Dict[str, float]]] = {}
+        # 区块高度 -> {节点: 到达时间}
+        self._block_arrivals: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    def submitted(self, tx_hash: str, submitted_at: float):
+        """发送交易后调用，按抽样率登记需要跟踪的交易"""
+        if random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            if len(self._pending_txs) < self.max_pending:
+                self._pending_txs[tx_hash] = (submitted_at, {})
+                self.tx_sampled += 1
+    
+    def start(self):
+        """启动各节点的轮询线程"""
+        print(f"\n启动传播延迟探针（{len(self.nodes)} 个节点，交易抽样率 {self.sample_rate * 100:g}%，"
+              f"轮询间隔 {self.interval * 1000:.0f} 毫秒）")
+        self._stop.clear()
+        for node in self.nodes:
+            thread = threading.Thread(target=self._poll_loop, args=(node,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, drain: float = 5.0):
+        """
+        停止轮询并汇总尚未完成的样本
+
+        先继续轮询最多 drain 秒，让最后提交的交易传播到所有节点；之后仍未超时的样本只是观察时间不够，
+        单独计数而不计为未出现，否则测试末尾提交的交易会被当作传播失败
+        """
+        deadline = time.time() + drain
+        while time.time() < deadline:
+            with self._lock:
+                if not self._pending_txs:
+                    break
+            time.sleep(self.interval)
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        with self._lock:
+            now = time.time()
+            for tx_hash, (submitted_at, _) in list(self._pending_txs.items()):
+                if now - submitted_at > self.tx_timeout:
+                    self._finish_tx(tx_hash)
+                else:
+                    del self._pending_txs[tx_hash]
+                    self.tx_unresolved += 1
+            for number in list(self._block_arrivals):
+                self._finish_block(number)
+    
+    def _poll_loop(self, node: Dict):
+        """单个节点的轮询循环"""
+        name = node['name']
+        last_head = None
+        while not self._stop.is_set():
+            round_start = time.time()
+            with self._lock:
+                # 只查询该节点尚未看到的交易
+                watching = [h for h, (_, seen) in self._pending_txs.items() if name not in seen][:500]
+            calls = [('eth_blockNumber', [])] + [('eth_getTransactionByHash', [h]) for h in watching]
+            try:
+                sent_at = time.time()
+                results = rpc_batch(node['rpc_url'], calls, timeout=5)
+                observed_at = (sent_at + time.time()) / 2
+            except Exception:
+                self._stop.wait(self.interval)
+                continue
+            
+            head = int(results[0], 16) if results[0] else None
+            with self._lock:
+                for tx_hash, tx in zip(watching, results[1:]):
+                    if tx is not None and tx_hash in self._pending_txs:
+                        submitted_at, seen = self._pending_txs[tx_hash]
+                        seen[name] = observed_at
+                        self.tx_latency[name].record(max(0.0, observed_at - submitted_at))
+                        if len(seen) == len(self.nodes):
+                            self._finish_tx(tx_hash)
+                
+                if head is not None:
+                    # 第一次轮询只记录起点，之前的区块不计入
+                    if last_head is not None:
+                        for number in range(last_head + 1, head + 1):
+                            arrivals = self._block_arrivals.setdefault(number, {})
+                            arrivals[name] = observed_at
+                            if len(arrivals) == len(self.nodes):
+                                self._finish_block(number)
+                    last_head = head if last_head is None else max(last_head, head)
+                
+                # 超时未出现在某些节点的交易
+                now = time.time()
+                for tx_hash in [h for h, (t, _) in self._pending_txs.items() if now - t > self.tx_timeout]:
+                    self._finish_tx(tx_hash)
+            
+            self._stop.wait(max(0.0, self.interval - (time.time() - round_start)))
+    
+    def _finish_tx(self, tx_hash: str):
+        """结束跟踪一笔交易，统计未出现的节点（调用方持有锁）"""
+        _, seen = self._pending_txs.pop(tx_hash)
+        for node in self.nodes:
+            if node['name'] not in seen:
+                self.tx_missed[node['name']] += 1
+    
+    def _finish_block(self, number: int):
+        """以最早到达的节点为起点记录各节点的区块到达延迟（调用方持有锁）"""
+        arrivals = self._block_arrivals.pop(number)
+        first = min(arrivals.values())
+        for name, arrived_at in arrivals.items():
+            self.block_latency[name].record(arrived_at - first)
+        self.blocks_observed += 1
+    
+    def to_dict(self) -> Dict:
+        return {
+            'tx_sampled': self.tx_sampled,
+            'tx_unresolved': self.tx_unresolved,
+            'blocks_observed': self.blocks_observed,
+            'nodes': {
+                node['name']: {
+                    'role': node['role'],
+                    'tx_latency': self.tx_latency[node['name']].to_dict(),
+                    'tx_missed': self.tx_missed[node['name']],
+                    'block_latency': self.block_latency[node['name']].to_dict(),
+                }
+                for node in self.nodes
+            },
+        }
+    
+    def display(self, slowest: int = 3):
+        """显示各节点和各角色的传播延迟分布，以及最慢的节点"""
+        def row(label: str, hist: LatencyHistogram, extra: str = '') -> str:
+            if hist.count == 0:
+                return f"  {label:<14}{'-':>8}{'-':>9}{'-':>9}{'-':>9}{'-':>9}{extra}"
+            return (f"  {label:<14}{hist.count:>8}{hist.percentile(50) * 1000:>9.0f}"
+                    f"{hist.percentile(95) * 1000:>9.0f}{hist.percentile(99) * 1000:>9.0f}"
+                    f"{hist.max_value * 1000:>9.0f}{extra}")
+        
+        header = f"  {'节点':<14}{'样本':>8}{'P50':>9}{'P95':>9}{'P99':>9}{'最大':>9}"
+        print("\n" + "=" * 60)
+        print("传播延迟（毫秒）")
+        print("=" * 60)
+        unresolved = f"，结束时仍在传播 {self.tx_unresolved} 笔" if self.tx_unresolved else ''
+        print(f"交易: 提交 -> 首次出现在节点（抽样 {self.tx_sampled} 笔{unresolved}）")
+        print(header + f"{'未出现':>8}")
+        for node in self.nodes:
+            print(row(node['name'], self.tx_latency[node['name']], f"{self.tx_missed[node['name']]:>8}"))
+        print(f"\n区块: 最早到达 -> 到达节点（{self.blocks_observed} 个区块）")
+        print(header)
+        for node in self.nodes:
+            print(row(node['name'], self.block_latency[node['name']]))
+        
+        print("\n按角色汇总:")
+        for role, label in (('producer', '生产者'), ('syncher', '同步者')):
+            tx_hist, block_hist = LatencyHistogram(), LatencyHistogram()
+            for node in self.nodes:
+                if node['role'] == role:
+                    tx_hist.merge(self.tx_latency[node['name']])
+                    block_hist.merge(self.block_latency[node['name']])
+            if tx_hist.count or block_hist.count:
+                print(row(f"{label}/交易", tx_hist))
+                print(row(f"{label}/区块", block_hist))
+        
+        ranked = sorted(self.nodes, key=lambda n: -self.block_latency[n['name']].percentile(95))
+        ranked = [n for n in ranked if self.block_latency[n['name']].count][:slowest]
+        if ranked:
+            print("\n区块到达最慢的节点（P95）: " + ', '.join(
+                f"{n['name']} {self.block_latency[n['name']].percentile(95) * 1000:.0f}ms" for n in ranked))
+        ranked = sorted(self.nodes, key=lambda n: -self.tx_latency[n['name']].percentile(95))
+        ranked = [n for n in ranked if self.tx_latency[n['name']].count][:slowest]
+        if ranked:
+            print("交易到达最慢的节点（P95）: " + ', '.join(
+                f"{n['name']} {self.tx_latency[n['name']].percentile(95) * 1000:.0f}ms" for n in ranked))
+        print("=" * 60)
+
+
+class ReceiptAuditor:
+    """
+    交易执行结果审计
+
+    被打包不代表执行成功。审计器在后台按速率上限查询回执，统计执行失败率及其置信区间，
+    并按发送方和负载类型分解失败：
+    - sample: 对所有已提交的交易做蓄水池抽样，样本量按误差范围计算（n = z² / 4E²），
+      用 eth_getTransactionReceipt 批量查询样本中的交易
+    - all: 用 eth_getBlockReceipts 逐块获取回执，覆盖全部已提交的交易
+    """
+    
+    MIN_AGE = 2.0  # 提交后至少等待的秒数（尚未打包时每隔这么久重试）
+    
+    def __init__(self, rpc_url: str, mode: str = 'sample', margin: float = 0.01, confidence: float = 0.95,
+                 rate: float = 200.0, grace: float = 30.0, interval: float = 0.5, seed: Optional[int] = None):
+        if mode not in ('sample', 'all'):
+            raise Exception(f"未知的审计模式: {mode}（可用: sample, all）")
+        self.rpc_url = rpc_url
+        self.mode = mode
+        self.z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.confidence = confidence
+        self.margin = margin
+        self.sample_size = math.ceil(self.z * self.z / (4 * margin * margin))
+        self.rate = rate
+        self.grace = grace
+        self.interval = interval
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.submitted_count = 0
+        # sample 模式：蓄水池中的条目 [交易哈希, 发送方, 负载, 下次查询时间, 执行状态]
+        self._reservoir: List[List] = []
+        # all 模式：尚未找到回执的交易 {哈希: (发送方, 负载)}，以及下一个要处理的区块
+        self._pending: Dict[str, Tuple[str, str]] = {}
+        self._next_block: Optional[int] = None
+        self._all_results: List[Tuple[str, str, int]] = []
+    
+    def submitted(self, tx_hash: str, sender: str, workload: str):
+        """记录一笔已提交的交易（由发送线程调用）"""
+        with self._lock:
+            self.submitted_count += 1
+            if self.mode == 'all':
+                self._pending[tx_hash] = (sender, workload)
+                return
+            entry = [tx_hash, sender, workload, time.time() + self.MIN_AGE, None]
+            if len(self._reservoir) < self.sample_size:
+                self._reservoir.append(entry)
+            else:
+                # 蓄水池抽样：第 k 笔交易以 n/k 的概率替换一个已有样本
+                j = self._rng.randrange(self.submitted_count)
+                if j < self.sample_size:
+                    self._reservoir[j] = entry
+    
+    def start(self):
+        if self.mode == 'all':
+            self._next_block = int(rpc_batch(self.rpc_url, [('eth_blockNumber', [])])[0], 16) + 1
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止后台查询，并在宽限期内查完剩余的交易"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        deadline = time.time() + self.grace
+        while self._unresolved() and time.time() < deadline:
+            try:
+                self._poll()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._poll()
+            except Exception:
+                pass  # 查询失败时下一轮重试
+    
+    def _unresolved(self) -> int:
+        with self._lock:
+            if self.mode == 'all':
+                return len(self._pending)
+            return sum(1 for entry in self._reservoir if entry[4] is None)
+    
+    def _poll(self):
+        budget = max(1, int(self.rate * self.interval))
+        if self.mode == 'all':
+            self._poll_blocks(budget)
+        else:
+            self._poll_sample(budget)
+    
+    def _poll_sample(self, budget: int):
+        """查询到期的样本回执（每轮最多 budget 笔）"""
+        now = time.time()
+        with self._lock:
+            due = [entry for entry in self._reservoir if entry[4] is None and entry[3] <= now][:budget]
+        for i in range(0, len(due), 100):
+            batch = due[i:i + 100]
+            receipts = rpc_batch(self.rpc_url, [('eth_getTransactionReceipt', [entry[0]]) for entry in batch])
+            for entry, receipt in zip(batch, receipts):
+                if receipt:
+                    entry[4] = int(receipt['status'], 16)
+                else:
+                    entry[3] = now + self.MIN_AGE  # 尚未打包，稍后重试
+    
+    def _poll_blocks(self, budget: int):
+        """逐块获取回执（每轮最多 budget 个区块，只处理已有一个确认的区块）"""
+        head = int(rpc_batch(self.rpc_url, [('eth_blockNumber', [])])[0], 16)
+        end = min(head - 1, self._next_block + budget - 1)
+        if end < self._next_block:
+            return
+        numbers = list(range(self._next_block, end + 1))
+        for i in range(0, len(numbers), 20):
+            batch = numbers[i:i + 20]
+            results = rpc_batch(self.rpc_url, [('eth_getBlockReceipts', [hex(n)]) for n in batch])
+            if any(receipts is None for receipts in results):
+                raise Exception("节点不支持 eth_getBlockReceipts 或区块不存在")
+            with self._lock:
+                for receipts in results:
+                    for receipt in receipts:
+                        info = self._pending.pop(receipt['transactionHash'], None)
+                        if info is not None:
+                            self._all_results.append((info[0], info[1], int(receipt['status'], 16)))
+            self._next_block = batch[-1] + 1
+    
+    def _results(self) -> Tuple[List[Tuple[str, str, int]], List[Tuple[str, str]]]:
+        """(已上链的 (发送方, 负载, 状态), 未找到回执的 (发送方, 负载))"""
+        with self._lock:
+            if self.mode == 'all':
+                return list(self._all_results), list(self._pending.values())
+            resolved = [(e[1], e[2], e[4]) for e in self._reservoir if e[4] is not None]
+            missing = [(e[1], e[2]) for e in self._reservoir if e[4] is None]
+            return resolved, missing
+    
+    def to_dict(self) -> Dict:
+        resolved, missing = self._results()
+        failures = [(sender, workload) for sender, workload, status in resolved if status != 1]
+        low, high = wilson_interval(len(failures), len(resolved), self.z)
+        by_workload = {}
+        for sender, workload, status in resolved:
+            entry = by_workload.setdefault(workload, {'audited': 0, 'failed': 0, 'missing': 0})
+            entry['audited'] += 1
+            entry['failed'] += status != 1
+        for sender, workload in missing:
+            by_workload.setdefault(workload, {'audited': 0, 'failed': 0, 'missing': 0})['missing'] += 1
+        by_sender = collections.Counter(sender for sender, _ in failures)
+        return {
+            'mode': self.mode,
+            'submitted': self.submitted_count,
+            'sample_size': len(resolved) + len(missing),
+            'confidence': self.confidence,
+            'audited': len(resolved),
+            'failed': len(failures),
+            'failure_rate': len(failures) / len(resolved) if resolved else 0.0,
+            'failure_rate_ci': [low, high],
+            'missing': len(missing),
+            'by_workload': by_workload,
+            'failures_by_sender': dict(by_sender.most_common()),
+        }
+    
+    def display(self, top: int = 5):
+        report = self.to_dict()
+        print("\n" + "=" * 60)
+        if self.mode == 'all':
+            print(f"交易执行审计（全部 {report['submitted']} 笔）")
+        else:
+            print(f"交易执行审计（抽样 {report['sample_size']}/{report['submitted']} 笔，"
+                  f"目标误差 ±{self.margin * 100:g}%）")
+        print("=" * 60)
+        low, high = report['failure_rate_ci']
+        print(f"执行失败率:     {report['failure_rate'] * 100:.3f}% "
+              f"[{low * 100:.3f}%, {high * 100:.3f}%]（{self.confidence * 100:g}% 置信区间）")
+        print(f"已上链:         {report['audited']} 笔，其中失败 {report['failed']} 笔")
+        if report['missing']:
+            print(f"未找到回执:     {report['missing']} 笔（宽限期内未打包或已被丢弃）")
+        for workload, entry in sorted(report['by_workload'].items()):
+            rate = entry['failed'] / entry['audited'] * 100 if entry['audited'] else 0.0
+            print(f"  {workload:14s} 失败 {entry['failed']}/{entry['audited']}（{rate:.3f}%）"
+                  + (f"，未找到 {entry['missing']}" if entry['missing'] else ''))
+        if report['failures_by_sender']:
+            print("失败最多的发送方:")
+            for sender, count in list(report['failures_by_sender'].items())[:top]:
+                print(f"  {sender} {count} 笔")
+        print("=" * 60)
+
+
+class SyncherCatchupBenchmark:
+    """
+    同步节点追块基准测试
+
+    停止指定的同步节点（docker stop），在其离线期间持续施压，然后重新启动，
+    每秒记录 eth_syncing、区块高度和导入速度（区块/秒、交易/秒），直到追上参考节点
+    """
+    
+    def __init__(self, node_info_path: str, syncher: str, max_lag: int = 2,
+                 interval: float = 1.0, timeout: float = 1800.0):
+        with open(node_info_path, 'r') as f:
+            info = json.load(f)
+        nodes = load_node_info(node_info_path)
+        matches = [n for n in nodes if n['name'] == syncher]
+        if not matches:
+            raise Exception(f"node_info.json 中没有节点 {syncher}")
+        self.node = matches[0]
+        # 参考节点：第一个生产者（或其他任意节点）
+        self.reference = next((n for n in nodes if n['role'] == 'producer' and n['name'] != syncher),
+                              next(n for n in nodes if n['name'] != syncher))
+        prefix = (info.get('network') or {}).get('container_prefix', 'ethereum')
+        self.container = f"{prefix}-{syncher}"
+        self.max_lag = max_lag
+        self.interval = interval
+        self.timeout = timeout
+        self.stopped_at = 0.0
+        self.stopped_head = 0
+        self.restarted_at = 0.0
+        self.restart_target = 0
+        self.rpc_ready_at: Optional[float] = None
+        self.converged_at: Optional[float] = None
+        # (距重启秒数, 同步节点高度, 参考节点高度, 区块/秒, 交易/秒, 是否在同步)
+        self.timeline: List[Tuple[float, int, int, float, float, bool]] = []
+    
+    def _docker(self, action: str):
+        result = subprocess.run(['docker', action, self.container], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"docker {action} {self.container} 失败: {result.stderr.strip()}")
+    
+    @staticmethod
+    def _head(rpc_url: str) -> int:
+        return int(rpc_batch(rpc_url, [('eth_blockNumber', [])], timeout=5)[0], 16)
+    
+    def stop_syncher(self):
+        """停止同步节点，记录停止时的高度"""
+        self.stopped_head = self._head(self.node['rpc_url'])
+        self._docker('stop')
+        self.stopped_at = time.time()
+        print(f"\n已停止同步节点 {self.container}（高度 {self.stopped_head}）")
+    
+    def _tx_count(self, start: int, end: int) -> int:
+        """参考节点上区块 (start, end] 的交易总数"""
+        if end <= start:
+            return 0
+        calls = [('eth_getBlockTransactionCountByNumber', [hex(n)]) for n in range(start + 1, end + 1)]
+        total = 0
+        for i in range(0, len(calls), 500):
+            total += sum(int(c, 16) for c in rpc_batch(self.reference['rpc_url'], calls[i:i + 500]) if c)
+        return total
+    
+    def restart_and_track(self):
+        """重新启动同步节点并跟踪追块过程，直到追上参考节点或超时"""
+        self.restart_target = self._head(self.reference['rpc_url'])
+        self._docker('start')
+        self.restarted_at = time.time()
+        print(f"\n已重新启动 {self.container}（离线 {self.restarted_at - self.stopped_at:.0f} 秒，"
+              f"落后 {self.restart_target - self.stopped_head} 个区块）")
+        
+        last_head, last_time = self.stopped_head, self.restarted_at
+        while time.time() - self.restarted_at < self.timeout:
+            time.sleep(self.interval)
+            now = time.time()
+            try:
+                head, syncing = rpc_batch(self.node['rpc_url'], [('eth_blockNumber', []), ('eth_syncing', [])],
+                                          timeout=5)
+                head = int(head, 16)
+            except Exception:
+                continue  # 节点尚未开放 RPC
+            if self.rpc_ready_at is None:
+                self.rpc_ready_at = now - self.restarted_at
+            target = self._head(self.reference['rpc_url'])
+            elapsed = now - last_time
+            blocks_rate = (head - last_head) / elapsed if elapsed > 0 else 0.0
+            tx_rate = self._tx_count(last_head, head) / elapsed if elapsed > 0 else 0.0
+            self.timeline.append((now - self.restarted_at, head, target, blocks_rate, tx_rate, bool(syncing)))
+            print(f"  +{now - self.restarted_at:6.1f}s | 高度 {head}/{target} | "
+                  f"{blocks_rate:7.1f} 区块/秒 | {tx_rate:9.1f} 交易/秒 | {'同步中' if syncing else '未同步'}")
+            last_head, last_time = head, now
+            if not syncing and target - head <= self.max_lag and head >= self.restart_target:
+                self.converged_at = now - self.restarted_at
+                return True
+        return False
+    
+    def to_dict(self) -> Dict:
+        return {
+            'syncher': self.node['name'],
+            'downtime': self.restarted_at - self.stopped_at,
+            'blocks_behind_at_restart': self.restart_target - self.stopped_head,
+            'rpc_ready_seconds': self.rpc_ready_at,
+            'converged_seconds': self.converged_at,
+            'timeline': [
+                {'t': t, 'head': h, 'target': tg, 'blocks_per_second': b, 'tx_per_second': x, 'syncing': sy}
+                for t, h, tg, b, x, sy in self.timeline
+            ],
+        }
+    
+    def display(self):
+        """显示追块结果"""
+        rates = [entry for entry in self.timeline if entry[3] > 0]
+        imported = (self.timeline[-1][1] - self.stopped_head) if self.timeline else 0
+        print("\n" + "=" * 60)
+        print(f"同步节点追块结果: {self.node['name']}")
+        print("=" * 60)
+        print(f"离线时长:       {self.restarted_at - self.stopped_at:.1f} 秒")
+        print(f"重启时落后:     {self.restart_target - self.stopped_head} 个区块")
+        if self.rpc_ready_at is not None:
+            print(f"RPC 可用:       重启后 {self.rpc_ready_at:.1f} 秒")
+        if self.converged_at is not None:
+            print(f"追上参考节点:   重启后 {self.converged_at:.1f} 秒（期间保持过期的时长）")
+        else:
+            print(f"追上参考节点:   {self.timeout:.0f} 秒内未追上")
+        print(f"导入区块:       {imported} 个")
+        if rates:
+            print(f"导入速度:       平均 {statistics.mean(r[3] for r in rates):.1f} 区块/秒, "
+                  f"{statistics.mean(r[4] for r in rates):.1f} 交易/秒 | "
+                  f"峰值 {max(r[3] for r in rates):.1f} 区块/秒, {max(r[4] for r in rates):.1f} 交易/秒")
+        print("=" * 60)
+
+
+class SignerScalingScenario:
+    """
+    签名者数量伸缩测试
+
+    在持续施压的同时，通过所有当前签名者节点批量调用 clique_propose 投票，
+    逐步增加或减少签名者，每次变更生效后停留一段时间，用 BlockAnalyzer 统计
+    该签名者数量下的链上 TPS、out-of-turn 出块比例和出块间隔。
+
+    候选者为 node_info.json 中的生产者，加上 extra_candidates：'synchers' 表示所有同步节点
+    （授权后通过 miner_start 开始出块），或任意地址（没有对应节点，只占用出块轮次，模拟离线签名者）
+    """
+    
+    def __init__(self, node_info_path: str, dwell: float = 60.0, vote_timeout: float = 300.0,
+                 block_cache: str = 'block_cache.json', extra_candidates: Optional[List[str]] = None):
+        nodes = load_node_info(node_info_path)
+        self.producers = [n for n in nodes if n['role'] == 'producer']
+        if not self.producers:
+            raise Exception("node_info.json 中没有生产者")
+        self.candidates = [n['address'].lower() for n in self.producers]
+        self.nodes = list(self.producers)
+        for entry in extra_candidates or []:
+            if entry == 'synchers':
+                synchers = [n for n in nodes if n['role'] == 'syncher']
+                self.nodes += synchers
+                added = [n['address'].lower() for n in synchers]
+            else:
+                added = [entry.lower()]
+            self.candidates += [a for a in added if a not in self.candidates]
+        self.by_address = {n['address'].lower(): n for n in self.nodes}
+        self.rpc_url = self.producers[0]['rpc_url']
+        self.dwell = dwell
+        self.vote_timeout = vote_timeout
+        self.analyzer = BlockAnalyzer(self.rpc_url, cache_file=block_cache)
+        self.results: List[Dict] = []
+    
+    def signers(self) -> List[str]:
+        return [s.lower() for s in rpc_batch(self.rpc_url, [('clique_getSigners', ['latest'])])[0]]
+    
+    def _head(self) -> int:
+        return int(rpc_batch(self.rpc_url, [('eth_blockNumber', [])])[0], 16)
+    
+    def _vote(self, address: str, authorize: bool):
+        """在所有当前签名者节点上投票，等待变更生效后撤销提案"""
+        voters = [self.by_address[s] for s in self.signers() if s in self.by_address]
+        action = '添加' if authorize else '移除'
+        print(f"\n{action}签名者 {address}（{len(voters)} 个签名者投票）")
+        for node in voters:
+            rpc_batch(node['rpc_url'], [('clique_propose', [address, authorize])])
+        
+        deadline = time.time() + self.vote_timeout
+        try:
+            while time.time() < deadline:
+                if (address in self.signers()) == authorize:
+                    print(f"  ✓ 已生效（区块 {self._head()}），当前签名者 {len(self.signers())} 个")
+                    return
+                time.sleep(1)
+            raise Exception(f"{self.vote_timeout:.0f} 秒内投票未生效（投票的签名者数量需要超过半数）")
+        finally:
+            # 变更生效后节点仍会继续携带该投票，撤销以免影响后续步骤
+            for node in self.nodes:
+                try:
+                    rpc_batch(node['rpc_url'], [('clique_discard', [address])])
+                except Exception:
+                    pass
+    
+    def _set_mining(self, address: str, enabled: bool):
+        """同步节点被授权后开始出块，被移除后停止（生产者始终以 --mine 运行）"""
+        node = self.by_address.get(address)
+        if node is None:
+            if enabled:
+                print(f"  ⚠️  {address} 没有对应的节点，作为不出块的签名者占用出块轮次")
+            return
+        if node['role'] != 'syncher':
+            return
+        calls = [('miner_setEtherbase', [address]), ('miner_start', [])] if enabled else [('miner_stop', [])]
+        try:
+            rpc_batch(node['rpc_url'], calls)
+        except Exception as e:
+            print(f"  ⚠️  无法在 {node['name']} 上{'开始' if enabled else '停止'}出块: {e}"
+                  f"（需要开放 miner API，请用新版 generate_network.py 重新生成）")
+    
+    def _measure(self, signer_count: int):
+        """停留 dwell 秒并统计这段时间内的区块"""
+        start = self._head()
+        print(f"  在 {signer_count} 个签名者下测量 {self.dwell:.0f} 秒...")
+        time.sleep(self.dwell)
+        report = self.analyzer.analyze(start + 1, self._head(), warmup=0, cooldown=0)
+        self.results.append({
+            'signers': signer_count,
+            'start_block': report['start_block'],
+            'end_block': report['end_block'],
+            'blocks': report['blocks'],
+            'chain_tps': report['chain_tps'],
+            'out_of_turn_rate': report['out_of_turn_blocks'] / report['blocks'],
+            'interval_mean': report['interval_mean'],
+            'interval_jitter': report['interval_jitter'],
+            'interval_max': report['interval_max'],
+        })
+    
+    def run(self, steps: List[int]):
+        """依次把签名者数量调整到 steps 中的每个值并测量"""
+        for target in steps:
+            if not 1 <= target <= len(self.candidates):
+                raise Exception(f"签名者数量 {target} 超出范围（1 - {len(self.candidates)} 个候选签名者）")
+        
+        self._measure(len(self.signers()))
+        for target in steps:
+            current = self.signers()
+            while len(current) != target:
+                if target > len(current):
+                    candidate = next(a for a in self.candidates if a not in current)
+                    self._vote(candidate, True)
+                    self._set_mining(candidate, True)
+                else:
+                    # 从后往前移除，先移除额外的候选者，保留靠前的生产者（包括 RPC 参考节点）
+                    order = self.candidates
+                    candidate = max(current, key=lambda a: order.index(a) if a in order else len(order))
+                    self._vote(candidate, False)
+                    self._set_mining(candidate, False)
+                current = self.signers()
+            self._measure(target)
+    
+    def display(self):
+        """显示每个签名者数量下的测量结果"""
+        print("\n" + "=" * 60)
+        print("签名者数量伸缩测试结果")
+        print("=" * 60)
+        print(f"  {'签名者':>6}{'区块':>6}{'链上TPS':>10}{'out-of-turn':>13}{'平均间隔':>10}{'抖动':>8}{'最大间隔':>10}")
+        for r in self.results:
+            print(f"  {r['signers']:>6}{r['blocks']:>6}{r['chain_tps']:>10.2f}{r['out_of_turn_rate'] * 100:>12.1f}%"
+                  f"{r['interval_mean']:>9.2f}s{r['interval_jitter']:>7.2f}s{r['interval_max']:>9}s")
+        print("=" * 60)
+
+
+class IndexerLagMonitor:
+    """
+    Blockscout 索引器延迟监控
+
+    测试期间定期对比链头高度和索引器已连续索引到的区块（第一个缺失区块的前一个，通过 blockscout API，
+    或在 db 容器中直接查询 postgres），统计索引器吞吐量和最大落后。
+    realtime fetcher 总是先导入最新区块，已索引的最高区块反映不出追块进度
+    """
+    
+    def __init__(self, rpc_url: str, api_url: Optional[str] = None, db_container: Optional[str] = None,
+                 interval: float = 5.0):
+        if not api_url and not db_container:
+            raise Exception("需要指定 blockscout API 地址或数据库容器")
+        self.rpc_url = rpc_url
+        self.api_url = api_url.rstrip('/') if api_url else None
+        self.db_container = db_container
+        self.interval = interval
+        # (时间, 链头高度, 已索引高度)
+        self.samples: List[Tuple[float, int, int]] = []
+        self.errors = 0
+        self._contiguous = 0  # 上次查询到的连续索引高度，下次从这里开始找缺口
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _api_get(self, path: str):
+        with urllib.request.urlopen(f"{self.api_url}{path}", timeout=10) as resp:
+            return json.loads(resp.read())
+    
+    def _indexed_head(self) -> int:
+        """
+        索引器连续索引到的区块（第一个缺失区块的前一个，创世区块都未索引时为 -1）
+
+        - API: indexing-status 只给出已索引区块的比例，按缺失区块数从最新区块往回估算
+          （追块期间缺口集中在最新区块之下，此时与第一个缺口一致）
+        - 数据库: 从上次的结果开始查找第一个后继区块缺失的区块，结果准确
+        """
+        if self.api_url:
+            status = self._api_get('/v2/main-page/indexing-status')
+            top = max((int(block['height']) for block in self._api_get('/v2/main-page/blocks')), default=0)
+            if status.get('finished_indexing_blocks'):
+                return top
+            ratio = float(status.get('indexed_blocks_ratio') or 0)
+            missing = round((1 - ratio) * (top + 1))
+            return top - missing - 1 if missing else top
+        hint = self._contiguous
+        query = (
+            f"SELECT CASE WHEN EXISTS (SELECT 1 FROM blocks WHERE consensus AND number = {hint}) "
+            f"THEN (SELECT MIN(b.number) FROM blocks b WHERE b.consensus AND b.number >= {hint} "
+            f"AND NOT EXISTS (SELECT 1 FROM blocks n WHERE n.consensus AND n.number = b.number + 1)) "
+            f"ELSE {hint - 1} END"
+        )
+        result = subprocess.run(
+            ['docker', 'exec', self.db_container, 'psql', '-U', 'blockscout', '-d', 'blockscout', '-tAc', query],
+            capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            raise Exception(f"查询 blockscout 数据库失败: {result.stderr.strip()}")
+        indexed = int(result.stdout.strip())
+        self._contiguous = max(indexed, 0)
+        return indexed
+    
+    def sample(self):
+        try:
+            head = int(rpc_batch(self.rpc_url, [('eth_blockNumber', [])], timeout=5)[0], 16)
+            indexed = self._indexed_head()
+        except Exception:
+            self.errors += 1
+            return
+        self.samples.append((time.time(), head, indexed))
+    
+    def start(self):
+        self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 30)
+        self.sample()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def _tx_count(self, start: int, end: int) -> int:
+        """区块 (start, end] 的交易总数"""
+        calls = [('eth_getBlockTransactionCountByNumber', [hex(n)]) for n in range(start + 1, end + 1)]
+        total = 0
+        for i in range(0, len(calls), 500):
+            total += sum(int(c, 16) for c in rpc_batch(self.rpc_url, calls[i:i + 500]) if c)
+        return total
+    
+    def _lag_seconds(self) -> List[float]:
+        """每次采样时已索引区块距离链头到达该高度的秒数（按采样时刻估算）"""
+        times = [t for t, _, _ in self.samples]
+        heads = [head for _, head, _ in self.samples]
+        lags = []
+        for t, _, indexed in self.samples:
+            i = bisect.bisect_left(heads, indexed)
+            lags.append(t - times[i] if i < len(times) else 0.0)
+        return lags
+    
+    def summary(self) -> Dict:
+        if len(self.samples) < 2:
+            return {}
+        (t0, head0, indexed0), (t1, head1, indexed1) = self.samples[0], self.samples[-1]
+        elapsed = t1 - t0
+        lags = [head - indexed for _, head, indexed in self.samples]
+        lag_seconds = self._lag_seconds()
+        return {
+            'duration': elapsed,
+            'chain_blocks_per_second': (head1 - head0) / elapsed,
+            'chain_tps': self._tx_count(head0, head1) / elapsed,
+            'indexer_blocks_per_second': (indexed1 - indexed0) / elapsed,
+            'indexer_tps': self._tx_count(max(indexed0, -1), indexed1) / elapsed if indexed1 > indexed0 else 0.0,
+            'indexed_head': indexed1,
+            'mean_lag_blocks': statistics.mean(lags),
+            'max_lag_blocks': max(lags),
+            'final_lag_blocks': lags[-1],
+            'max_lag_seconds': max(lag_seconds),
+            'final_lag_seconds': lag_seconds[-1],
+        }
+    
+    def display(self):
+        summary = self.summary()
+        print("\n" + "=" * 60)
+        print("Blockscout 索引器延迟")
+        print("=" * 60)
+        if not summary:
+            print(f"采样不足（失败 {self.errors} 次），请检查 blockscout API 或数据库是否可用")
+            print("=" * 60)
+            return
+        print(f"链上:           {summary['chain_tps']:.1f} 交易/秒, {summary['chain_blocks_per_second']:.2f} 区块/秒")
+        print(f"索引器:         {summary['indexer_tps']:.1f} 交易/秒, {summary['indexer_blocks_per_second']:.2f} 区块/秒"
+              f"（已连续索引到 {summary['indexed_head']}）")
+        print(f"落后区块:       平均 {summary['mean_lag_blocks']:.1f} | 最大 {summary['max_lag_blocks']} | "
+              f"结束时 {summary['final_lag_blocks']}")
+        print(f"索引延迟:       最大 {summary['max_lag_seconds']:.1f} 秒 | 结束时 {summary['final_lag_seconds']:.1f} 秒")
+        if summary['indexer_tps'] < summary['chain_tps'] * 0.9:
+            print("⚠️  索引器吞吐量低于链上 TPS，落后会持续增长（参考 blockscout-indexer.env 调整并发数和连接池）")
+        if self.errors:
+            print(f"采样失败:       {self.errors} 次")
+        print("=" * 60)
+
+
+class TPSWorker:
+    """
+    分布式模式中的工作者
+
+    通过一个简单的 HTTP 控制通道接收协调者分配的账号区间和节点列表，
+    在统一的开始时间运行测试，并回传计数和延迟直方图
+    """
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.state = 'idle'  # idle / running / done / error
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    def start(self, assignment: Dict) -> bool:
+        """开始执行分配的任务（在后台线程中运行）"""
+        with self._lock:
+            if self.state == 'running':
+                return False
+            self.state = 'running'
+            self.result = None
+            self.error = None
+        threading.Thread(target=self._run, args=(assignment,), daemon=True).start()
+        return True
+    
+    def _run(self, assignment: Dict):
+        try:
+            endpoints = assignment['endpoints']
+            config = TestConfig(
+                rpc_url=endpoints[0],
+                producer_private_key='',
+                transfer_amount=assignment['transfer_amount'],
+                distribution_amount='0',
+                concurrency=assignment['concurrency'],
+                num_accounts=assignment['num_accounts'],
+                gas_price_gwei=assignment['gas_price_gwei'],
+                rpc_urls=endpoints,
+                num_senders=assignment['num_senders'],
+                num_receivers=assignment['num_receivers'],
+                receiver_shard=tuple(assignment['receiver_shard']),
+                access_pattern=assignment['access_pattern'],
+                zipf_s=assignment['zipf_s'],
+                hot_receivers=assignment['hot_receivers'],
+                # 多个工作者共用一个储备账号会产生 nonce 冲突，分布式模式只支持轮换
+                rebalance=assignment['rebalance'],
+                rebalance_lead=assignment['rebalance_lead'],
+                dynamic_fee=assignment['dynamic_fee'],
+                priority_fee_gwei=assignment['priority_fee_gwei'],
+                fee_headroom=assignment['fee_headroom'],
+            )
+            tps_test = TPSTest(config)
+            # 发送方区间各工作者互不重叠，接收方区间所有工作者相同
+            ranges = [assignment['sender_range'], assignment['receiver_range']]
+            if assignment.get('account_seed'):
+                accounts = []
+                for start, end in ranges:
+                    tps_test.derive_accounts(assignment['account_seed'], start, end)
+                    accounts += tps_test.sub_accounts
+            else:
+                if not tps_test.load_accounts():
+                    raise Exception("无法加载 test_accounts.json（各工作者需使用同一份账号文件）")
+                accounts = [a for start, end in ranges for a in tps_test.sub_accounts[start:end]]
+            tps_test.sub_accounts = accounts
+            tps_test.run_test_threaded(assignment['duration'], start_at=assignment['start_at'])
+            with self._lock:
+                self.result = tps_test.stats.to_dict()
+                self.state = 'done'
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+                self.state = 'error'
+    
+    def status(self) -> Dict:
+        with self._lock:
+            return {'state': self.state, 'result': self.result, 'error': self.error}
+    
+    def serve_forever(self):
+        """启动控制通道"""
+        worker = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, payload: Dict):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                if self.path == '/status':
+                    self._reply(200, worker.status())
+                else:
+                    self._reply(404, {'error': 'not found'})
+            
+            def do_POST(self):
+                if self.path != '/start':
+                    self._reply(404, {'error': 'not found'})
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                assignment = json.loads(self.rfile.read(length))
+                if worker.start(assignment):
+                    self._reply(200, {'accepted': True})
+                else:
+                    self._reply(409, {'error': 'busy'})
+            
+            def log_message(self, format, *args):
+                # 控制通道请求不输出访问日志
+                pass
+        
+        server = ThreadingHTTPServer((self.host, self.port), Handler)
+        print(f"✓ 工作者已启动，控制通道: http://{self.host}:{self.port}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+class TPSCoordinator:
+    """
+    分布式模式中的协调者
+
+    为每个工作者分配互不重叠的账号区间和节点子集，
+    下发统一的开始时间，收集各工作者的统计并合并成一份报告
+    """
+    
+    def __init__(self, config: TestConfig, workers: List[str], endpoints: List[str],
+                 start_delay: float = 10.0, account_seed: Optional[str] = None):
+        self.config = config
+        self.account_seed = account_seed
+        self.workers = workers
+        self.endpoints = endpoints or [config.rpc_url]
+        self.start_delay = start_delay
+        self._spawned: List[subprocess.Popen] = []
+    
+    def spawn_local_workers(self, count: int, base_port: int = 9100):
+        """在本机启动若干个工作者进程（用于单机测试或多核施压）"""
+        print(f"\n启动 {count} 个本地工作者进程...")
+        for i in range(count):
+            port = base_port + i
+            proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker', '--listen', f'127.0.0.1:{port}'],
+                stdout=subprocess.DEVNULL,
+            )
+            self._spawned.append(proc)
+            self.workers.append(f'127.0.0.1:{port}')
+        
+        # 等待控制通道就绪
+        deadline = time.time() + 30
+        for worker in self.workers[-count:]:
+            while True:
+                try:
+                    self._request(worker, '/status')
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise Exception(f"工作者 {worker} 未能在 30 秒内启动")
+                    time.sleep(0.2)
+        print(f"✓ {count} 个本地工作者已就绪")
+    
+    def shutdown(self):
+        """结束本地启动的工作者进程"""
+        for proc in self._spawned:
+            proc.terminate()
+        for proc in self._spawned:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self._spawned = []
+    
+    @staticmethod
+    def _request(worker: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        url = f"http://{worker}{path}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return json.loads(resp.read())
+    
+    def _assignments(self, duration_seconds: int, start_at: float) -> List[Dict]:
+        """
+        为每个工作者生成任务：互不重叠的发送方区间 + 共用的接收方区间 + 节点子集
+
+        接收方不再按工作者切分，否则 hot-receiver / many-to-few 模式会变成每个工作者各有一组热点
+        """
+        num_workers = len(self.workers)
+        total = self.config.num_accounts
+        num_senders = self.config.num_senders or total // 2
+        num_receivers = self.config.num_receivers or total - num_senders
+        if num_senders + num_receivers > total:
+            raise Exception(f"发送方 ({num_senders}) + 接收方 ({num_receivers}) 超过账号总数 ({total})")
+        if num_senders < num_workers:
+            raise Exception(f"发送方 ({num_senders}) 少于工作者数量 ({num_workers})，无法为每个工作者分配发送方")
+        shares = apportion(num_senders, [1] * num_workers)
+        assignments = []
+        start = 0
+        for i in range(num_workers):
+            end = start + shares[i]
+            if len(self.endpoints) >= num_workers:
+                endpoints = self.endpoints[i::num_workers]
+            else:
+                endpoints = [self.endpoints[i % len(self.endpoints)]]
+            assignments.append({
+                'sender_range': [start, end],
+                'receiver_range': [num_senders, num_senders + num_receivers],
+                'receiver_shard': [i, num_workers],
+                'account_seed': self.account_seed,
+                'endpoints': endpoints,
+                'num_accounts': total,
+                'transfer_amount': self.config.transfer_amount,
+                'gas_price_gwei': self.config.gas_price_gwei,
+                'dynamic_fee': self.config.dynamic_fee,
+                'priority_fee_gwei': self.config.priority_fee_gwei,
+                'fee_headroom': self.config.fee_headroom,
+                'concurrency': self.config.concurrency,
+                'num_senders': end - start,
+                'num_receivers': num_receivers,
+                'access_pattern': self.config.access_pattern,
+                'zipf_s': self.config.zipf_s,
+                'hot_receivers': self.config.hot_receivers,
+                'rebalance': self.config.rebalance,
+                'rebalance_lead': self.config.rebalance_lead,
+                'duration': duration_seconds,
+                'start_at': start_at,
+            })
+            start = end
+        return assignments
+    
+    def run(self, duration_seconds: int, report_path: Optional[str] = None) -> TransactionStats:
+        """下发任务、等待完成并输出合并报告"""
+        if not self.workers:
+            raise Exception("没有可用的工作者")
+        
+        start_at = time.time() + self.start_delay
+        print(f"\n向 {len(self.workers)} 个工作者下发任务（{self.start_delay:.0f} 秒后统一开始）...")
+        for worker, assignment in zip(self.workers, self._assignments(duration_seconds, start_at)):
+            self._request(worker, '/start', assignment)
+            start, end = assignment['sender_range']
+            r_start, r_end = assignment['receiver_range']
+            print(f"  ✓ {worker}: 发送方 [{start}, {end}) 接收方 [{r_start}, {r_end}) -> "
+                  f"{', '.join(assignment['endpoints'])}")
+        
+        # 轮询各工作者直到全部结束
+        time.sleep(max(0.0, start_at - time.time()) + duration_seconds)
+        results: Dict[str, Dict] = {}
+        while len(results) < len(self.workers):
+            for worker in self.workers:
+                if worker in results:
+                    continue
+                status = self._request(worker, '/status')
+                if status['state'] == 'done':
+                    results[worker] = status['result']
+                elif status['state'] == 'error':
+                    raise Exception(f"工作者 {worker} 执行失败: {status['error']}")
+            if len(results) < len(self.workers):
+                time.sleep(1)
+        
+        merged = TransactionStats(warmup=self.config.warmup, cooldown=self.config.cooldown)
+        print("\n各工作者结果:")
+        for worker in self.workers:
+            stats = TransactionStats.from_dict(results[worker])
+            stats.warmup, stats.cooldown = self.config.warmup, self.config.cooldown
+            steady = stats.steady_state()
+            print(f"  {worker}: 成功 {stats.successful_transactions} | 失败 {stats.failed_transactions} | "
+                  f"稳态 TPS {steady['tps'] if steady else 0:.2f}")
+            merged.merge(stats)
+        merged.display()
+        
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump({
+                    'merged': merged.to_dict(),
+                    'steady_state': merged.steady_state(),
+                    'workers': results,
+                }, f, indent=2)
+            print(f"✓ 合并报告已保存到 {report_path}")
+        
+        return merged
+
+
 def load_config_from_env() -> TestConfig:
     """从环境变量加载配置"""
     return TestConfig(
@@ -518,10 +3098,62 @@ def load_config_from_env() -> TestConfig:
         transfer_amount=os.getenv('TRANSFER_AMOUNT', '0.001'),
         distribution_amount=os.getenv('DISTRIBUTION_AMOUNT', '0.1'),
         concurrency=int(os.getenv('CONCURRENCY', '50')),
+        num_accounts=int(os.getenv('NUM_ACCOUNTS', '2000')),
         gas_price_gwei=int(os.getenv('GAS_PRICE_GWEI', '20'))
     )
 
 
+def analyze_blocks(rpc_url: str, start_block: int, end_block: int, args):
+    """运行区块分析并显示结果"""
+    print(f"\n分析区块 {start_block} - {end_block}...")
+    analyzer = BlockAnalyzer(rpc_url, cache_file=args.block_cache)
+    BlockAnalyzer.display(analyzer.analyze(start_block, end_block, args.block_period,
+                                           warmup=args.warmup, cooldown=args.cooldown))
+
+
+def run_catchup_benchmark(tps_test: TPSTest, args):
+    """同步节点追块测试：停止同步节点后施压，离线结束后重启并跟踪追块，施压与追块可以重叠"""
+    bench = SyncherCatchupBenchmark(args.node_info, args.catchup, timeout=args.catchup_timeout)
+    downtime = args.catchup_downtime if args.catchup_downtime is not None else args.test
+    bench.stop_syncher()
+    load = threading.Thread(target=tps_test.run_test_threaded, args=(args.test,), daemon=True)
+    load.start()
+    try:
+        load.join(timeout=downtime)
+        bench.restart_and_track()
+        load.join()
+    finally:
+        if bench.restarted_at == 0:
+            # 异常退出时不要让同步节点一直处于停止状态
+            subprocess.run(['docker', 'start', bench.container], capture_output=True)
+    bench.display()
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'catchup': bench.to_dict(), 'load': tps_test.stats.to_dict()}, f, indent=2)
+        print(f"结果已保存到 {args.report}")
+
+
+def run_signer_scaling(tps_test: TPSTest, args):
+    """签名者伸缩测试：--test 作为施压时长上限，场景结束后提前停止施压"""
+    extra = [c for c in (args.signer_candidates or '').split(',') if c]
+    scenario = SignerScalingScenario(args.node_info, dwell=args.signer_dwell,
+                                     vote_timeout=args.vote_timeout, block_cache=args.block_cache,
+                                     extra_candidates=extra)
+    steps = [int(n) for n in args.signer_steps.split(',') if n]
+    load = threading.Thread(target=tps_test.run_test_threaded, args=(args.test,), daemon=True)
+    load.start()
+    try:
+        scenario.run(steps)
+    finally:
+        tps_test.stop_requested.set()
+        load.join()
+        scenario.display()
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'signer_scaling': scenario.results, 'load': tps_test.stats.to_dict()}, f, indent=2)
+        print(f"结果已保存到 {args.report}")
+
+
 def main():
     """主函数"""
     import argparse
@@ -544,6 +3176,24 @@ def main():
   
   # 使用异步模式
   %(prog)s --test 60 --async
+  
+  # 分布式模式：在每台施压机上启动工作者
+  %(prog)s --worker --listen 0.0.0.0:9100
+  
+  # 分布式模式：协调者分配账号和节点，合并各工作者结果
+  %(prog)s --coordinator --workers host1:9100,host2:9100 \\
+      --endpoints http://node1:8545,http://node2:8546 --test 60
+  
+  # 在本机启动 4 个工作者进程
+  %(prog)s --coordinator --spawn-workers 4 --test 60
+  
+  # 离线生成交易轨迹，再以 2 倍速回放到两个节点
+  %(prog)s --account-seed tps-test --generate-trace trace.bin --trace-rate 500 --trace-duration 120
+  %(prog)s --replay trace.bin --replay-speed 2 --endpoints http://localhost:8545,http://localhost:8546
+  %(prog)s --account-seed tps-test --replay-generated --trace-rate 500 --trace-duration 120
+  
+  # 等待集群就绪后再开始测试
+  %(prog)s --wait-ready ethereum-poa-network/node_info.json --test 60
         """
     )
     
@@ -553,6 +3203,29 @@ def main():
     parser.add_argument('--distribution', default='0.1', help='分配给每个子账号的金额（ETH，默认 0.1）')
     parser.add_argument('--concurrency', type=int, default=50, help='并发数（默认 50）')
     parser.add_argument('--gas-price', type=int, default=20, help='Gas 价格（Gwei，默认 20）')
+    parser.add_argument('--dynamic-fee', action='store_true',
+                        help='发送 EIP-1559（type 2）交易，按最新 baseFee 动态设置 maxFeePerGas')
+    parser.add_argument('--priority-fee', type=float, default=1.0,
+                        help='动态费用模式下的小费 maxPriorityFeePerGas（Gwei，默认 1）')
+    parser.add_argument('--fee-headroom', type=float, default=2.0,
+                        help='maxFeePerGas 相对 baseFee 的倍数（默认 2，可承受连续 5 个满块的涨幅）')
+    
+    parser.add_argument('--accounts', type=int, help='子账号数量（默认 2000）')
+    parser.add_argument('--senders', type=int, default=0, help='发送方数量（默认账号总数的一半）')
+    parser.add_argument('--receivers', type=int, default=0, help='接收方数量（默认剩余全部账号）')
+    parser.add_argument('--pattern', default='uniform', choices=AccessPattern.PATTERNS,
+                        help='访问模式（默认 uniform）')
+    parser.add_argument('--zipf-s', type=float, default=1.1, help='zipf 模式的分布指数（默认 1.1）')
+    parser.add_argument('--hot-receivers', type=int, default=10, help='many-to-few 模式的接收方数量（默认 10）')
+    
+    parser.add_argument('--rebalance', action='store_true', help='测试期间自动补充发送方余额')
+    parser.add_argument('--reserve-key', help='补充余额的储备账号私钥（默认使用 --key，均未指定时轮换接收方为发送方）')
+    parser.add_argument('--topup', help='每次补充的金额（ETH，默认同 --distribution）')
+    parser.add_argument('--rebalance-lead', type=float, default=30.0,
+                        help='剩余余额不足以支撑多少秒的消耗时触发补充（默认 30）')
+    
+    parser.add_argument('--account-seed', default=os.getenv('TEST_ACCOUNT_SEED'),
+                        help='由种子派生子账号（与 config.yaml 中 test_accounts.seed 一致，账号已在 genesis 中预置余额）')
     
     parser.add_argument('--create', action='store_true', help='创建子账号')
     parser.add_argument('--distribute', action='store_true', help='分配余额到子账号')
@@ -560,7 +3233,113 @@ def main():
     parser.add_argument('--async', dest='use_async', action='store_true', help='使用异步模式（默认使用多线程）')
     parser.add_argument('--verify', action='store_true', help='验证账号余额')
     
+    # 分布式模式
+    parser.add_argument('--worker', action='store_true', help='以工作者模式运行，等待协调者下发任务')
+    parser.add_argument('--listen', default='0.0.0.0:9100', help='工作者控制通道监听地址（默认 0.0.0.0:9100）')
+    parser.add_argument('--coordinator', action='store_true', help='以协调者模式运行 --test')
+    parser.add_argument('--workers', default='', help='工作者地址列表，逗号分隔（host:port）')
+    parser.add_argument('--spawn-workers', type=int, default=0, metavar='N', help='在本机启动 N 个工作者进程')
+    parser.add_argument('--endpoints', default='', help='分配给工作者的 RPC 节点列表，逗号分隔（默认 --rpc）')
+    parser.add_argument('--start-delay', type=float, default=10.0, help='统一开始时间距下发任务的秒数（默认 10）')
+    parser.add_argument('--report', help='将合并后的统计结果保存为 JSON 文件')
+    
+    # 稳态窗口
+    parser.add_argument('--warmup', type=float, help='统计时排除开头的秒数（默认自动检测稳态）')
+    parser.add_argument('--cooldown', type=float, help='统计时排除提交结束前的秒数（默认自动检测稳态）')
+    
+    # 区块分析
+    parser.add_argument('--analyze-blocks', action='store_true', help='测试结束后分析测试期间的区块')
+    parser.add_argument('--block-range', metavar='START:END', help='分析指定区块范围（无需运行测试）')
+    parser.add_argument('--block-period', type=int, help='配置的出块间隔（默认从节点 admin_nodeInfo 读取）')
+    parser.add_argument('--block-cache', default='block_cache.json', help='区块头本地缓存文件（默认 block_cache.json）')
+    
+    # 集群就绪检查
+    parser.add_argument('--wait-ready', nargs='?', const='node_info.json', metavar='NODE_INFO',
+                        help='等待集群就绪后再继续（读取 generate_network.py 生成的 node_info.json）')
+    parser.add_argument('--ready-peers', type=int, help='每个节点的最少对等节点数（默认按 node_info.json 中的拓扑推算）')
+    parser.add_argument('--ready-lag', type=int, default=2, help='允许落后最高区块的区块数（默认 2）')
+    parser.add_argument('--ready-signers', type=float, default=1.0,
+                        help='最近区块中需要出现的签名者比例（默认 1.0，即全部签名者）')
+    parser.add_argument('--ready-timeout', type=float, default=300.0, help='就绪检查的最长等待秒数（默认 300）')
+    
+    # 传播延迟探针
+    parser.add_argument('--probe-propagation', nargs='?', const='node_info.json', metavar='NODE_INFO',
+                        help='测试期间测量交易和区块在各节点间的传播延迟（读取 node_info.json）')
+    parser.add_argument('--probe-sample', type=float, default=0.01, help='跟踪的交易抽样比例（默认 0.01）')
+    parser.add_argument('--probe-interval', type=float, default=0.05, help='探针轮询间隔（秒，默认 0.05）')
+    
+    # 同步节点追块测试
+    parser.add_argument('--catchup', metavar='SYNCHER',
+                        help='追块测试：--test 开始时停止该同步节点，离线后重新启动并跟踪追块过程')
+    parser.add_argument('--catchup-downtime', type=float,
+                        help='同步节点离线的秒数（默认等于 --test，即施压结束后再重启）')
+    parser.add_argument('--catchup-timeout', type=float, default=1800.0, help='重启后等待追上的最长秒数（默认 1800）')
+    parser.add_argument('--node-info', default='node_info.json', help='node_info.json 路径（默认 node_info.json）')
+    
+    # 签名者数量伸缩测试
+    parser.add_argument('--signer-steps', metavar='N,N,...',
+                        help='签名者伸缩测试：施压期间通过 clique_propose 依次调整到这些签名者数量（如 4,3,2,3,4）')
+    parser.add_argument('--signer-candidates', metavar='LIST',
+                        help='生产者之外的候选签名者（逗号分隔）：synchers 表示所有同步节点，或任意地址')
+    parser.add_argument('--signer-dwell', type=float, default=60.0, help='每个签名者数量下的测量秒数（默认 60）')
+    parser.add_argument('--vote-timeout', type=float, default=300.0, help='等待投票生效的最长秒数（默认 300）')
+    
+    # 交易轨迹记录与回放
+    parser.add_argument('--record', metavar='FILE', help='测试期间把已签名的原始交易及发送时刻记录到轨迹文件')
+    parser.add_argument('--generate-trace', metavar='FILE',
+                        help='离线生成交易轨迹文件（按 --account-seed 派生的账号和访问模式预先签名）')
+    parser.add_argument('--trace-rate', type=float, default=100.0, help='生成轨迹的发送速率（交易/秒，默认 100）')
+    parser.add_argument('--trace-duration', type=float, default=60.0, help='生成轨迹的时长（秒，默认 60）')
+    parser.add_argument('--replay', metavar='FILE', help='回放交易轨迹文件（节点取自 --endpoints 或 --rpc）')
+    parser.add_argument('--replay-generated', action='store_true',
+                        help='不生成文件，按 --account-seed 边签名边回放合成轨迹（速率和时长同 --trace-rate / --trace-duration）')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='回放速度倍数（默认 1.0，0 表示尽快发送）')
+    
+    # Blockscout 索引器延迟
+    parser.add_argument('--indexer-api', metavar='URL',
+                        help='测试期间监控 blockscout 索引器延迟，通过 API 查询（如 http://localhost/api）')
+    parser.add_argument('--indexer-db', nargs='?', const='db', metavar='CONTAINER',
+                        help='同上，在 blockscout 数据库容器中查询（默认容器 db）')
+    parser.add_argument('--indexer-interval', type=float, default=5.0, help='索引器延迟采样间隔（秒，默认 5）')
+    
+    # 回执审计
+    parser.add_argument('--audit-receipts', nargs='?', const='sample', choices=['sample', 'all'],
+                        help='后台检查已提交交易的执行状态：sample 抽样（默认）或 all 逐块检查全部')
+    parser.add_argument('--audit-margin', type=float, default=0.01,
+                        help='抽样审计的目标误差范围（默认 0.01，即 ±1%%，决定样本量）')
+    parser.add_argument('--audit-confidence', type=float, default=0.95, help='置信水平（默认 0.95）')
+    parser.add_argument('--audit-rate', type=float, default=200.0,
+                        help='每秒最多查询的回执数（all 模式为区块数，默认 200）')
+    parser.add_argument('--audit-grace', type=float, default=30.0,
+                        help='施压结束后等待剩余交易打包的最长秒数（默认 30）')
+    
     args = parser.parse_args()
+    if (args.generate_trace or args.replay_generated) and not args.account_seed:
+        parser.error('--generate-trace / --replay-generated 需要 --account-seed：账号必须可以由种子重新派生，轨迹才能复现')
+    
+    if args.worker:
+        host, port = args.listen.rsplit(':', 1)
+        TPSWorker(host, int(port)).serve_forever()
+        return
+    
+    readiness = None
+    if args.wait_ready:
+        criteria = ReadinessCriteria(
+            min_peers=args.ready_peers,
+            max_head_lag=args.ready_lag,
+            signer_ratio=args.ready_signers,
+            timeout=args.ready_timeout,
+        )
+        try:
+            readiness = ClusterReadiness.from_node_info(args.wait_ready, criteria)
+        except Exception as e:
+            print(f"错误: 无法读取节点信息 {args.wait_ready}: {e}")
+            sys.exit(1)
+        if not readiness.wait():
+            sys.exit(1)
+        if not (args.create or args.distribute or args.test or args.verify or args.block_range):
+            return
     
     # 加载配置
     config = load_config_from_env()
@@ -578,6 +3357,24 @@ def main():
         config.concurrency = args.concurrency
     if args.gas_price:
         config.gas_price_gwei = args.gas_price
+    config.dynamic_fee = args.dynamic_fee
+    config.priority_fee_gwei = args.priority_fee
+    config.fee_headroom = args.fee_headroom
+    if args.accounts:
+        config.num_accounts = args.accounts
+    config.num_senders = args.senders
+    config.num_receivers = args.receivers
+    config.access_pattern = args.pattern
+    config.zipf_s = args.zipf_s
+    config.hot_receivers = args.hot_receivers
+    config.rebalance = args.rebalance
+    if args.reserve_key:
+        config.reserve_private_key = args.reserve_key
+    if args.topup:
+        config.topup_amount = args.topup
+    config.rebalance_lead = args.rebalance_lead
+    config.warmup = args.warmup
+    config.cooldown = args.cooldown
     
     # 验证配置
     if not config.rpc_url:
@@ -596,16 +3393,69 @@ def main():
     print(f"转账金额: {config.transfer_amount} ETH")
     print(f"分配金额: {config.distribution_amount} ETH")
     print(f"并发数: {config.concurrency}")
-    print(f"Gas 价格: {config.gas_price_gwei} Gwei")
+    if config.dynamic_fee:
+        print(f"Gas 价格: 动态（EIP-1559，小费 {config.priority_fee_gwei:g} Gwei，余量 {config.fee_headroom:g} 倍）")
+    else:
+        print(f"Gas 价格: {config.gas_price_gwei} Gwei")
     print("=" * 60)
     
+    if args.coordinator:
+        if not args.test:
+            print("错误: 协调者模式需要通过 --test 指定测试时长")
+            sys.exit(1)
+        workers = [w for w in args.workers.split(',') if w]
+        endpoints = [e for e in args.endpoints.split(',') if e]
+        coordinator = TPSCoordinator(config, workers, endpoints, args.start_delay, args.account_seed)
+        try:
+            if args.spawn_workers:
+                coordinator.spawn_local_workers(args.spawn_workers)
+            merged = coordinator.run(args.test, args.report)
+            if args.analyze_blocks:
+                analyze_blocks(config.rpc_url, merged.start_block + 1, merged.end_block, args)
+        except KeyboardInterrupt:
+            print("\n\n测试被用户中断")
+        except Exception as e:
+            print(f"\n错误: {e}")
+            sys.exit(1)
+        finally:
+            coordinator.shutdown()
+        return
+    
+    if args.replay:
+        # 回放已签名的交易，不需要加载账号
+        endpoints = [e for e in args.endpoints.split(',') if e] or [config.rpc_url]
+        try:
+            replayer = TraceReplayer(args.replay, endpoints, speed=args.replay_speed,
+                                     concurrency=config.concurrency)
+            stats = replayer.run()
+            if args.analyze_blocks:
+                analyze_blocks(endpoints[0], stats.start_block + 1, stats.end_block, args)
+        except KeyboardInterrupt:
+            print("\n\n回放被用户中断")
+        except Exception as e:
+            print(f"\n错误: {e}")
+            sys.exit(1)
+        return
+    
+    if args.block_range:
+        # 仅分析区块，不需要加载账号
+        start, end = args.block_range.split(':')
+        try:
+            analyze_blocks(config.rpc_url, int(start), int(end), args)
+        except Exception as e:
+            print(f"\n错误: {e}")
+            sys.exit(1)
+        return
+    
     tps_test = None
     try:
         # 创建测试实例
         tps_test = TPSTest(config)
         
         # 执行操作
-        if args.create:
+        if args.account_seed:
+            tps_test.derive_accounts(args.account_seed)
+        elif args.create:
             tps_test.create_accounts()
         else:
             # 尝试加载已有账号
@@ -618,18 +3468,78 @@ def main():
         
         if args.distribute:
             tps_test.distribute_balance()
-            print("\n建议等待几秒让交易确认后再运行测试...")
-            time.sleep(5)
+            if readiness:
+                # 分配交易已确认，等待所有节点追上最新区块；未就绪时与测试前的检查一样直接退出
+                if not readiness.wait():
+                    sys.exit(1)
+            else:
+                print("\n建议等待几秒让交易确认后再运行测试...")
+                time.sleep(5)
+        
+        if args.generate_trace:
+            tps_test.generate_trace(args.generate_trace, args.trace_duration, args.trace_rate)
+        
+        if args.replay_generated:
+            endpoints = [e for e in args.endpoints.split(',') if e] or [config.rpc_url]
+            source = SyntheticTrace(tps_test, args.trace_duration, args.trace_rate)
+            try:
+                stats = TraceReplayer(source, endpoints, speed=args.replay_speed,
+                                      concurrency=config.concurrency).run()
+            finally:
+                source.close()
+            if args.analyze_blocks:
+                analyze_blocks(endpoints[0], stats.start_block + 1, stats.end_block, args)
         
         if args.test:
-            if args.use_async:
-                asyncio.run(tps_test.run_test_async(args.test))
-            else:
-                tps_test.run_test_threaded(args.test)
+            if args.record:
+                tps_test.recorder = TraceWriter(args.record, tps_test.chain_id)
+            if args.probe_propagation:
+                tps_test.probe = PropagationProbe(load_node_info(args.probe_propagation),
+                                                  sample_rate=args.probe_sample,
+                                                  interval=args.probe_interval)
+                tps_test.probe.start()
+            indexer_monitor = None
+            if args.indexer_api or args.indexer_db:
+                indexer_monitor = IndexerLagMonitor(config.rpc_url, api_url=args.indexer_api,
+                                                    db_container=args.indexer_db,
+                                                    interval=args.indexer_interval)
+                indexer_monitor.start()
+            if args.audit_receipts:
+                tps_test.auditor = ReceiptAuditor(config.rpc_url, mode=args.audit_receipts,
+                                                  margin=args.audit_margin, confidence=args.audit_confidence,
+                                                  rate=args.audit_rate, grace=args.audit_grace)
+                tps_test.auditor.start()
+            try:
+                if args.catchup:
+                    run_catchup_benchmark(tps_test, args)
+                elif args.signer_steps:
+                    run_signer_scaling(tps_test, args)
+                elif args.use_async:
+                    asyncio.run(tps_test.run_test_async(args.test))
+                else:
+                    tps_test.run_test_threaded(args.test)
+            finally:
+                if tps_test.probe is not None:
+                    tps_test.probe.stop()
+                    tps_test.probe.display()
+                if indexer_monitor is not None:
+                    indexer_monitor.stop()
+                    indexer_monitor.display()
+                if tps_test.auditor is not None:
+                    print("\n等待回执审计完成...")
+                    tps_test.auditor.stop()
+                    tps_test.auditor.display()
+                if tps_test.recorder is not None:
+                    tps_test.recorder.close()
+                    print(f"\n已记录 {tps_test.recorder.count} 笔交易到 {args.record}")
+            
+            if args.analyze_blocks:
+                analyze_blocks(config.rpc_url, tps_test.stats.start_block + 1, tps_test.stats.end_block, args)
         
-        if not (args.create or args.distribute or args.test or args.verify):
+        if not (args.create or args.distribute or args.test or args.verify or args.generate_trace
+                or args.replay_generated):
             parser.print_help()
-            print("\n提示: 至少需要指定一个操作（--create, --distribute, --test, --verify）")
+            print("\n提示: 至少需要指定一个操作（--create, --distribute, --test, --verify, --block-range, --wait-ready）")
             
     except KeyboardInterrupt:
         print("\n\n测试被用户中断")